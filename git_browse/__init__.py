@@ -0,0 +1,18 @@
+"""
+git-browse opens repositories, directories, and files in the browser.  The
+library api is imported on first use, so importing the package is cheap and
+has no side effects.
+"""
+
+from typing import Any
+
+
+__all__ = ["Resolver", "TargetResult"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from git_browse import resolver  # noqa: PLC0415
+
+        return getattr(resolver, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,54 @@
+import argparse
+import pathlib
+import tempfile
+
+from git_browse.benchmarks import fixtures, runner
+
+
+def main() -> None:
+    description = "Benchmark each stage of git-browse's url resolution"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=200,
+        help="Number of times to run each stage",
+    )
+    parser.add_argument(
+        "-f",
+        "--fixture",
+        action="append",
+        choices=list(fixtures.FIXTURES),
+        help="Fixture repository to benchmark; may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--json",
+        type=pathlib.Path,
+        help="Write machine-readable results to this file",
+    )
+    parser.add_argument(
+        "--compare",
+        type=pathlib.Path,
+        help="Compare against results previously written with --json",
+    )
+    args = parser.parse_args()
+    names = args.fixture or list(fixtures.FIXTURES)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = runner.run_benchmarks(
+            pathlib.Path(temp_dir), names, args.iterations,
+        )
+    print(runner.format_results(results))
+    if args.json:
+        with open(args.json, "w") as handle:
+            handle.write(runner.dump_results(results))
+    if args.compare:
+        with open(args.compare, "r") as handle:
+            old_results = runner.load_results(handle.read())
+        print()
+        print(runner.compare_results(old_results, results))
+
+
+if __name__ == "__main__":
+    main()
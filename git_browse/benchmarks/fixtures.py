@@ -0,0 +1,135 @@
+import os
+import pathlib
+import subprocess
+
+
+REMOTE_URL = "git@github.com:albertyw/git-browse"
+TAG = "v1.0.0"
+DEEP_DIRECTORY_DEPTH = 40
+LARGE_CONFIG_BRANCHES = 5000
+MANY_REFS = 20000
+LARGE_INDEX_FILES = 100000
+ARCCONFIG = (
+    '{"phabricator.uri": "https://example.com", '
+    '"repository.callsign": "ASDF", '
+    '"git.default-relative-commit": "origin/master"}'
+)
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "git-browse",
+    "GIT_AUTHOR_EMAIL": "git-browse@example.com",
+    "GIT_COMMITTER_NAME": "git-browse",
+    "GIT_COMMITTER_EMAIL": "git-browse@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+}
+
+
+def git(repository: pathlib.Path, *args: str, stdin: str = "") -> str:
+    env = dict(os.environ)
+    env.update(GIT_ENV)
+    process = subprocess.run(
+        ["git", *args],
+        cwd=repository,
+        env=env,
+        input=stdin,
+        capture_output=True,
+        universal_newlines=True,
+        check=True,
+    )
+    return process.stdout
+
+
+def create_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Create a repository with one commit, a tag, and a github remote"""
+    os.makedirs(repository)
+    git(repository, "init", "--quiet", "--initial-branch", "master")
+    git(repository, "remote", "add", "origin", REMOTE_URL)
+    git(repository, "config", "branch.master.remote", "origin")
+    with open(repository / "README.md", "w") as handle:
+        handle.write("git-browse benchmark fixture\n")
+    with open(repository / ".arcconfig", "w") as handle:
+        handle.write(ARCCONFIG)
+    os.makedirs(repository / "directory")
+    with open(repository / "directory" / "file", "w") as handle:
+        handle.write("\n")
+    git(repository, "add", "--all")
+    git(repository, "commit", "--quiet", "--message", "Initial commit")
+    git(repository, "tag", "--annotate", "--message", TAG, TAG)
+    return repository
+
+
+def create_deep_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Return a directory nested deep inside a fresh repository"""
+    create_repository(repository)
+    deep_directory = repository.joinpath(
+        *["nested%d" % i for i in range(DEEP_DIRECTORY_DEPTH)],
+    )
+    os.makedirs(deep_directory)
+    return deep_directory
+
+
+def create_large_config_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Create a repository whose .git/config has thousands of branches"""
+    create_repository(repository)
+    sections = [
+        '[branch "feature/%d"]\n'
+        "\tremote = origin\n"
+        "\tmerge = refs/heads/feature/%d\n" % (i, i)
+        for i in range(LARGE_CONFIG_BRANCHES)
+    ]
+    with open(repository / ".git" / "config", "a") as handle:
+        handle.write("".join(sections))
+    return repository
+
+
+def create_worktree_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Return a linked worktree of a fresh repository"""
+    create_repository(repository)
+    worktree = repository.parent / (repository.name + "-worktree")
+    git(repository, "worktree", "add", "--quiet", str(worktree))
+    return worktree
+
+
+def create_many_refs_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Create a repository with tens of thousands of packed refs"""
+    create_repository(repository)
+    head = git(repository, "rev-parse", "HEAD").strip()
+    commands = "".join(
+        "create refs/tags/benchmark/%d %s\n" % (i, head)
+        for i in range(MANY_REFS)
+    )
+    git(repository, "update-ref", "--stdin", stdin=commands)
+    git(repository, "pack-refs", "--all")
+    return repository
+
+
+def create_large_index_repository(repository: pathlib.Path) -> pathlib.Path:
+    """Create a repository tracking many files that are not checked out"""
+    create_repository(repository)
+    blob = git(repository, "hash-object", "-w", "README.md").strip()
+    entries = "".join(
+        "100644 %s\tfiles/%03d/%d\n" % (blob, i % 1000, i)
+        for i in range(LARGE_INDEX_FILES)
+    )
+    git(repository, "update-index", "--index-info", stdin=entries)
+    return repository
+
+
+FIXTURES = {
+    "simple": create_repository,
+    "deep": create_deep_repository,
+    "large_config": create_large_config_repository,
+    "worktree": create_worktree_repository,
+    "many_refs": create_many_refs_repository,
+    "large_index": create_large_index_repository,
+}
+
+
+def build_fixtures(
+    base_directory: pathlib.Path, names: list[str],
+) -> dict[str, pathlib.Path]:
+    """Build the named fixtures, returning the directory to run each from"""
+    return {
+        name: FIXTURES[name](base_directory / name)
+        for name in names
+    }
@@ -0,0 +1,296 @@
+import configparser
+import functools
+import json
+import os
+import pathlib
+import platform
+import statistics
+import time
+from typing import Any, Callable, NamedTuple
+
+from git_browse import (
+    browse,
+    cache,
+    catfile,
+    context,
+    phabricator,
+    typedefs,
+)
+from git_browse.benchmarks import fixtures
+
+
+# Process spawns are slow, so they are measured with fewer iterations
+SPAWN_ITERATIONS = 10
+TARGETS = ["", "README.md", "directory", fixtures.TAG]
+HOST_CONFIGS: dict[str, tuple[str, bool, bool]] = {
+    # label: (remote url, use_sourcegraph, use_godocs)
+    "GithubHost": ("git@github.com:albertyw/git-browse", False, False),
+    "UberGithubHost": ("gitolite@code.uber.internal:a/b", False, False),
+    "BitbucketHost": ("git@bitbucket.org:albertyw/git-browse", False, False),
+    "GitlabHost": ("git@gitlab.com:albertyw/git-browse", False, False),
+    "SourcegraphHost": ("git@github.com:albertyw/git-browse", True, False),
+    "GodocsHost": ("git@github.com:albertyw/git-browse", False, True),
+    "PhabricatorHost": ("gitolite@code.uber.internal:a/b", False, False),
+}
+
+
+class Result(NamedTuple):
+    fixture: str
+    stage: str
+    host: str
+    iterations: int
+    min_us: float
+    median_us: float
+    error: str
+
+
+def time_stage(
+    fixture: str,
+    stage: str,
+    host: str,
+    function: Callable[[], object],
+    iterations: int,
+) -> Result:
+    durations = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            function()
+            durations.append(time.perf_counter_ns() - start)
+    except Exception as err:
+        error = "%s: %s" % (err.__class__.__name__, err)
+        return Result(fixture, stage, host, 0, 0.0, 0.0, error)
+    return Result(
+        fixture,
+        stage,
+        host,
+        iterations,
+        min(durations) / 1000,
+        statistics.median(durations) / 1000,
+        "",
+    )
+
+
+def parse_with_configparser(git_config_path: pathlib.Path) -> str:
+    """The configparser approach gitconfig replaced, kept as a baseline"""
+    config = configparser.ConfigParser(strict=False)
+    config.read(git_config_path)
+    branches = [b for b in config.keys() if b.startswith('branch "')]
+    return config['remote "origin"']["url"] + str(branches)
+
+
+def create_host(host: str) -> typedefs.Host:
+    git_url, use_sourcegraph, use_godocs = HOST_CONFIGS[host]
+    git_config = typedefs.GitConfig(git_url, "master")
+    if host == "PhabricatorHost":
+        git_config.try_url_match(phabricator.UBER_SSH_GITOLITE_URL)
+        return phabricator.PhabricatorHost.create(git_config)
+    return browse.parse_git_url(git_config, use_sourcegraph, use_godocs)
+
+
+def benchmark_stages(
+    fixture: str, repository_root: pathlib.Path, iterations: int,
+) -> list[Result]:
+    """Time each stage of the resolution pipeline from the current directory"""
+    repository_context = context.RepositoryContext.discover()
+    git_config_path = browse.get_git_config_path(repository_context)
+    try:
+        git_config = browse.get_git_config_data(git_config_path)
+    except RuntimeError:
+        # Still time the later stages; the failing stage reports the error
+        git_config = typedefs.GitConfig(fixtures.REMOTE_URL, "master")
+    resolution_cache = cache.ResolutionCache(
+        repository_context.git_directory,
+        repository_root,
+        repository_context.common_directory,
+    )
+    host = browse.parse_git_url(git_config)
+    resolver = catfile.CommitResolver()
+    abbreviated_head = (resolver.resolve("HEAD") or "")[:7]
+
+    def parse_git_url() -> typedefs.Host:
+        fresh_config = typedefs.GitConfig(
+            git_config.git_url, git_config.default_branch,
+        )
+        return browse.parse_git_url(fresh_config)
+
+    def get_commit_hash_cold() -> None:
+        cold_resolver = catfile.CommitResolver()
+        cold_resolver.resolve(fixtures.TAG)
+        cold_resolver.close()
+
+    def end_to_end() -> str:
+        repository_host = browse.get_repository_host()
+        git_object = browse.get_git_object(
+            "README.md", repository_root, repository_host,
+        )
+        return repository_host.get_url(git_object)
+
+    stages: list[tuple[str, Callable[[], object], int]] = [
+        ("get_repository_root", browse.get_repository_root, iterations),
+        ("get_git_config_path", browse.get_git_config_path, iterations),
+        (
+            "get_git_config_data",
+            lambda: browse.get_git_config_data(git_config_path),
+            iterations,
+        ),
+        (
+            "parse_config_configparser",
+            functools.partial(parse_with_configparser, git_config_path),
+            iterations,
+        ),
+        (
+            "get_git_config_data_cached",
+            lambda: browse.get_git_config_data(
+                git_config_path,
+                resolution_cache,
+                repository_context.git_directory,
+            ),
+            iterations,
+        ),
+        ("parse_git_url", parse_git_url, iterations),
+        (
+            "get_git_object",
+            lambda: browse.get_git_object("README.md", repository_root, host),
+            iterations,
+        ),
+        (
+            "get_git_object_indexed",
+            lambda: browse.get_git_object(
+                "README.md",
+                repository_root,
+                host,
+                repository_context=repository_context,
+            ),
+            iterations,
+        ),
+        (
+            "get_commit_hash",
+            lambda: browse.get_commit_hash(fixtures.TAG, resolver),
+            iterations,
+        ),
+        (
+            "get_commit_hash_native",
+            lambda: browse.get_commit_hash(
+                fixtures.TAG, resolver, repository_context,
+            ),
+            iterations,
+        ),
+        (
+            "get_commit_hash_abbreviated",
+            lambda: browse.get_commit_hash(
+                abbreviated_head, resolver, repository_context,
+            ),
+            iterations,
+        ),
+        ("get_commit_hash_cold", get_commit_hash_cold, SPAWN_ITERATIONS),
+        ("end_to_end", end_to_end, iterations),
+    ]
+    results = [
+        time_stage(fixture, stage, "", function, stage_iterations)
+        for stage, function, stage_iterations in stages
+    ]
+    resolver.close()
+    return results
+
+
+def benchmark_hosts(
+    fixture: str, repository_root: pathlib.Path, iterations: int,
+) -> list[Result]:
+    """Time host construction and url generation for every host class"""
+    results = []
+    for host_name in HOST_CONFIGS:
+        results.append(time_stage(
+            fixture, "create_host", host_name,
+            functools.partial(create_host, host_name),
+            iterations,
+        ))
+        try:
+            host = create_host(host_name)
+        except Exception:
+            continue
+        for target in TARGETS:
+            git_object = browse.get_git_object(target, repository_root, host)
+            try:
+                host.get_url(git_object)
+            except NotImplementedError:
+                continue
+            results.append(time_stage(
+                fixture,
+                "get_url:%s" % browse.get_object_kind(git_object),
+                host_name,
+                functools.partial(host.get_url, git_object),
+                iterations,
+            ))
+    return results
+
+
+def run_benchmarks(
+    base_directory: pathlib.Path, names: list[str], iterations: int,
+) -> list[Result]:
+    fixture_paths = fixtures.build_fixtures(base_directory, names)
+    original_directory = pathlib.Path.cwd()
+    results: list[Result] = []
+    try:
+        for name, fixture_path in fixture_paths.items():
+            os.chdir(fixture_path)
+            repository_root = browse.get_repository_root()
+            results += benchmark_stages(name, repository_root, iterations)
+            results += benchmark_hosts(name, repository_root, iterations)
+    finally:
+        os.chdir(original_directory)
+        browse.close_commit_resolvers()
+    return results
+
+
+def format_results(results: list[Result]) -> str:
+    lines = ["%-14s %-28s %-16s %12s %12s" % (
+        "fixture", "stage", "host", "min (us)", "median (us)",
+    )]
+    for result in results:
+        if result.error:
+            timing = "error: %s" % result.error
+        else:
+            timing = "%12.1f %12.1f" % (result.min_us, result.median_us)
+        lines.append("%-14s %-28s %-16s %s" % (
+            result.fixture, result.stage, result.host, timing,
+        ))
+    return "\n".join(lines)
+
+
+def dump_results(results: list[Result]) -> str:
+    data = {
+        "version": browse.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result._asdict() for result in results],
+    }
+    return json.dumps(data, indent=2)
+
+
+def load_results(data: str) -> list[Result]:
+    parsed: dict[str, Any] = json.loads(data)
+    return [Result(**result) for result in parsed["results"]]
+
+
+def compare_results(old: list[Result], new: list[Result]) -> str:
+    """Format the median time of new results relative to old results"""
+    old_medians = {
+        (r.fixture, r.stage, r.host): r.median_us for r in old if not r.error
+    }
+    lines = ["%-14s %-28s %-16s %12s %12s %8s" % (
+        "fixture", "stage", "host", "old (us)", "new (us)", "ratio",
+    )]
+    for result in new:
+        old_median = old_medians.get((result.fixture, result.stage, result.host))
+        if result.error or not old_median:
+            continue
+        lines.append("%-14s %-28s %-16s %12.1f %12.1f %7.2fx" % (
+            result.fixture,
+            result.stage,
+            result.host,
+            old_median,
+            result.median_us,
+            result.median_us / old_median,
+        ))
+    return "\n".join(lines)
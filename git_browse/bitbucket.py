@@ -1,3 +1,5 @@
+from typing import cast
+
 from git_browse import typedefs
 
 
@@ -29,6 +31,7 @@ class BitbucketHost(typedefs.Host):
         self.git_config = git_config
         self.user = user
         self.repository = repository
+        self.base_url = git_config.base_url or BITBUCKET_URL
 
     @staticmethod
     def create(git_config: typedefs.GitConfig) -> typedefs.Host:
@@ -42,14 +45,23 @@ class BitbucketHost(typedefs.Host):
     def set_host_class(self, host_class: type[typedefs.Host]) -> None:
         return
 
+    def line_fragment(self, start: int, end: int) -> str:
+        if start == end:
+            return "#lines-%d" % start
+        return "#lines-%d:%d" % (start, end)
+
     def get_url(self, git_object: typedefs.GitObject) -> str:
         repository_url = "%s%s/%s" % (
-            BITBUCKET_URL,
+            self.base_url,
             self.user,
             self.repository,
         )
         if git_object.is_commit_hash():
             return self.commit_hash_url(repository_url, git_object)
+        if git_object.is_commit_range():
+            return self.compare_url(
+                repository_url, cast(typedefs.FocusRange, git_object),
+            )
         if git_object.is_root():
             return self.root_url(repository_url, git_object)
         if git_object.is_directory():
@@ -65,6 +77,17 @@ class BitbucketHost(typedefs.Host):
         )
         return repository_url
 
+    def compare_url(
+        self, repository_url: str, focus_range: typedefs.FocusRange,
+    ) -> str:
+        # Bitbucket always compares from the merge base, newest commit first
+        repository_url = "%s/branches/compare/%s%%0D%s" % (
+            repository_url,
+            focus_range.end,
+            focus_range.start,
+        )
+        return repository_url
+
     def root_url(
         self, repository_url: str, focus_object: "typedefs.GitObject",
     ) -> str:
@@ -89,3 +112,9 @@ class BitbucketHost(typedefs.Host):
             focus_object.identifier,
         )
         return repository_url
+
+
+HOST_REGEXES: dict[str, type[typedefs.Host]] = {
+    BITBUCKET_SSH_URL: BitbucketHost,
+    BITBUCKET_HTTPS_URL: BitbucketHost,
+}
@@ -1,116 +1,303 @@
 #!/usr/bin/env python3
 
+# Modules that are only needed by some hosts or actions (subprocess,
+# webbrowser, the sourcegraph and godocs hosts) are imported
+# where they are used to keep startup fast.  See tests/test_importtime.py.
+from __future__ import annotations
+
 import argparse
-import configparser
+import atexit
+import json
 import os
 import pathlib
-import subprocess
 import sys
-from typing import Optional
-import webbrowser
-
-# Configure paths/modules from
-# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
-file_path = pathlib.Path(__file__).resolve()
-parent, root = file_path.parent, file_path.parents[1]
-sys.path.append(str(root))
-try:
-    sys.path.remove(str(parent))
-except ValueError:  # Already removed
-    pass
+import time
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+    cast,
+)
+
+if __name__ == "__main__" and not __package__:
+    # Running browse.py as a script; configure paths/modules from
+    # https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+    file_path = pathlib.Path(__file__).resolve()
+    parent, root = file_path.parent, file_path.parents[1]
+    sys.path.append(str(root))
+    try:
+        sys.path.remove(str(parent))
+    except ValueError:  # Already removed
+        pass
 
 from git_browse import (  # NOQA
-    bitbucket,
-    github,
-    gitlab,
-    godocs,
-    phabricator,
-    sourcegraph,
+    cache,
+    client,
+    context,
+    gitconfig,
+    gitindex,
+    hosts,
+    trace,
     typedefs,
 )
 
+if TYPE_CHECKING:  # pragma: no cover
+    from git_browse import catfile, objects, refs
+
 
 __version__ = "2.15.1"
-HOST_REGEXES: dict[str, type[typedefs.Host]] = {
-    github.GITHUB_SSH_URL: github.GithubHost,
-    github.GITHUB_HTTPS_URL: github.GithubHost,
-    github.GITHUB_UBER_SSH_URL: github.UberGithubHost,
-    github.GITHUB_UBER_HTTPS_URL: github.UberGithubHost,
-    github.GITHUB_UBER_OC_URL: github.UberGithubHost,
-    bitbucket.BITBUCKET_SSH_URL: bitbucket.BitbucketHost,
-    bitbucket.BITBUCKET_HTTPS_URL: bitbucket.BitbucketHost,
-    gitlab.GITLAB_SSH_URL: gitlab.GitlabHost,
-    gitlab.GITLAB_HTTPS_URL: gitlab.GitlabHost,
-    # phabricator.UBER_SSH_GITOLITE_URL: phabricator.PhabricatorHost,
-    # phabricator.UBER_HTTPS_GITOLITE_URL: phabricator.PhabricatorHost,
-    # phabricator.UBER_OC_URL: phabricator.PhabricatorHost,
-}
-
-
-def copy_text_to_clipboard(text: str) -> None:
-    stdin = text.encode("utf-8")
-    try:
-        subprocess.run(["pbcopy", "w"], input=stdin, close_fds=True, check=False)
-    except FileNotFoundError:
-        pass
+COMMIT_RESOLVERS: dict[pathlib.Path, catfile.CommitResolver] = {}
+REF_STORES: dict[pathlib.Path, refs.RefStore] = {}
+OBJECT_STORES: dict[pathlib.Path, objects.ObjectStore] = {}
+INDEXES: dict[pathlib.Path, gitindex.GitIndex] = {}
+CONFIG_SECTIONS: dict[pathlib.Path, cache.CachedSection] = {}
+HOST_TABLES: dict[
+    pathlib.Path, tuple[gitconfig.SectionConfig, hosts.HostTable],
+] = {}
+OPEN_BROWSER = (
+    "import sys, webbrowser; sys.exit(not webbrowser.open(sys.argv[1]))"
+)
+# Git refnames may not contain "..", so a target containing it is a range
+RANGE_OPERATOR = ".."
+# Remotes are mostly waiting on files and git, so threads overlap well
+MAX_REMOTE_WORKERS = 8
+
+
+class RemoteResult(NamedTuple):
+    remote: str
+    url: Optional[str]
+    error: Optional[str]
+
+
+class RepositoryResult(NamedTuple):
+    repository: str
+    url: Optional[str]
+    error: Optional[str]
+
+
+def launch(
+    command: list[str], stdin: bytes = b"", wait: bool = False,
+) -> bool:
+    """
+    Start a helper in its own session with stdin written up front, so that
+    it outlives this process.  Only waits for its exit status if asked to.
+    """
+    import subprocess  # noqa: PLC0415
+
+    with trace.span(os.path.basename(command[0]), trace.SUBPROCESS):
+        try:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+                start_new_session=True,
+            )
+        except OSError:
+            return False
+        assert process.stdin
+        try:
+            process.stdin.write(stdin)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if wait:
+            return process.wait() == 0
+    # The helper is left to run; stop Popen warning that it still is
+    process.returncode = 0
+    return True
+
+
+def copy_text_to_clipboard(text: str, wait: bool = False) -> bool:
+    return launch(["pbcopy", "w"], text.encode("utf-8"), wait)
+
+
+def get_configured_opener(
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> Optional[str]:
+    """The browse.opener command from git config, if one is set"""
+    if repository_context is None:
+        try:
+            repository_context = context.RepositoryContext.discover()
+        except FileNotFoundError:
+            return gitconfig.read_config_value(hosts.CONFIG_SECTION, "opener")
+    return get_browse_section(repository_context).values.get("opener")
+
+
+def open_browser(
+    url: str,
+    wait: bool = False,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> bool:
+    """
+    Open a url with the browse.opener command or the cached launcher,
+    discovering the launcher again if the cached one fails.  Otherwise
+    webbrowser is used, in a detached interpreter unless the caller waits
+    for the result.
+    """
+    from git_browse import opener  # noqa: PLC0415
+
+    configured_opener = get_configured_opener(repository_context)
+    if configured_opener:
+        command = opener.get_command(
+            opener.parse_opener(configured_opener), url,
+        )
+        if launch(command, wait=wait):
+            return True
+    else:
+        launcher = opener.get_launcher()
+        if launcher is not None:
+            if launch(opener.get_command(launcher, url), wait=wait):
+                return True
+            refreshed = opener.get_launcher(refresh=True)
+            if refreshed is not None and refreshed != launcher:
+                if launch(opener.get_command(refreshed, url), wait=wait):
+                    return True
+    if wait:
+        import webbrowser  # noqa: PLC0415
+
+        return webbrowser.open(url)
+    return launch([sys.executable, "-I", "-c", OPEN_BROWSER, url])
 
 
 def get_repository_root() -> pathlib.Path:
-    current_path = pathlib.Path.cwd()
-    for path in [current_path] + list(current_path.parents):
-        git_config = path / ".git"
-        if git_config.exists():
-            return path
-    raise FileNotFoundError(".git/config file not found")
-
-
-def get_git_config_path() -> pathlib.Path:
-    repository_root = get_repository_root()
-    git_directory = repository_root / ".git"
-    if git_directory.is_file():
-        with open(git_directory, "r") as handle:
-            data = handle.read()
-            git_directory = pathlib.Path(data.split(" ")[1].strip())
-    git_config_path = git_directory / "config"
+    return context.RepositoryContext.discover().worktree_root
+
+
+def get_git_config_path(
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> pathlib.Path:
+    if repository_context is None:
+        repository_context = context.RepositoryContext.discover()
+    # Linked worktrees share the config of the main repository
+    git_config_path = repository_context.common_directory / "config"
     return git_config_path
 
 
-def get_git_config_data(git_config_file: pathlib.Path) -> typedefs.GitConfig:
-    # strict is removed here because gitconfig allows for multiple "fetch" keys
-    config = configparser.ConfigParser(strict=False)
-    config.read(git_config_file)
+def get_git_config_data(
+    git_config_file: pathlib.Path,
+    resolution_cache: Optional[cache.ResolutionCache] = None,
+    git_directory: Optional[pathlib.Path] = None,
+) -> typedefs.GitConfig:
+    if resolution_cache:
+        # Fingerprint before parsing so a concurrent edit invalidates the entry
+        fingerprint = resolution_cache.fingerprint()
+        cached_config = resolution_cache.load(fingerprint)
+        if cached_config:
+            return cached_config
     try:
-        git_url = config['remote "origin"']["url"]
-    except KeyError as err:
+        origin_config = gitconfig.read_origin_config(
+            git_config_file, git_directory or git_config_file.parent,
+        )
+    except ValueError as err:
         raise RuntimeError("git config file not parseable") from err
-    branches = [b for b in config.keys() if 'branch "' in b]
-    branches = [b.lstrip('branch "').rstrip('"') for b in branches]
-    default_branch = "master"
-    if "master" not in branches:
-        if "main" in branches:
-            default_branch = "main"
-        elif branches:
-            default_branch = branches[0]
-    git_config = typedefs.GitConfig(git_url, default_branch)
+    if origin_config.url is None:
+        raise RuntimeError("git config file not parseable")
+    from git_browse import refs  # noqa: PLC0415
+
+    # The remote's own default branch is authoritative when clone recorded it
+    ref_store = refs.RefStore(
+        git_directory or git_config_file.parent, git_config_file.parent,
+    )
+    default_branch = ref_store.remote_head() or get_default_branch(
+        origin_config.branches,
+    )
+    git_config = typedefs.GitConfig(origin_config.url, default_branch)
+    # Only cache configs whose every source file is fingerprinted
+    if resolution_cache and resolution_cache.watches(origin_config.sources):
+        try:
+            get_host_class(git_config)
+        except ValueError:
+            pass
+        resolution_cache.store(git_config, fingerprint)
     return git_config
 
 
+def get_default_branch(branches: list[str]) -> str:
+    """Guess the default branch from the local branches in git config"""
+    if "master" in branches or not branches:
+        return "master"
+    if "main" in branches:
+        return "main"
+    return branches[0]
+
+
+def get_browse_section(
+    repository_context: context.RepositoryContext,
+) -> gitconfig.SectionConfig:
+    """
+    The browse section of the system, global and local config, which holds
+    configured hosts and the opener.  It is cached in the git directory and
+    read again only when one of the files it came from changes.
+    """
+    git_directory = repository_context.git_directory
+    cached = CONFIG_SECTIONS.get(git_directory)
+    if cached is not None and not cached.is_stale():
+        return cached.section
+    git_config_path = get_git_config_path(repository_context)
+    base_paths = gitconfig.get_user_config_paths() + [
+        git_config_path, git_directory / gitconfig.WORKTREE_CONFIG_NAME,
+    ]
+    resolution_cache = cache.ResolutionCache(
+        git_directory,
+        repository_context.worktree_root,
+        repository_context.common_directory,
+    )
+    cached = resolution_cache.load_section(hosts.CONFIG_SECTION, base_paths)
+    if cached is None:
+        # Fingerprint before reading so a concurrent edit invalidates the entry
+        fingerprint = cache.stat_fingerprint(base_paths)
+        section = gitconfig.read_config_section(
+            hosts.CONFIG_SECTION, git_config_path, git_directory,
+        )
+        cached = resolution_cache.store_section(
+            hosts.CONFIG_SECTION, base_paths, fingerprint, section,
+        )
+    CONFIG_SECTIONS[git_directory] = cached
+    return cached.section
+
+
+def get_host_table(
+    repository_context: context.RepositoryContext,
+) -> hosts.HostTable:
+    """The hosts configured for a repository in the browse section"""
+    section = get_browse_section(repository_context)
+    cached = HOST_TABLES.get(repository_context.git_directory)
+    if cached is not None and cached[0] is section:
+        return cached[1]
+    host_table = hosts.compile_host_table(section.subsections)
+    HOST_TABLES[repository_context.git_directory] = (section, host_table)
+    return host_table
+
+
+def get_host_class(
+    git_config: typedefs.GitConfig,
+    host_table: Optional[hosts.HostTable] = None,
+) -> type[typedefs.Host]:
+    return hosts.get_host_class(git_config, host_table)
+
+
 def parse_git_url(
     git_config: typedefs.GitConfig,
     use_sourcegraph: bool = False,
     use_godocs: bool = False,
+    host_table: Optional[hosts.HostTable] = None,
 ) -> typedefs.Host:
-    host_class = None
-    for regex, hc in HOST_REGEXES.items():
-        if git_config.try_url_match(regex):
-            host_class = hc
-            break
-    else:
-        raise ValueError("git url not parseable")
+    host_class = get_host_class(git_config, host_table)
     if use_sourcegraph:
+        from git_browse import sourcegraph  # noqa: PLC0415
+
         host = sourcegraph.SourcegraphHost.create(git_config)
         host.set_host_class(host_class)
     elif use_godocs:
+        from git_browse import godocs  # noqa: PLC0415
+
         host = godocs.GodocsHost.create(git_config)
         host.set_host_class(host_class)
     else:
@@ -118,64 +305,603 @@ def parse_git_url(
             host = host_class.create(git_config)
         except RuntimeError:
             # Fall back to sorucegraph if the primary repository host fails
-            return parse_git_url(git_config, True, False)
+            return parse_git_url(git_config, True, False, host_table)
     return host
 
 
 def get_repository_host(
     use_sourcegraph: bool = False,
     godocs: bool = False,
+    repository_context: Optional[context.RepositoryContext] = None,
 ) -> typedefs.Host:
-    git_config_file = get_git_config_path()
-    git_config = get_git_config_data(git_config_file)
-    repo_host = parse_git_url(git_config, use_sourcegraph, godocs)
+    if repository_context is None:
+        repository_context = context.RepositoryContext.discover()
+    git_config_file = get_git_config_path(repository_context)
+    resolution_cache = cache.ResolutionCache(
+        repository_context.git_directory,
+        repository_context.worktree_root,
+        repository_context.common_directory,
+    )
+    with trace.span("read config"):
+        git_config = get_git_config_data(
+            git_config_file, resolution_cache, repository_context.git_directory,
+        )
+        host_table = get_host_table(repository_context)
+    git_config.repository_root = repository_context.worktree_root
+    with trace.span("match host"):
+        repo_host = parse_git_url(
+            git_config, use_sourcegraph, godocs, host_table,
+        )
     return repo_host
 
 
 def get_git_object(
-    focus_object: str, path: pathlib.Path, host: typedefs.Host,
+    focus_object: str,
+    path: pathlib.Path,
+    host: typedefs.Host,
+    resolver: Optional[catfile.CommitResolver] = None,
+    repository_context: Optional[context.RepositoryContext] = None,
 ) -> typedefs.GitObject:
     if not focus_object:
         return typedefs.FocusObject.default()
+    if repository_context is not None:
+        git_object = get_indexed_object(focus_object, path, repository_context)
+        if git_object is not None:
+            return git_object
     object_path = path.joinpath(focus_object).resolve()
     if not object_path.exists():
-        focus_hash = get_commit_hash(focus_object)
+        if is_commit_range(focus_object):
+            return get_commit_range(focus_object, resolver, repository_context)
+        focus_hash = get_commit_hash(focus_object, resolver, repository_context)
         if focus_hash:
             return focus_hash
         error = "specified file does not exist: %s" % object_path
         raise FileNotFoundError(error)
-    object_path_str = str(object_path.relative_to(get_repository_root()))
+    if repository_context is None:
+        repository_context = context.RepositoryContext.discover()
+    repository_root = repository_context.worktree_root
+    object_path_str = str(object_path.relative_to(repository_root))
+    if is_untracked(object_path_str, repository_context):
+        # The host would not have it, so there is no url to link to
+        error = "specified file is not tracked: %s" % object_path
+        raise FileNotFoundError(error)
     if object_path.is_dir() and object_path_str[-1] != os.sep:
         object_path_str += os.sep
     return typedefs.FocusObject(object_path_str)
 
 
-def get_commit_hash(identifier: str) -> Optional[typedefs.FocusHash]:
-    command = ["git", "show", identifier, "--no-abbrev-commit"]
-    process = subprocess.run(
-        command,
-        capture_output=True,
-        universal_newlines=True, check=False,
+def is_untracked(
+    object_path_str: str, repository_context: context.RepositoryContext,
+) -> bool:
+    """Whether a path in the worktree is missing from a readable index"""
+    if object_path_str == os.curdir:
+        return False
+    index = get_index(repository_context)
+    return (
+        index.lookup(object_path_str.replace(os.sep, "/")) is None
+        and index.is_readable()
+    )
+
+
+def get_index(
+    repository_context: context.RepositoryContext,
+) -> gitindex.GitIndex:
+    """Return the shared index reader for a worktree's git directory"""
+    git_directory = repository_context.git_directory
+    if git_directory not in INDEXES:
+        INDEXES[git_directory] = gitindex.GitIndex(git_directory / "index")
+    return INDEXES[git_directory]
+
+
+def get_indexed_object(
+    focus_object: str,
+    path: pathlib.Path,
+    repository_context: context.RepositoryContext,
+) -> Optional[typedefs.FocusObject]:
+    """
+    Look a path up in the index without touching the working tree, so that
+    tracked files missing from a sparse checkout still resolve
+    """
+    repository_root = repository_context.worktree_root
+    object_path_str = os.path.relpath(
+        os.path.join(path, focus_object), repository_root,
+    )
+    if object_path_str == os.curdir or object_path_str.startswith(os.pardir):
+        return None
+    kind = get_index(repository_context).lookup(
+        object_path_str.replace(os.sep, "/"),
     )
-    if process.returncode != 0:
+    if kind is None:
+        return None
+    if kind == gitindex.TREE:
+        object_path_str += os.sep
+    return typedefs.FocusObject(object_path_str)
+
+
+def get_commit_resolver(
+    directory: Optional[pathlib.Path] = None,
+) -> catfile.CommitResolver:
+    """
+    Return the shared commit resolver for a directory, by default the
+    current working directory
+    """
+    from git_browse import catfile  # noqa: PLC0415
+
+    if directory is None:
+        directory = pathlib.Path.cwd()
+    if directory not in COMMIT_RESOLVERS:
+        if not COMMIT_RESOLVERS:
+            atexit.register(close_commit_resolvers)
+        COMMIT_RESOLVERS[directory] = catfile.CommitResolver(directory)
+    return COMMIT_RESOLVERS[directory]
+
+
+def close_commit_resolvers() -> None:
+    for resolver in COMMIT_RESOLVERS.values():
+        resolver.close()
+    COMMIT_RESOLVERS.clear()
+
+
+def get_ref_store(
+    repository_context: context.RepositoryContext,
+) -> refs.RefStore:
+    """Return the shared ref store for a repository's git directory"""
+    from git_browse import refs  # noqa: PLC0415
+
+    git_directory = repository_context.git_directory
+    if git_directory not in REF_STORES:
+        REF_STORES[git_directory] = refs.RefStore.from_context(
+            repository_context,
+        )
+    return REF_STORES[git_directory]
+
+
+def is_hex(identifier: str) -> bool:
+    return len(identifier) >= 4 and all(
+        char in "0123456789abcdef" for char in identifier
+    )
+
+
+def get_object_store(
+    repository_context: context.RepositoryContext,
+) -> objects.ObjectStore:
+    """Return the shared object store for a repository's objects"""
+    from git_browse import objects  # noqa: PLC0415
+
+    common_directory = repository_context.common_directory
+    if common_directory not in OBJECT_STORES:
+        OBJECT_STORES[common_directory] = objects.ObjectStore(common_directory)
+    return OBJECT_STORES[common_directory]
+
+
+def get_commit_hash(
+    identifier: str,
+    resolver: Optional[catfile.CommitResolver] = None,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> Optional[typedefs.FocusHash]:
+    if repository_context is not None:
+        # Refs and abbreviated hashes are looked up natively, which raises
+        # on ambiguous hashes; anything else falls back to git
+        commit_hash = get_ref_store(repository_context).resolve(identifier)
+        if not commit_hash and is_hex(identifier.lower()):
+            object_store = get_object_store(repository_context)
+            commit_hash = object_store.resolve(identifier.lower())
+        if commit_hash:
+            return typedefs.FocusHash(commit_hash)
+    if resolver is None:
+        resolver = get_commit_resolver(
+            repository_context.worktree_root if repository_context else None,
+        )
+    commit_hash = resolver.resolve(identifier)
+    if not commit_hash:
         return None
-    commit_hash = process.stdout.split("\n")[0].split(" ")[1]
     return typedefs.FocusHash(commit_hash)
 
 
+def is_commit_range(identifier: str) -> bool:
+    """Relative paths contain ".." too, but only as whole path components"""
+    if RANGE_OPERATOR not in identifier:
+        return False
+    components = identifier.replace(os.sep, "/").split("/")
+    return not any(component in ["..", "..."] for component in components)
+
+
+def get_commit_range(
+    identifier: str,
+    resolver: Optional[catfile.CommitResolver] = None,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> typedefs.FocusRange:
+    """
+    Resolve both ends of an A..B or A...B range to commit hashes.  As in
+    git, an omitted end is HEAD.
+    """
+    operator = "..." if "..." in identifier else RANGE_OPERATOR
+    start, _, end = identifier.partition(operator)
+    hashes = []
+    for revision in [start or "HEAD", end or "HEAD"]:
+        focus_hash = get_commit_hash(revision, resolver, repository_context)
+        if not focus_hash:
+            raise ValueError("unknown revision in range: %s" % revision)
+        hashes.append(focus_hash.identifier)
+    return typedefs.FocusRange(hashes[0], operator, hashes[1])
+
+
+def get_object_kind(git_object: typedefs.GitObject) -> str:
+    if git_object.is_commit_hash():
+        return "commit"
+    if git_object.is_commit_range():
+        return "range"
+    if git_object.is_root():
+        return "root"
+    if git_object.is_directory():
+        return "directory"
+    return "file"
+
+
+def resolve_stream(
+    targets: Iterable[str],
+    path: pathlib.Path,
+    host: typedefs.Host,
+    output: TextIO,
+    as_json: bool = False,
+    flush: bool = True,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> int:
+    """
+    Resolve each target line against a single host, writing one url or
+    NDJSON record per target.  Returns the number of targets that failed.
+    """
+    failures = 0
+    for line in targets:
+        target = line.rstrip("\r\n")
+        if not target:
+            continue
+        record: dict[str, str] = {"target": target}
+        try:
+            git_object = get_git_object(
+                target, path, host, repository_context=repository_context,
+            )
+            record["kind"] = get_object_kind(git_object)
+            record["url"] = host.get_url(git_object)
+        except (
+            FileNotFoundError, NotImplementedError, RuntimeError, ValueError,
+        ) as err:
+            failures += 1
+            record["error"] = str(err)
+        if as_json:
+            output.write(json.dumps(record) + "\n")
+        elif "error" in record:
+            sys.stderr.write("%s: %s\n" % (target, record["error"]))
+        else:
+            output.write(record["url"] + "\n")
+        if flush:
+            output.flush()
+    return failures
+
+
+def get_remote_git_object(
+    remote: str,
+    focus_object: str,
+    path: pathlib.Path,
+    host: typedefs.Host,
+    repository_context: context.RepositoryContext,
+) -> typedefs.GitObject:
+    """
+    Prefer the commit a remote's tracking branch points at, so that each
+    remote links to a commit it actually has
+    """
+    if focus_object and not path.joinpath(focus_object).exists():
+        ref_store = get_ref_store(repository_context)
+        commit_hash = ref_store.resolve(
+            "refs/remotes/%s/%s" % (remote, focus_object),
+        )
+        if commit_hash:
+            return typedefs.FocusHash(commit_hash)
+    return get_git_object(
+        focus_object, path, host, repository_context=repository_context,
+    )
+
+
+def resolve_remote(
+    remote: str,
+    git_url: str,
+    default_branch: str,
+    focus_object: str,
+    path: pathlib.Path,
+    use_sourcegraph: bool,
+    godocs: bool,
+    repository_context: context.RepositoryContext,
+) -> RemoteResult:
+    ref_store = get_ref_store(repository_context)
+    git_config = typedefs.GitConfig(
+        git_url, ref_store.remote_head(remote) or default_branch,
+    )
+    git_config.repository_root = repository_context.worktree_root
+    try:
+        with trace.span("resolve remote %s" % remote):
+            host = parse_git_url(
+                git_config,
+                use_sourcegraph,
+                godocs,
+                get_host_table(repository_context),
+            )
+            git_object = get_remote_git_object(
+                remote, focus_object, path, host, repository_context,
+            )
+            url = host.get_url(git_object)
+    except (
+        FileNotFoundError, NotImplementedError, RuntimeError, ValueError,
+    ) as err:
+        return RemoteResult(remote, None, str(err))
+    return RemoteResult(remote, url, None)
+
+
+def resolve_all_remotes(
+    focus_object: str,
+    path: pathlib.Path,
+    use_sourcegraph: bool = False,
+    godocs: bool = False,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> list[RemoteResult]:
+    """
+    Resolve a target against every configured remote concurrently.  Results
+    are in config order, with per-remote errors reported rather than raised.
+    """
+    from concurrent import futures  # noqa: PLC0415
+
+    if repository_context is None:
+        repository_context = context.RepositoryContext.discover()
+    git_config_file = get_git_config_path(repository_context)
+    try:
+        remote_config = gitconfig.read_remote_config(
+            git_config_file, repository_context.git_directory,
+        )
+    except ValueError as err:
+        raise RuntimeError("git config file not parseable") from err
+    if not remote_config.urls:
+        raise RuntimeError("git config file has no remotes")
+    default_branch = get_default_branch(remote_config.branches)
+    # Create the shared state up front rather than racing to in the workers
+    get_ref_store(repository_context)
+    get_host_table(repository_context)
+    get_index(repository_context)
+    get_object_store(repository_context)
+    get_commit_resolver(repository_context.worktree_root)
+    workers = min(len(remote_config.urls), MAX_REMOTE_WORKERS)
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda remote: resolve_remote(
+                remote[0],
+                remote[1],
+                default_branch,
+                focus_object,
+                path,
+                use_sourcegraph,
+                godocs,
+                repository_context,
+            ),
+            remote_config.urls.items(),
+        ))
+
+
+def expand_repositories(patterns: Iterable[str]) -> list[pathlib.Path]:
+    """
+    Expand repository paths and globs, in order and without duplicates.  A
+    pattern matching nothing is kept so that it is reported as a failure.
+    """
+    import glob  # noqa: PLC0415
+
+    repositories: dict[pathlib.Path, None] = {}
+    for pattern in patterns:
+        expanded = os.path.expanduser(pattern)
+        matches = [
+            match for match in sorted(glob.glob(expanded))
+            if os.path.isdir(match)
+        ]
+        for match in matches or [expanded]:
+            repositories.setdefault(pathlib.Path(match).absolute())
+    return list(repositories)
+
+
+def resolve_repository(
+    repository: pathlib.Path,
+    focus_object: str,
+    relative_path: str = "",
+    use_sourcegraph: bool = False,
+    godocs: bool = False,
+    release_shared: bool = True,
+) -> RepositoryResult:
+    # A listed directory must be a checkout itself, not inside an outer one
+    start = repository.absolute()
+    environ = dict(os.environ, GIT_CEILING_DIRECTORIES=str(start.parent))
+    try:
+        repository_context = context.RepositoryContext.discover(start, environ)
+    except OSError as err:
+        return RepositoryResult(str(repository), None, str(err))
+    try:
+        with trace.span("resolve repository %s" % repository):
+            host = get_repository_host(
+                use_sourcegraph, godocs, repository_context,
+            )
+            git_object = get_git_object(
+                focus_object,
+                repository_context.worktree_root.joinpath(relative_path),
+                host,
+                repository_context=repository_context,
+            )
+            url = host.get_url(git_object)
+    except (
+        OSError, NotImplementedError, RuntimeError, ValueError,
+    ) as err:
+        return RepositoryResult(str(repository), None, str(err))
+    finally:
+        # Release each checkout's files and processes as soon as it is done
+        release_repository(repository_context, release_shared)
+    return RepositoryResult(str(repository), url, None)
+
+
+def release_repository(
+    repository_context: context.RepositoryContext,
+    release_shared: bool = True,
+) -> None:
+    """
+    Close the shared readers and processes opened for a repository.  The
+    object store is shared by every worktree of a clone, so it is kept
+    unless release_shared is set.
+    """
+    ref_store = REF_STORES.pop(repository_context.git_directory, None)
+    if ref_store is not None:
+        ref_store.close()
+    resolver = COMMIT_RESOLVERS.pop(repository_context.worktree_root, None)
+    if resolver is not None:
+        resolver.close()
+    CONFIG_SECTIONS.pop(repository_context.git_directory, None)
+    HOST_TABLES.pop(repository_context.git_directory, None)
+    index = INDEXES.pop(repository_context.git_directory, None)
+    if index is not None:
+        index.close()
+    if release_shared:
+        release_object_store(repository_context.common_directory)
+
+
+def release_object_store(common_directory: pathlib.Path) -> None:
+    object_store = OBJECT_STORES.pop(common_directory, None)
+    if object_store is not None:
+        object_store.close()
+
+
+def resolve_repositories(
+    repositories: list[pathlib.Path],
+    focus_object: str,
+    relative_path: str = "",
+    use_sourcegraph: bool = False,
+    godocs: bool = False,
+) -> Iterator[RepositoryResult]:
+    """
+    Resolve the same target in many checkouts on a worker pool sized to the
+    machine, yielding results as they complete rather than in input order
+    """
+    from concurrent import futures  # noqa: PLC0415
+
+    if not repositories:
+        return
+    # Same default as the executor; repositories mostly wait on files and git
+    workers = min(len(repositories), (os.cpu_count() or 1) + 4, 32)
+    # Worktrees of one clone share an object store, so it is only closed
+    # once every worker that might be using it has finished
+    existing_stores = set(OBJECT_STORES)
+    try:
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = [
+                executor.submit(
+                    resolve_repository,
+                    repository,
+                    focus_object,
+                    relative_path,
+                    use_sourcegraph,
+                    godocs,
+                    False,
+                )
+                for repository in repositories
+            ]
+            for future in futures.as_completed(pending):
+                yield future.result()
+    finally:
+        for common_directory in set(OBJECT_STORES) - existing_stores:
+            release_object_store(common_directory)
+
+
+def print_result(
+    result: Union[RemoteResult, RepositoryResult], as_json: bool = False,
+) -> None:
+    """Print a tab separated name and url, a json record, or an error"""
+    name = result[0]
+    if as_json:
+        record = {
+            key: value for key, value in result._asdict().items() if value
+        }
+        print(json.dumps(record), flush=True)
+    elif result.error:
+        sys.stderr.write("%s: %s\n" % (name, result.error))
+    else:
+        print("%s\t%s" % (name, result.url), flush=True)
+
+
+def write_manifest(
+    host: typedefs.Host,
+    path: pathlib.Path,
+    target: Optional[str],
+    output_format: str,
+    compress: bool,
+    output: TextIO,
+) -> int:
+    """Stream the url of every tracked file under target to output"""
+    from git_browse import manifest  # noqa: PLC0415
+
+    output.flush()
+    stream: BinaryIO = output.buffer
+    if compress:
+        import gzip  # noqa: PLC0415
+
+        # The gzip command's default level; 9 is several times slower
+        stream = cast(BinaryIO, gzip.GzipFile(
+            fileobj=stream, mode="wb", compresslevel=6,
+        ))
+    try:
+        paths = manifest.iter_tracked_paths(path, [target] if target else [])
+        return manifest.write_manifest(host, paths, stream, output_format)
+    finally:
+        if compress:
+            stream.close()
+        output.buffer.flush()
+
+
+def write_commit_urls(
+    host: typedefs.Host,
+    focus_range: typedefs.FocusRange,
+    repository_context: context.RepositoryContext,
+    as_json: bool,
+    output: TextIO,
+) -> int:
+    """Stream the url of every commit in a range to output"""
+    from git_browse import revlist  # noqa: PLC0415
+
+    output.flush()
+    try:
+        commits = revlist.iter_commits(
+            repository_context.worktree_root, focus_range,
+        )
+        return revlist.write_commit_urls(
+            host, commits, output.buffer, as_json,
+        )
+    finally:
+        output.buffer.flush()
+
+
 def open_url(
     url: str,
     dry_run: bool = False,
     copy_clipboard: bool = False,
-) -> None:
+    wait: bool = False,
+    repository_context: Optional[context.RepositoryContext] = None,
+) -> bool:
+    """
+    Print a url, then hand it to the clipboard and browser without waiting
+    for them unless wait is set.  Returns False if a helper failed.
+    """
     print(url)
+    success = True
     if copy_clipboard:
-        copy_text_to_clipboard(url)
+        with trace.span("copy to clipboard"):
+            success = copy_text_to_clipboard(url, wait)
     if not dry_run:
-        webbrowser.open(url)
+        with trace.span("open browser"):
+            success = open_browser(url, wait, repository_context) and success
+    return success
 
 
 def main() -> None:
+    started = time.perf_counter_ns()
     description = "Open repositories, directories, and files in the browser.\n"
     description += "https://github.com/albertyw/git-browse"
     parser = argparse.ArgumentParser(description=description)
@@ -201,6 +927,15 @@ def main() -> None:
         action="store_true",
         help="Copy url to clipboard, if available",
     )
+    parser.add_argument(
+        "-w",
+        "--wait",
+        action="store_true",
+        help=(
+            "Wait for the browser and clipboard, and exit with an error if "
+            "either fails"
+        ),
+    )
     parser.add_argument(
         "-s",
         "--sourcegraph",
@@ -210,6 +945,77 @@ def main() -> None:
     parser.add_argument(
         "-g", "--godocs", action="store_true", help="Open objects in godocs",
     )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read targets from stdin, one per line, and print their urls",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help=(
+            "With --stdin, --all-remotes, --repositories or --each, print one "
+            "json record per line"
+        ),
+    )
+    parser.add_argument(
+        "--no-flush",
+        action="store_true",
+        help="With --stdin, buffer output instead of flushing every line",
+    )
+    parser.add_argument(
+        "--all-remotes",
+        action="store_true",
+        help="Print the url of the target on every configured remote",
+    )
+    parser.add_argument(
+        "--repositories",
+        action="append",
+        metavar="PATTERN",
+        help=(
+            "Print the url of the target in every repository matching a path "
+            "or glob, as each completes; may be repeated"
+        ),
+    )
+    parser.add_argument(
+        "--manifest",
+        choices=["tsv", "jsonl"],
+        help=(
+            "Print the path and url of every tracked file, or those under "
+            "target, in this format"
+        ),
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="With --manifest, gzip compress the output",
+    )
+    parser.add_argument(
+        "--each",
+        action="store_true",
+        help=(
+            "With a target range such as v1.0..v1.1, print the url of each "
+            "commit in the range instead of comparing its ends"
+        ),
+    )
+    parser.add_argument(
+        "--serve-stdio",
+        action="store_true",
+        help="Serve JSON-RPC resolution requests over stdin and stdout",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Serve url resolution from a warm background process",
+    )
+    parser.add_argument(
+        "--trace-timing",
+        action="store_true",
+        help=(
+            "Print how long each stage and subprocess took to stderr; "
+            "%s=FILE saves a Chrome trace" % trace.ENVIRONMENT_VARIABLE
+        ),
+    )
     parser.add_argument(
         "-v",
         "--version",
@@ -217,15 +1023,147 @@ def main() -> None:
         version=__version__,
     )
     args = parser.parse_args()
+    trace_path = os.environ.get(trace.ENVIRONMENT_VARIABLE)
+    if args.trace_timing or trace_path:
+        tracer = trace.start(started)
+        tracer.record(
+            "parse arguments", trace.STAGE, started, time.perf_counter_ns(),
+        )
+        # Reported however main exits
+        atexit.register(
+            trace.report, sys.stderr if args.trace_timing else None, trace_path,
+        )
     if args.sourcegraph and args.godocs:
         print("Sourcegraph and Godocs flags are mutually exclusive")
         return
+    if args.stdin and args.target:
+        parser.error("target cannot be combined with --stdin")
+    if args.stdin and args.all_remotes:
+        parser.error("--all-remotes cannot be combined with --stdin")
+    if args.repositories and (args.stdin or args.all_remotes):
+        parser.error(
+            "--repositories cannot be combined with --stdin or --all-remotes",
+        )
+    if args.manifest and (args.stdin or args.all_remotes or args.repositories):
+        parser.error(
+            "--manifest cannot be combined with --stdin, --all-remotes or "
+            "--repositories",
+        )
+    if args.manifest and args.godocs:
+        parser.error("--manifest cannot be combined with --godocs")
+    if args.gzip and not args.manifest:
+        parser.error("--gzip requires --manifest")
+    if args.each and not (args.target and is_commit_range(args.target)):
+        parser.error("--each requires a target range such as A..B")
+    if args.each and (
+        args.stdin or args.all_remotes or args.repositories or args.manifest
+    ):
+        parser.error(
+            "--each cannot be combined with --stdin, --all-remotes, "
+            "--repositories or --manifest",
+        )
+    if args.serve_stdio:
+        from git_browse import rpc  # noqa: PLC0415
 
-    host = get_repository_host(args.sourcegraph, args.godocs)
+        rpc.StdioServer().serve(sys.stdin, sys.stdout)
+        return
+    if args.daemon:
+        from git_browse import daemon  # noqa: PLC0415
+
+        daemon.serve(client.get_socket_path())
+        return
+    if args.repositories:
+        failures = 0
+        for result in resolve_repositories(
+            expand_repositories(args.repositories),
+            args.target or "",
+            args.path,
+            args.sourcegraph,
+            args.godocs,
+        ):
+            failures += bool(result.error)
+            print_result(result, args.json)
+        if failures:
+            sys.exit(1)
+        return
+    if not (args.stdin or args.all_remotes or args.manifest or args.each):
+        with trace.span("daemon request"):
+            url = client.request_url({
+                "version": __version__,
+                "cwd": str(pathlib.Path.cwd()),
+                "path": args.path,
+                "target": args.target or "",
+                "sourcegraph": args.sourcegraph,
+                "godocs": args.godocs,
+            })
+        if url:
+            success = open_url(url, args.dry_run, args.copy, args.wait)
+            if args.wait and not success:
+                sys.exit(1)
+            return
+
+    with trace.span("discover repository"):
+        repository_context = context.RepositoryContext.discover()
     path = pathlib.Path.cwd().joinpath(args.path)
-    git_object = get_git_object(args.target, path, host)
-    url = host.get_url(git_object)
-    open_url(url, args.dry_run, args.copy)
+    if args.all_remotes:
+        results = resolve_all_remotes(
+            args.target or "",
+            path,
+            args.sourcegraph,
+            args.godocs,
+            repository_context,
+        )
+        for remote_result in results:
+            print_result(remote_result, args.json)
+        if any(remote_result.error for remote_result in results):
+            sys.exit(1)
+        return
+    host = get_repository_host(
+        args.sourcegraph, args.godocs, repository_context,
+    )
+    if args.manifest:
+        with trace.span("write manifest"):
+            write_manifest(
+                host, path, args.target, args.manifest, args.gzip, sys.stdout,
+            )
+        return
+    if args.stdin:
+        with trace.span("resolve stdin"):
+            failures = resolve_stream(
+                sys.stdin,
+                path,
+                host,
+                sys.stdout,
+                args.json,
+                not args.no_flush,
+                repository_context,
+            )
+        if failures:
+            sys.exit(1)
+        return
+    with trace.span("resolve target"):
+        git_object = get_git_object(
+            args.target, path, host, repository_context=repository_context,
+        )
+    if args.each:
+        if not git_object.is_commit_range():
+            parser.error("--each requires a target range such as A..B")
+        with trace.span("write commit urls"):
+            write_commit_urls(
+                host,
+                cast(typedefs.FocusRange, git_object),
+                repository_context,
+                args.json,
+                sys.stdout,
+            )
+        return
+    with trace.span("format url"):
+        url = host.get_url(git_object)
+    success = open_url(
+        url, args.dry_run, args.copy, args.wait, repository_context,
+    )
+    if args.wait and not success:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,313 @@
+import json
+import os
+import pathlib
+from typing import Any, NamedTuple, Optional
+
+from git_browse import gitconfig, trace, typedefs
+
+
+CACHE_FILE_NAME = "git-browse-cache.json"
+CACHE_VERSION = 1
+SECTION_CACHE_FILE_NAME = "git-browse-section-cache.json"
+SECTION_CACHE_VERSION = 1
+Fingerprint = list[Optional[list[int]]]
+
+
+def stat_fingerprint(paths: list[pathlib.Path]) -> Fingerprint:
+    """Cheap change detection for a set of files without reading them"""
+    fingerprint: Fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            fingerprint.append(None)
+            continue
+        fingerprint.append([stat.st_mtime_ns, stat.st_size, stat.st_ino])
+    return fingerprint
+
+
+def write_atomic(path: pathlib.Path, data: str) -> None:
+    """Write a file so that concurrent readers never see a partial write"""
+    import tempfile  # noqa: PLC0415
+
+    handle, temp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=".%s." % path.name,
+    )
+    try:
+        with os.fdopen(handle, "w") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def list_tracked_files(
+    repository_root: pathlib.Path, file_name: str,
+) -> list[str]:
+    """Every tracked file with a name, relative to the repository root"""
+    import subprocess  # noqa: PLC0415
+
+    with trace.span("git ls-files %s" % file_name, trace.SUBPROCESS):
+        process = subprocess.run(
+            ["git", "ls-files", "-z", "--full-name", "--",
+             ":(glob)**/%s" % file_name],
+            capture_output=True,
+            cwd=repository_root,
+            check=False,
+        )
+    if process.returncode:
+        return []
+    paths = process.stdout.decode("utf-8", "surrogateescape").split("\0")
+    return [path for path in paths if path]
+
+
+class TrackedFileIndex(object):
+    """
+    Values parsed from every tracked file with one name, keyed by the slash
+    separated directory holding it, with "" for the root.  It is cached in
+    the git directory and rebuilt when the git index or any of the files
+    changes.  Subclasses set the file names and parse each file.
+    """
+
+    cache_file_name = ""
+    cache_version = 1
+    file_name = ""
+
+    def __init__(
+        self, repository_root: pathlib.Path, git_directory: pathlib.Path,
+    ) -> None:
+        self.repository_root = repository_root
+        self.cache_path = git_directory / self.cache_file_name
+        # Adding or removing a tracked file changes the git index
+        self.index_path = git_directory / "index"
+        self.entries: dict[str, Any] = {}
+        # The files the entries were parsed from, and their fingerprint
+        self.files: list[str] = []
+        self.stamp: Fingerprint = []
+        if not self.load():
+            self.build()
+
+    def parse(self, data: str) -> Any:
+        """A json serializable value for a file, or None to leave it out"""
+        raise NotImplementedError
+
+    def fingerprint(self, files: list[str]) -> Fingerprint:
+        return stat_fingerprint(
+            [self.index_path] + [self.repository_root / path for path in files],
+        )
+
+    def load(self) -> bool:
+        try:
+            with open(self.cache_path, "r") as handle:
+                data: dict[str, Any] = json.load(handle)
+            if data["version"] != self.cache_version:
+                return False
+            files = [str(path) for path in data["files"]]
+            stamp = self.fingerprint(files)
+            if data["fingerprint"] != stamp:
+                return False
+            entries = {
+                str(directory): value
+                for directory, value in data["entries"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        self.entries = entries
+        self.files = files
+        self.stamp = stamp
+        return True
+
+    def build(self) -> None:
+        files = list_tracked_files(self.repository_root, self.file_name)
+        # Fingerprint before reading so a concurrent edit invalidates the cache
+        fingerprint = self.fingerprint(files)
+        self.files = files
+        self.stamp = fingerprint
+        self.entries = {}
+        for path in files:
+            try:
+                with open(self.repository_root / path, "r") as handle:
+                    value = self.parse(handle.read())
+            except (OSError, UnicodeDecodeError):
+                continue
+            if value is not None:
+                directory = path[:-len(self.file_name)].rstrip("/")
+                self.entries[directory] = value
+        data = {
+            "version": self.cache_version,
+            "fingerprint": fingerprint,
+            "files": files,
+            "entries": self.entries,
+        }
+        try:
+            write_atomic(self.cache_path, json.dumps(data))
+        except OSError:
+            pass
+
+    def is_stale(self) -> bool:
+        """Whether a file was added, removed or changed since indexing"""
+        return self.fingerprint(self.files) != self.stamp
+
+    def nearest(self, directory: str) -> Optional[str]:
+        """The deepest indexed directory that is or contains a directory"""
+        prefix = directory.strip("/")
+        while prefix not in self.entries:
+            if not prefix:
+                return None
+            prefix = prefix.rpartition("/")[0]
+        return prefix
+
+
+class CachedSection(NamedTuple):
+    """A parsed config section and the files it was read from"""
+
+    section: gitconfig.SectionConfig
+    paths: list[pathlib.Path]
+    fingerprint: Fingerprint
+
+    def is_stale(self) -> bool:
+        return stat_fingerprint(self.paths) != self.fingerprint
+
+
+class ResolutionCache(object):
+    """
+    Caches a repository's parsed git config and matched host regex in the
+    git directory, keyed on the stat fingerprint of the files it came from
+    """
+
+    def __init__(
+        self,
+        git_directory: pathlib.Path,
+        repository_root: pathlib.Path,
+        common_directory: Optional[pathlib.Path] = None,
+    ) -> None:
+        if common_directory is None:
+            common_directory = git_directory
+        # Each linked worktree keeps its own cache next to its own HEAD
+        self.cache_path = git_directory / CACHE_FILE_NAME
+        self.section_cache_path = git_directory / SECTION_CACHE_FILE_NAME
+        self.watched_paths = [
+            common_directory / "config",
+            git_directory / "config.worktree",
+            git_directory / "HEAD",
+            common_directory / "refs" / "remotes" / "origin" / "HEAD",
+            repository_root / ".arcconfig",
+            # insteadOf rewrites in these apply to the remote url
+            *gitconfig.get_user_config_paths(),
+        ]
+
+    def watches(self, paths: list[pathlib.Path]) -> bool:
+        return all(path in self.watched_paths for path in paths)
+
+    def fingerprint(self) -> Fingerprint:
+        return stat_fingerprint(self.watched_paths)
+
+    def load(self, fingerprint: Fingerprint) -> Optional[typedefs.GitConfig]:
+        try:
+            with open(self.cache_path, "r") as handle:
+                data: dict[str, Any] = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get("version") != CACHE_VERSION:
+            return None
+        if data.get("fingerprint") != fingerprint:
+            return None
+        try:
+            git_config = typedefs.GitConfig(
+                data["git_url"], data["default_branch"],
+            )
+            if data["host_regex"] is not None:
+                git_config.host_regex = data["host_regex"]
+                git_config.url_regex_match = typedefs.CachedMatch(
+                    data["groups"],
+                )
+        except (KeyError, TypeError):
+            return None
+        return git_config
+
+    def store(
+        self, git_config: typedefs.GitConfig, fingerprint: Fingerprint,
+    ) -> None:
+        groups = None
+        if git_config.url_regex_match is not None:
+            groups = git_config.url_regex_match.groupdict()
+        data = {
+            "version": CACHE_VERSION,
+            "fingerprint": fingerprint,
+            "git_url": git_config.git_url,
+            "default_branch": git_config.default_branch,
+            "host_regex": git_config.host_regex,
+            "groups": groups,
+        }
+        try:
+            write_atomic(self.cache_path, json.dumps(data))
+        except OSError:
+            # The cache is an optimization; read-only repositories still work
+            pass
+
+    def load_section(
+        self, name: str, base_paths: list[pathlib.Path],
+    ) -> Optional[CachedSection]:
+        """
+        Return a config section cached for the same config files, if none
+        of them, nor any file they included, has changed since
+        """
+        try:
+            with open(self.section_cache_path, "r") as handle:
+                data: dict[str, Any] = json.load(handle)
+            if data["version"] != SECTION_CACHE_VERSION or data["name"] != name:
+                return None
+            paths = [pathlib.Path(path) for path in data["paths"]]
+            if paths[:len(base_paths)] != base_paths:
+                return None
+            fingerprint = stat_fingerprint(paths)
+            if data["fingerprint"] != fingerprint:
+                return None
+            section = gitconfig.SectionConfig(
+                dict(data["values"]),
+                {
+                    str(subsection): dict(values)
+                    for subsection, values in data["subsections"].items()
+                },
+                paths,
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        return CachedSection(section, paths, fingerprint)
+
+    def store_section(
+        self,
+        name: str,
+        base_paths: list[pathlib.Path],
+        base_fingerprint: Fingerprint,
+        section: gitconfig.SectionConfig,
+    ) -> CachedSection:
+        """
+        Cache a config section read from base_paths, which were
+        fingerprinted before reading, and return it
+        """
+        included = [
+            path for path in dict.fromkeys(section.sources)
+            if path not in base_paths
+        ]
+        paths = base_paths + included
+        fingerprint = base_fingerprint + stat_fingerprint(included)
+        data = {
+            "version": SECTION_CACHE_VERSION,
+            "name": name,
+            "paths": [str(path) for path in paths],
+            "fingerprint": fingerprint,
+            "values": section.values,
+            "subsections": section.subsections,
+        }
+        try:
+            write_atomic(self.section_cache_path, json.dumps(data))
+        except OSError:
+            pass
+        return CachedSection(section, paths, fingerprint)
@@ -0,0 +1,100 @@
+import pathlib
+import subprocess
+import threading
+from typing import Iterable, Optional
+
+from git_browse import trace
+
+
+# Number of lookups written to the pipe before reading their answers back, so
+# that neither side blocks on a full pipe buffer
+BATCH_SIZE = 256
+
+
+class CommitResolver(object):
+    """
+    Resolves commit-ish identifiers to full commit hashes through a single
+    long-lived `git cat-file --batch-check` process
+    """
+
+    def __init__(self, cwd: Optional[pathlib.Path] = None) -> None:
+        self.cwd = cwd
+        self.process: Optional[subprocess.Popen[str]] = None
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _start(self) -> Optional[subprocess.Popen[str]]:
+        if self.process is None and not self.closed:
+            try:
+                with trace.span("start git cat-file", trace.SUBPROCESS):
+                    self.process = subprocess.Popen(
+                        ["git", "cat-file", "--batch-check"],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                        cwd=self.cwd,
+                        universal_newlines=True,
+                    )
+            except OSError:
+                # git is not installed
+                self.closed = True
+        return self.process
+
+    def resolve(self, identifier: str) -> Optional[str]:
+        return self.resolve_many([identifier])[0]
+
+    def resolve_many(self, identifiers: Iterable[str]) -> list[Optional[str]]:
+        identifiers = list(identifiers)
+        results: list[Optional[str]] = []
+        with self.lock:
+            for start in range(0, len(identifiers), BATCH_SIZE):
+                batch = identifiers[start:start + BATCH_SIZE]
+                results += self._resolve_batch(batch)
+        return results
+
+    def _resolve_batch(self, identifiers: list[str]) -> list[Optional[str]]:
+        # Identifiers that cannot be expressed on one line are never sent
+        queries = [
+            i for i in identifiers if i and "\n" not in i and "\r" not in i
+        ]
+        answers: dict[str, Optional[str]] = {}
+        process = self._start() if queries else None
+        if process is not None:
+            assert process.stdin and process.stdout
+            try:
+                with trace.span("git cat-file --batch-check", trace.SUBPROCESS):
+                    process.stdin.write(
+                        "".join("%s^{commit}\n" % query for query in queries),
+                    )
+                    process.stdin.flush()
+                    for query in queries:
+                        line = process.stdout.readline()
+                        if not line:
+                            raise BrokenPipeError
+                        answers[query] = self._parse(line)
+            except (BrokenPipeError, ValueError):
+                # git exited, most likely because cwd is not a repository
+                self.close()
+        return [answers.get(identifier) for identifier in identifiers]
+
+    @staticmethod
+    def _parse(line: str) -> Optional[str]:
+        fields = line.split()
+        if len(fields) != 3 or fields[1] != "commit":
+            # "<name> missing", "<name> ambiguous", or an empty line on exit
+            return None
+        return fields[0]
+
+    def close(self) -> None:
+        self.closed = True
+        process, self.process = self.process, None
+        if process is None:
+            return
+        assert process.stdin
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+        if process.stdout:
+            process.stdout.close()
@@ -0,0 +1,73 @@
+import json
+import os
+import pathlib
+from typing import Optional
+
+
+SOCKET_NAME = "git-browse.sock"
+# The daemon answers from warm state in milliseconds; anything slower is
+# better served by resolving in-process
+CLIENT_TIMEOUT = 2.0
+
+
+def get_socket_path() -> pathlib.Path:
+    runtime_directory = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory:
+        return pathlib.Path(runtime_directory) / SOCKET_NAME
+    # Anyone can create files in the temp directory, so the socket goes in a
+    # directory of its own that only this user can enter
+    temp_directory = os.environ.get("TMPDIR", "/tmp")
+    user_id = os.getuid() if hasattr(os, "getuid") else 0
+    return pathlib.Path(temp_directory) / ("git-browse-%s" % user_id) / SOCKET_NAME
+
+
+def is_private(path: pathlib.Path) -> bool:
+    """Whether a path belongs to this user and no other user can access it"""
+    if not hasattr(os, "getuid"):  # pragma: no cover
+        return True
+    try:
+        # Not following symlinks, which anyone could have planted
+        stat = os.lstat(path)
+    except OSError:
+        return False
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o077
+
+
+def is_trusted_socket(socket_path: pathlib.Path) -> bool:
+    """
+    Whether a socket can only have been created by this user, so that urls
+    it answers with are safe to open
+    """
+    return is_private(socket_path.parent) and is_private(socket_path)
+
+
+def request_url(
+    request: dict[str, object],
+    socket_path: Optional[pathlib.Path] = None,
+) -> Optional[str]:
+    """
+    Ask a running daemon to resolve a url.  Returns None whenever the
+    daemon cannot answer, so that the caller resolves the url itself.
+    """
+    if socket_path is None:
+        socket_path = get_socket_path()
+    if not is_trusted_socket(socket_path):
+        return None
+    # Only pay for importing socket when a daemon may be listening
+    import socket  # noqa: PLC0415
+
+    if not hasattr(socket, "AF_UNIX"):  # pragma: no cover
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(CLIENT_TIMEOUT)
+            connection.connect(str(socket_path))
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with connection.makefile("rb") as handle:
+                response = json.loads(handle.readline())
+    except (OSError, ValueError):
+        return None
+    url = response.get("url") if isinstance(response, dict) else None
+    if not isinstance(url, str):
+        return None
+    return url
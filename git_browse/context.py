@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import stat
+from typing import Mapping, Optional
+
+
+GITDIR_PREFIX = "gitdir:"
+
+
+class RepositoryContext(object):
+    """
+    Locations of a repository, discovered once per invocation and passed
+    through resolution so the directory tree is only walked once
+    """
+
+    def __init__(
+        self,
+        worktree_root: pathlib.Path,
+        git_directory: pathlib.Path,
+        common_directory: pathlib.Path,
+    ) -> None:
+        self.worktree_root = worktree_root
+        self.git_directory = git_directory
+        self.common_directory = common_directory
+
+    def __repr__(self) -> str:
+        return "RepositoryContext(%r, %r, %r)" % (
+            self.worktree_root, self.git_directory, self.common_directory,
+        )
+
+    @staticmethod
+    def discover(
+        start: Optional[pathlib.Path] = None,
+        environ: Optional[Mapping[str, str]] = None,
+    ) -> RepositoryContext:
+        """
+        Find the repository containing start (default: the working
+        directory), honoring GIT_DIR, GIT_WORK_TREE,
+        GIT_CEILING_DIRECTORIES and GIT_DISCOVERY_ACROSS_FILESYSTEM
+        """
+        if start is None:
+            start = pathlib.Path.cwd()
+        if environ is None:
+            environ = os.environ
+        if environ.get("GIT_DIR"):
+            git_directory = start.joinpath(environ["GIT_DIR"])
+            worktree_root = start.joinpath(environ.get("GIT_WORK_TREE", ""))
+            return RepositoryContext(
+                worktree_root,
+                git_directory,
+                read_common_directory(git_directory),
+            )
+        ceilings = get_ceiling_directories(environ)
+        across_filesystems = environ.get(
+            "GIT_DISCOVERY_ACROSS_FILESYSTEM", "",
+        ).lower() in ["1", "true", "yes", "on"]
+        start_device = None
+        path = start
+        while True:
+            found_directory = find_git_directory(path)
+            if found_directory is not None:
+                break
+            parent = path.parent
+            if parent == path or parent in ceilings:
+                raise FileNotFoundError(".git/config file not found")
+            if not across_filesystems:
+                try:
+                    if start_device is None:
+                        start_device = os.stat(start).st_dev
+                    device = os.stat(parent).st_dev
+                except OSError as err:
+                    raise FileNotFoundError(".git/config file not found") from err
+                if device != start_device:
+                    raise FileNotFoundError(
+                        ".git/config file not found "
+                        "(stopped at filesystem boundary %s)" % path,
+                    )
+            path = parent
+        if "GIT_WORK_TREE" in environ:
+            path = start.joinpath(environ["GIT_WORK_TREE"])
+        return RepositoryContext(
+            path, found_directory, read_common_directory(found_directory),
+        )
+
+
+def find_git_directory(path: pathlib.Path) -> Optional[pathlib.Path]:
+    dot_git = path / ".git"
+    try:
+        mode = os.stat(dot_git).st_mode
+    except OSError:
+        return None
+    if stat.S_ISREG(mode):
+        return read_gitdir_file(dot_git)
+    return dot_git
+
+
+def get_ceiling_directories(environ: Mapping[str, str]) -> set[pathlib.Path]:
+    ceilings = set()
+    for ceiling in environ.get("GIT_CEILING_DIRECTORIES", "").split(os.pathsep):
+        # Like git, relative entries are ignored
+        if ceiling and os.path.isabs(ceiling):
+            ceilings.add(pathlib.Path(ceiling))
+    return ceilings
+
+
+def read_gitdir_file(dot_git: pathlib.Path) -> pathlib.Path:
+    """Resolve a `.git` file, as used by submodules and linked worktrees"""
+    with open(dot_git, "r") as handle:
+        data = handle.read()
+    if not data.startswith(GITDIR_PREFIX):
+        raise FileNotFoundError("invalid gitfile format: %s" % dot_git)
+    gitdir = data[len(GITDIR_PREFIX):].strip()
+    return dot_git.parent.joinpath(gitdir)
+
+
+def read_common_directory(git_directory: pathlib.Path) -> pathlib.Path:
+    """Linked worktrees share refs and config through a `commondir` file"""
+    try:
+        with open(git_directory / "commondir", "r") as handle:
+            common_directory = handle.read().strip()
+    except OSError:
+        return git_directory
+    # Normalized so every worktree of a clone names the same directory
+    return pathlib.Path(
+        os.path.normpath(git_directory.joinpath(common_directory)),
+    )
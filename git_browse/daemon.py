@@ -0,0 +1,101 @@
+import json
+import os
+import pathlib
+import socket
+import socketserver
+from typing import Any
+
+from git_browse import browse, client, repository
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    server: "ResolutionDaemon"
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            response = {"url": self.server.resolve(request)}
+        except Exception as err:
+            response = {"error": "%s: %s" % (err.__class__.__name__, err)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class ResolutionDaemon(socketserver.UnixStreamServer):
+    """
+    Serves url resolution requests over a unix socket from warm
+    per-repository state.  Requests are handled one at a time.
+    """
+
+    def __init__(self, socket_path: pathlib.Path) -> None:
+        self.socket_path = socket_path
+        self.pool = repository.WarmRepositoryPool()
+        prepare_socket_directory(socket_path.parent)
+        remove_stale_socket(socket_path)
+        # Only the owning user may connect
+        umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+
+    def resolve(self, request: dict[str, Any]) -> str:
+        if request.get("version") != browse.__version__:
+            raise RuntimeError("daemon is running a different version")
+        cwd = pathlib.Path(request["cwd"])
+        warm_repository = self.pool.get(cwd)
+        host = warm_repository.get_host(
+            bool(request.get("sourcegraph")), bool(request.get("godocs")),
+        )
+        git_object = browse.get_git_object(
+            request.get("target") or "",
+            cwd.joinpath(request.get("path") or ""),
+            host,
+            warm_repository.resolver,
+            warm_repository.context,
+        )
+        return host.get_url(git_object)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def prepare_socket_directory(directory: pathlib.Path) -> None:
+    """Create the socket's directory, refusing one other users can access"""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    if not client.is_private(directory):
+        raise RuntimeError(
+            "git-browse daemon socket directory %s must be owned by you and "
+            "not accessible to other users" % directory,
+        )
+
+
+def remove_stale_socket(socket_path: pathlib.Path) -> None:
+    """Remove a socket left behind by a daemon that is no longer running"""
+    if not socket_path.exists():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(str(socket_path))
+        except OSError:
+            os.remove(socket_path)
+            return
+    raise RuntimeError("git-browse daemon already running at %s" % socket_path)
+
+
+def serve(socket_path: pathlib.Path) -> None:
+    daemon = ResolutionDaemon(socket_path)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+
@@ -0,0 +1,524 @@
+"""
+A streaming reader for the parts of git-config syntax that git-browse
+needs.  It understands subsections, quoting and escapes, line
+continuations, include.path, includeIf and url.<base>.insteadOf, and
+stops reading as soon as the remote url and default branch are known.
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+from typing import Iterator, NamedTuple, Optional
+
+
+# git refuses to follow more nested includes than this
+MAX_INCLUDE_DEPTH = 10
+# Text that can change the result after the remote url has been seen.
+# This may also match inside values, which only costs the early exit.
+REWRITE_SECTION = re.compile(r"\[[ \t]*(?:url|include)|worktreeconfig", re.I)
+# Text a user config file needs to hold to rewrite remote urls
+USER_REWRITE_SECTION = re.compile(r"\[[ \t]*(?:url|include)", re.I)
+WORKTREE_CONFIG_NAME = "config.worktree"
+SECTION_HEADER = re.compile(
+    r'\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]',
+)
+SPECIAL_CHARACTERS = re.compile(r'["\\#;]')
+UNESCAPE = {"n": "\n", "t": "\t", "b": "\b", "\\": "\\", '"': '"'}
+
+
+class ConfigEntry(NamedTuple):
+    section: str
+    subsection: Optional[str]
+    name: str
+    value: Optional[str]
+
+
+class RemoteConfig(NamedTuple):
+    urls: dict[str, str]
+    branches: list[str]
+    sources: list[pathlib.Path]
+
+
+class OriginConfig(NamedTuple):
+    url: Optional[str]
+    branches: list[str]
+    sources: list[pathlib.Path]
+
+
+class SectionConfig(NamedTuple):
+    # Variables outside any subsection, then those of each subsection
+    values: dict[str, Optional[str]]
+    subsections: dict[str, dict[str, str]]
+    sources: list[pathlib.Path]
+
+
+def parse_section_header(line: str) -> tuple[str, Optional[str], str]:
+    """Return the section, subsection and any text after the header"""
+    match = SECTION_HEADER.match(line)
+    if not match:
+        raise ValueError("invalid section header: %s" % line)
+    section, subsection = match.group(1), match.group(2)
+    if subsection is not None and "\\" in subsection:
+        subsection = re.sub(r"\\(.)", r"\1", subsection)
+    elif subsection is None and "." in section:
+        # Deprecated [section.subsection] syntax, subsection is lowercased
+        section, subsection = section.split(".", 1)
+        subsection = subsection.lower()
+    return section.lower(), subsection, line[match.end():]
+
+
+def parse_value(raw: str) -> tuple[str, bool]:
+    """
+    Unquote and unescape a raw value, returning the value and whether it
+    ended with a line continuation
+    """
+    value = []
+    # Unquoted whitespace is kept only if more text follows it
+    pending_space = ""
+    quoted = False
+    index = 0
+    while index < len(raw):
+        char = raw[index]
+        index += 1
+        if char == "\\":
+            if index == len(raw):
+                value.append(pending_space)
+                return "".join(value), True
+            escaped = raw[index]
+            index += 1
+            if escaped not in UNESCAPE:
+                raise ValueError("invalid escape in value: %s" % raw)
+            value.append(pending_space + UNESCAPE[escaped])
+            pending_space = ""
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char in "#;":
+            break
+        elif not quoted and char in " \t":
+            if value:
+                pending_space += char
+        else:
+            value.append(pending_space + char)
+            pending_space = ""
+    if quoted:
+        raise ValueError("unterminated quote in value: %s" % raw)
+    return "".join(value), False
+
+
+def parse_bool(value: Optional[str]) -> bool:
+    if value is None:
+        return True
+    value = value.lower()
+    if value in ["true", "yes", "on", "1"]:
+        return True
+    if value in ["false", "no", "off", "0", ""]:
+        return False
+    raise ValueError("invalid boolean value: %s" % value)
+
+
+def iter_lines(data: str) -> Iterator[str]:
+    """Split lines lazily so that an early exit skips the rest of the text"""
+    start = 0
+    while start < len(data):
+        end = data.find("\n", start)
+        if end == -1:
+            end = len(data)
+        yield data[start:end]
+        start = end + 1
+
+
+def parse_config(data: str) -> Iterator[ConfigEntry]:
+    """
+    Yield every variable in a git config file, in file order.  Each section
+    header also yields an entry with an empty name so that empty sections,
+    like most [branch "..."] sections, are still seen.
+    """
+    section = ""
+    subsection: Optional[str] = None
+    lines = iter_lines(data)
+    for raw_line in lines:
+        line = raw_line.strip()
+        if line.startswith("["):
+            section, subsection, rest = parse_section_header(line)
+            yield ConfigEntry(section, subsection, "", None)
+            line = rest.strip()
+        if not line or line[0] in "#;":
+            continue
+        name, separator, raw = line.partition("=")
+        name = name.strip().lower()
+        if not separator:
+            # A bare variable name is a boolean true
+            yield ConfigEntry(section, subsection, name, None)
+            continue
+        raw = raw.strip()
+        if not SPECIAL_CHARACTERS.search(raw):
+            # Fast path: nothing to unquote
+            yield ConfigEntry(section, subsection, name, raw)
+            continue
+        value, continued = parse_value(raw)
+        while continued:
+            next_value, continued = parse_value(next(lines, ""))
+            value += next_value
+        yield ConfigEntry(section, subsection, name, value)
+
+
+def expand_path(path: str, relative_to: pathlib.Path) -> pathlib.Path:
+    return relative_to.joinpath(os.path.expanduser(path))
+
+
+def wildmatch(pattern: str, path: str, ignore_case: bool = False) -> bool:
+    """Match a path against a git wildmatch pattern where ** spans slashes"""
+    regex = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            regex.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            regex.append("[^/]")
+            index += 1
+        else:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+    flags = re.I if ignore_case else 0
+    return re.fullmatch("".join(regex), path, flags) is not None
+
+
+def read_head_branch(git_directory: pathlib.Path) -> Optional[str]:
+    try:
+        with open(git_directory / "HEAD", "r") as handle:
+            head = handle.read().strip()
+    except OSError:
+        return None
+    prefix = "ref: refs/heads/"
+    if not head.startswith(prefix):
+        return None
+    return head[len(prefix):]
+
+
+def include_condition_matches(
+    condition: str,
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path],
+) -> bool:
+    """Evaluate an includeIf condition; unsupported conditions never match"""
+    if git_directory is None:
+        return False
+    keyword, _, pattern = condition.partition(":")
+    if keyword == "onbranch":
+        branch = read_head_branch(git_directory)
+        if branch is None:
+            return False
+        if pattern.endswith("/"):
+            pattern += "**"
+        return wildmatch(pattern, branch)
+    if keyword not in ["gitdir", "gitdir/i"]:
+        return False
+    if pattern.startswith("./"):
+        pattern = str(config_path.parent / pattern[2:])
+    elif pattern.startswith("~"):
+        pattern = os.path.expanduser(pattern)
+    elif not os.path.isabs(pattern):
+        pattern = "**/" + pattern
+    if pattern.endswith("/"):
+        pattern += "**"
+    directory = str(git_directory.resolve()) + "/"
+    return wildmatch(pattern, directory, keyword == "gitdir/i") or wildmatch(
+        pattern, directory.rstrip("/"), keyword == "gitdir/i",
+    )
+
+
+def is_active_include(
+    entry: ConfigEntry,
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path],
+) -> bool:
+    if entry.name != "path":
+        return False
+    if entry.section == "include":
+        return entry.subsection is None
+    if entry.section == "includeif" and entry.subsection is not None:
+        return include_condition_matches(
+            entry.subsection, config_path, git_directory,
+        )
+    return False
+
+
+def read_text(config_path: pathlib.Path) -> str:
+    """Missing or unreadable config files are treated as empty, as git does"""
+    try:
+        with open(config_path, "r", errors="replace") as handle:
+            return handle.read()
+    except OSError:
+        return ""
+
+
+def read_config_file(
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path] = None,
+    sources: Optional[list[pathlib.Path]] = None,
+    depth: int = 0,
+    data: Optional[str] = None,
+) -> Iterator[ConfigEntry]:
+    """Yield the variables of a config file, expanding includes in place"""
+    if data is None:
+        data = read_text(config_path)
+    if sources is not None:
+        sources.append(config_path)
+    for entry in parse_config(data):
+        yield entry
+        if entry.name != "path" or entry.value is None or not is_active_include(
+            entry, config_path, git_directory,
+        ):
+            continue
+        if depth >= MAX_INCLUDE_DEPTH:
+            raise ValueError("exceeded maximum include depth")
+        yield from read_config_file(
+            expand_path(entry.value, config_path.parent),
+            git_directory,
+            sources,
+            depth + 1,
+        )
+
+
+def read_local_config(
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path] = None,
+    sources: Optional[list[pathlib.Path]] = None,
+    data: Optional[str] = None,
+) -> Iterator[ConfigEntry]:
+    """
+    Yield the shared config of a repository, followed by the config.worktree
+    of git_directory when extensions.worktreeConfig is set
+    """
+    worktree_config = False
+    for entry in read_config_file(config_path, git_directory, sources, data=data):
+        if entry.section == "extensions" and entry.name == "worktreeconfig":
+            worktree_config = parse_bool(entry.value)
+        yield entry
+    if worktree_config and git_directory is not None:
+        yield from read_config_file(
+            git_directory / WORKTREE_CONFIG_NAME, git_directory, sources,
+        )
+
+
+def rewrite_url(url: str, instead_of: dict[str, str]) -> str:
+    """Apply the longest matching url.<base>.insteadOf prefix"""
+    matches = [prefix for prefix in instead_of if url.startswith(prefix)]
+    if not matches:
+        return url
+    prefix = max(matches, key=len)
+    return instead_of[prefix] + url[len(prefix):]
+
+
+def get_instead_of(entry: ConfigEntry) -> Optional[tuple[str, str]]:
+    """The prefix and replacement of a url.<base>.insteadOf entry"""
+    if (
+        entry.section == "url"
+        and entry.subsection is not None
+        and entry.name == "insteadof"
+        and entry.value
+    ):
+        return entry.value, entry.subsection
+    return None
+
+
+def read_remote_config(
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path] = None,
+    remote: Optional[str] = None,
+    environ: Optional[dict[str, str]] = None,
+) -> RemoteConfig:
+    """
+    Read remote urls, in config order, and local branch names from a git
+    config file.  Like git, the first url of a remote is the one that is
+    fetched from.  Reading a single remote can stop early.  insteadOf
+    rewrites also apply from the system and global config.
+    """
+    instead_of: dict[str, str] = {}
+    user_sources: list[pathlib.Path] = []
+    user_entries = iter_config_entries(
+        None, git_directory, environ, USER_REWRITE_SECTION, user_sources,
+    )
+    for entry in user_entries:
+        rewrite = get_instead_of(entry)
+        if rewrite is not None:
+            instead_of[rewrite[0]] = rewrite[1]
+    data = read_text(config_path)
+    # A skim of the raw text decides whether the file must be parsed to the
+    # end for includes and insteadOf rewrites
+    early_exit = remote is not None and not REWRITE_SECTION.search(data)
+    urls: dict[str, str] = {}
+    # Ordered like a list, but with constant time membership checks
+    branches: dict[str, None] = {}
+    sources: list[pathlib.Path] = []
+    entries = read_local_config(config_path, git_directory, sources, data)
+    for entry in entries:
+        if entry.section == "branch" and entry.subsection is not None:
+            branches.setdefault(entry.subsection)
+        elif (
+            entry.section == "remote"
+            and entry.subsection is not None
+            and entry.name == "url"
+            and entry.value
+            and remote in [None, entry.subsection]
+        ):
+            urls.setdefault(entry.subsection, entry.value)
+        else:
+            rewrite = get_instead_of(entry)
+            if rewrite is not None:
+                instead_of[rewrite[0]] = rewrite[1]
+        # master always wins as the default branch, so nothing later matters
+        if early_exit and urls and "master" in branches:
+            break
+    urls = {name: rewrite_url(url, instead_of) for name, url in urls.items()}
+    return RemoteConfig(urls, list(branches), sources + user_sources)
+
+
+def read_origin_config(
+    config_path: pathlib.Path,
+    git_directory: Optional[pathlib.Path] = None,
+    remote: str = "origin",
+    environ: Optional[dict[str, str]] = None,
+) -> OriginConfig:
+    """Read the url of a single remote and local branch names"""
+    remote_config = read_remote_config(
+        config_path, git_directory, remote, environ,
+    )
+    return OriginConfig(
+        remote_config.urls.get(remote),
+        remote_config.branches,
+        remote_config.sources,
+    )
+
+
+def get_user_config_paths(
+    environ: Optional[dict[str, str]] = None,
+) -> list[pathlib.Path]:
+    """The system and global config files, in the order git reads them"""
+    if environ is None:
+        environ = dict(os.environ)
+    paths = []
+    if not parse_bool(environ.get("GIT_CONFIG_NOSYSTEM", "false")):
+        paths.append(pathlib.Path(
+            environ.get("GIT_CONFIG_SYSTEM", "/etc/gitconfig"),
+        ))
+    if "GIT_CONFIG_GLOBAL" in environ:
+        paths.append(pathlib.Path(environ["GIT_CONFIG_GLOBAL"]))
+        return paths
+    home = pathlib.Path(environ.get("HOME", os.path.expanduser("~")))
+    config_home = environ.get("XDG_CONFIG_HOME") or home / ".config"
+    paths.append(pathlib.Path(config_home) / "git" / "config")
+    paths.append(home / ".gitconfig")
+    return paths
+
+
+def iter_config_entries(
+    local_config_path: Optional[pathlib.Path] = None,
+    git_directory: Optional[pathlib.Path] = None,
+    environ: Optional[dict[str, str]] = None,
+    skim: Optional[re.Pattern[str]] = None,
+    sources: Optional[list[pathlib.Path]] = None,
+) -> Iterator[ConfigEntry]:
+    """
+    Yield the variables of the system, global and local config in the order
+    git reads them.  Files whose raw text does not match skim are skipped,
+    though they are still recorded in sources.
+    """
+    config_paths = get_user_config_paths(environ)
+    if local_config_path is not None:
+        config_paths.append(local_config_path)
+    for config_path in config_paths:
+        data = read_text(config_path)
+        if skim is not None and not skim.search(data):
+            if sources is not None:
+                sources.append(config_path)
+            continue
+        if config_path == local_config_path:
+            yield from read_local_config(
+                config_path, git_directory, sources, data,
+            )
+        else:
+            yield from read_config_file(
+                config_path, git_directory, sources, data=data,
+            )
+
+
+def get_section_skim(section: str) -> re.Pattern[str]:
+    """
+    Match the text a config file needs to hold to set variables in a
+    section: its header, an include, or the worktree config extension
+    """
+    return re.compile(
+        r"^[ \t]*(?:\[[ \t]*(?:%s|include|includeif)\b|worktreeconfig\b)"
+        % re.escape(section),
+        re.I | re.M,
+    )
+
+
+def read_config_section(
+    section: str,
+    local_config_path: Optional[pathlib.Path] = None,
+    git_directory: Optional[pathlib.Path] = None,
+    environ: Optional[dict[str, str]] = None,
+) -> SectionConfig:
+    """
+    Read the variables of a section and of its subsections from the system,
+    global and local config, with the last value of each winning.  Files
+    that cannot mention the section are not parsed.
+    """
+    values: dict[str, Optional[str]] = {}
+    subsections: dict[str, dict[str, str]] = {}
+    sources: list[pathlib.Path] = []
+    entries = iter_config_entries(
+        local_config_path,
+        git_directory,
+        environ,
+        get_section_skim(section),
+        sources,
+    )
+    for entry in entries:
+        # Section headers come through with an empty name
+        if entry.section != section or not entry.name:
+            continue
+        if entry.subsection is None:
+            values[entry.name] = entry.value
+        elif entry.value is not None:
+            subsections.setdefault(entry.subsection, {})[entry.name] = entry.value
+    return SectionConfig(values, subsections, sources)
+
+
+def read_config_value(
+    section: str,
+    name: str,
+    local_config_path: Optional[pathlib.Path] = None,
+    git_directory: Optional[pathlib.Path] = None,
+    environ: Optional[dict[str, str]] = None,
+) -> Optional[str]:
+    """
+    Read a variable without a subsection from the system, global and local
+    config.  As in git, the last value found wins.
+    """
+    return read_config_section(
+        section, local_config_path, git_directory, environ,
+    ).values.get(name)
+
+
+def read_config_subsections(
+    section: str,
+    local_config_path: Optional[pathlib.Path] = None,
+    git_directory: Optional[pathlib.Path] = None,
+    environ: Optional[dict[str, str]] = None,
+) -> dict[str, dict[str, str]]:
+    """Read the variables of every subsection of a section"""
+    return read_config_section(
+        section, local_config_path, git_directory, environ,
+    ).subsections
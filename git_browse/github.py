@@ -1,3 +1,5 @@
+from typing import cast
+
 from git_browse import typedefs
 
 
@@ -27,6 +29,7 @@ GITHUB_UBER_OC_URL = "oc://%s/%s" % (
     typedefs.REPOSITORY_REGEX,
 )
 GITHUB_URL = "https://github.com/%s/%s"
+GITHUB_BASE_URL = "https://github.com/"
 
 
 class GithubHost(typedefs.Host):
@@ -42,6 +45,7 @@ class GithubHost(typedefs.Host):
         self.git_config = git_config
         self.user = user
         self.repository = repository
+        self.base_url = git_config.base_url or GITHUB_BASE_URL
 
     @staticmethod
     def create(git_config: typedefs.GitConfig) -> typedefs.Host:
@@ -65,10 +69,21 @@ class GithubHost(typedefs.Host):
     def set_host_class(self, host_class: type[typedefs.Host]) -> None:
         return
 
+    def line_fragment(self, start: int, end: int) -> str:
+        if start == end:
+            return "#L%d" % start
+        return "#L%d-L%d" % (start, end)
+
     def get_url(self, git_object: typedefs.GitObject) -> str:
-        repository_url = GITHUB_URL % (self.user, self.repository)
+        repository_url = "%s%s/%s" % (
+            self.base_url, self.user, self.repository,
+        )
         if git_object.is_commit_hash():
             return self.commit_hash_url(repository_url, git_object)
+        if git_object.is_commit_range():
+            return self.compare_url(
+                repository_url, cast(typedefs.FocusRange, git_object),
+            )
         if git_object.is_root():
             return self.root_url(repository_url, git_object)
         if git_object.is_directory():
@@ -84,6 +99,12 @@ class GithubHost(typedefs.Host):
         )
         return repository_url
 
+    def compare_url(
+        self, repository_url: str, focus_range: typedefs.FocusRange,
+    ) -> str:
+        # Github reads ".." and "..." the way git diff does
+        return "%s/compare/%s" % (repository_url, focus_range.identifier)
+
     def root_url(
         self, repository_url: str, focus_object: typedefs.GitObject,
     ) -> str:
@@ -112,3 +133,12 @@ class GithubHost(typedefs.Host):
 
 class UberGithubHost(GithubHost):
     pass
+
+
+HOST_REGEXES: dict[str, type[typedefs.Host]] = {
+    GITHUB_SSH_URL: GithubHost,
+    GITHUB_HTTPS_URL: GithubHost,
+    GITHUB_UBER_SSH_URL: UberGithubHost,
+    GITHUB_UBER_HTTPS_URL: UberGithubHost,
+    GITHUB_UBER_OC_URL: UberGithubHost,
+}
@@ -0,0 +1,362 @@
+"""
+Native reader for the git index, so that whether a path is tracked, and
+whether it is a file or a directory, is answered without touching the
+working tree.  This also covers files missing from sparse checkouts.
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from git_browse import trace
+
+if TYPE_CHECKING:  # pragma: no cover
+    import mmap
+
+
+INDEX_SIGNATURE = b"DIRC"
+SUPPORTED_VERSIONS = [2, 3, 4]
+HEADER_SIZE = 12
+# ctime, mtime, dev, ino, mode, uid, gid and size, before the object hash
+STAT_SIZE = 40
+NAME_LENGTH_MASK = 0xFFF
+EXTENDED_FLAG = 0x4000
+INTENT_TO_ADD_FLAG = 0x2000
+TREE_MODE = 0o040000
+GITLINK_MODE = 0o160000
+ENTRY_MODES = {0o100644, 0o100755, 0o120000, GITLINK_MODE, TREE_MODE}
+MODE_OFFSET = 24
+MODE_PATTERN = re.compile(b"|".join(
+    re.escape(mode.to_bytes(4, "big")) for mode in sorted(ENTRY_MODES)
+))
+# Below this many bytes a lookup walks entries instead of bisecting
+LINEAR_SEARCH_SIZE = 2048
+# Version 4 lookups bisect names recorded every this many entries
+RESTART_INTERVAL = 64
+BLOB = "blob"
+TREE = "tree"
+
+
+class IndexEntry(NamedTuple):
+    name: bytes
+    mode: int
+    # Offset of the entry, and of the entry after it
+    start: int
+    end: int
+
+
+class GitIndex(object):
+    """
+    Looks up paths in a git index through an mmap.  Version 2 and 3 entries
+    are 8-byte aligned, so a lookup binary searches the file by realigning
+    on entry boundaries.  Version 4 prefix compresses names, so they are
+    decoded once into a table of restart points that lookups bisect.
+    """
+
+    def __init__(self, path: pathlib.Path, hash_length: int = 20) -> None:
+        import threading  # noqa: PLC0415
+
+        self.path = path
+        self.hash_length = hash_length
+        self.flags_offset = STAT_SIZE + hash_length
+        self.stat_key: Optional[tuple[int, int, int]] = None
+        self.data: Optional[mmap.mmap] = None
+        self.version = 0
+        self.entry_count = 0
+        # Every RESTART_INTERVAL-th version 4 entry, and its name
+        self.restarts: Optional[list[IndexEntry]] = None
+        self.restart_names: list[bytes] = []
+        self.lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """Remap the index when git has rewritten it since the last lookup"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._close()
+            return
+        stat_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stat_key == self.stat_key:
+            return
+        self._close()
+        self.stat_key = stat_key
+        if stat.st_size < HEADER_SIZE + self.hash_length:
+            return
+        # A split index keeps most entries in a shared file; rather than
+        # merge the two, leave the answer to the working tree
+        if any(
+            name.startswith("sharedindex.")
+            for name in os.listdir(self.path.parent)
+        ):
+            return
+        import mmap  # noqa: PLC0415
+
+        with open(self.path, "rb") as handle:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        version = int.from_bytes(data[4:8], "big")
+        if data[:4] != INDEX_SIGNATURE or version not in SUPPORTED_VERSIONS:
+            data.close()
+            return
+        self.data = data
+        self.version = version
+        self.entry_count = int.from_bytes(data[8:12], "big")
+
+    def _read_entry(
+        self, start: int, previous_name: bytes = b"",
+    ) -> Optional[IndexEntry]:
+        """Decode the entry at start, or None if there is no valid one"""
+        data = self.data
+        assert data is not None
+        flags_position = start + self.flags_offset
+        if flags_position + 2 > len(data) - self.hash_length:
+            return None
+        mode = int.from_bytes(
+            data[start + MODE_OFFSET:start + MODE_OFFSET + 4], "big",
+        )
+        if mode not in ENTRY_MODES:
+            return None
+        flags = int.from_bytes(data[flags_position:flags_position + 2], "big")
+        name_start = flags_position + 2
+        if flags & EXTENDED_FLAG:
+            if self.version < 3:
+                return None
+            name_start += 2
+        if self.version == 4:
+            return self._read_compressed_name(
+                start, mode, name_start, previous_name,
+            )
+        length = flags & NAME_LENGTH_MASK
+        if length == NAME_LENGTH_MASK:
+            name_end = data.find(b"\0", name_start + length)
+        else:
+            name_end = name_start + length
+        if name_end < 0 or data[name_end:name_end + 1] != b"\0":
+            return None
+        name = data[name_start:name_end]
+        # Entries are padded with one to eight NULs to a multiple of 8 bytes
+        end = start + ((name_end - start + 8) & ~7)
+        if b"\0" in name or data[name_end:end].strip(b"\0"):
+            return None
+        return IndexEntry(name, mode, start, end)
+
+    def _read_compressed_name(
+        self, start: int, mode: int, position: int, previous_name: bytes,
+    ) -> Optional[IndexEntry]:
+        """Version 4 names strip a varint count of bytes from the last name"""
+        data = self.data
+        assert data is not None
+        byte = data[position]
+        strip = byte & 0x7F
+        while byte & 0x80:
+            position += 1
+            byte = data[position]
+            strip = ((strip + 1) << 7) | (byte & 0x7F)
+        name_end = data.find(b"\0", position + 1)
+        if name_end < 0 or strip > len(previous_name):
+            return None
+        prefix = previous_name[:len(previous_name) - strip]
+        name = prefix + data[position + 1:name_end]
+        return IndexEntry(name, mode, start, name_end + 1)
+
+    def _is_intent_to_add(self, entry: IndexEntry) -> bool:
+        assert self.data is not None
+        flags_position = entry.start + self.flags_offset
+        flags = int.from_bytes(
+            self.data[flags_position:flags_position + 4], "big",
+        )
+        return bool(flags >> 16 & EXTENDED_FLAG and flags & INTENT_TO_ADD_FLAG)
+
+    def _realign(self, position: int, high: int) -> Optional[IndexEntry]:
+        """Find the first entry starting at or after position"""
+        assert self.data is not None
+        while position < high:
+            # Skip to the next mode field, rather than trying every offset
+            match = MODE_PATTERN.search(self.data, position + MODE_OFFSET)
+            if match is None:
+                return None
+            position = match.start() - MODE_OFFSET
+            # Entries start at offsets congruent to the header size modulo 8
+            if position % 8 != HEADER_SIZE % 8 or position >= high:
+                position += 1
+                continue
+            entry = self._read_entry(position)
+            # Another valid entry, or the extensions, must follow a real one
+            if entry is not None and (
+                self._read_entry(entry.end) is not None
+                or self.data[entry.end:entry.end + 4].isalpha()
+                or entry.end >= len(self.data) - self.hash_length
+            ):
+                return entry
+            position += 8
+        return None
+
+    def _get_restarts(self) -> list[IndexEntry]:
+        if self.restarts is None:
+            with trace.span("index restart points"):
+                self.restarts = self._scan_restarts()
+            self.restart_names = [entry.name for entry in self.restarts]
+        return self.restarts
+
+    def _scan_restarts(self) -> list[IndexEntry]:
+        """
+        Decode every version 4 name once.  Only restart points are fully
+        read; names in between are rebuilt inline, which is what a scan of
+        millions of entries spends its time on.
+        """
+        data = self.data
+        assert data is not None
+        restarts: list[IndexEntry] = []
+        position, name = HEADER_SIZE, b""
+        for number in range(self.entry_count):
+            if not number % RESTART_INTERVAL:
+                entry = self._read_entry(position, name)
+                if entry is None:
+                    break
+                restarts.append(entry)
+                position, name = entry.end, entry.name
+                continue
+            name_start = position + self.flags_offset + 2
+            if data[position + self.flags_offset] & (EXTENDED_FLAG >> 8):
+                name_start += 2
+            byte = data[name_start]
+            strip = byte & 0x7F
+            while byte & 0x80:
+                name_start += 1
+                byte = data[name_start]
+                strip = ((strip + 1) << 7) | (byte & 0x7F)
+            name_end = data.find(b"\0", name_start + 1)
+            if name_end < 0 or strip > len(name):
+                break
+            name = name[:len(name) - strip] + data[name_start + 1:name_end]
+            position = name_end + 1
+        return restarts
+
+    def _lower_bound_compressed(self, target: bytes) -> Optional[IndexEntry]:
+        """Walk forward from the last restart point that sorts before target"""
+        import bisect  # noqa: PLC0415
+
+        restarts = self._get_restarts()
+        restart = bisect.bisect_left(self.restart_names, target) - 1
+        if restart < 0:
+            return restarts[0] if restarts else None
+        entry: Optional[IndexEntry] = restarts[restart]
+        remaining = self.entry_count - restart * RESTART_INTERVAL - 1
+        while entry is not None and entry.name < target:
+            if not remaining:
+                return None
+            entry = self._read_entry(entry.end, entry.name)
+            remaining -= 1
+        return entry
+
+    def _lower_bound(self, target: bytes) -> Optional[IndexEntry]:
+        """Return the first entry whose name sorts at or after target"""
+        if self.version == 4:
+            return self._lower_bound_compressed(target)
+        assert self.data is not None
+        low, high = HEADER_SIZE, len(self.data) - self.hash_length
+        while high - low > LINEAR_SEARCH_SIZE:
+            entry = self._realign((low + high) // 2, high)
+            if entry is None:
+                high = (low + high) // 2
+            elif entry.name < target:
+                low = entry.end
+            else:
+                high = entry.start
+        # Few enough bytes remain that walking known entries is cheaper
+        entry = self._read_entry(low)
+        while entry is not None and entry.start < high and entry.name < target:
+            entry = self._read_entry(entry.end)
+        return entry
+
+    def lookup(self, path: str) -> Optional[str]:
+        """
+        Return "blob" or "tree" for a path tracked in the index, or None if
+        it is not tracked or the index cannot be read
+        """
+        with self.lock:
+            return self._lookup(path)
+
+    def is_readable(self) -> bool:
+        """Whether lookups are answered from the index at all"""
+        with self.lock:
+            self._refresh()
+            return self.data is not None
+
+    def _lookup(self, path: str) -> Optional[str]:
+        self._refresh()
+        if self.data is None or not path:
+            return None
+        target = path.encode().rstrip(b"/")
+        entry = self._lower_bound(target)
+        if entry is not None and entry.name == target:
+            if self._is_intent_to_add(entry):
+                return None
+            return TREE if entry.mode == GITLINK_MODE else BLOB
+        # Names like "a-b" sort between "a" and "a/", so search again
+        entry = self._lower_bound(target + b"/")
+        if entry is not None and entry.name.startswith(target + b"/"):
+            # Files under a directory, or a sparse directory entry itself
+            return TREE
+        return self._lookup_sparse(target)
+
+    def _lookup_sparse(self, target: bytes) -> Optional[str]:
+        """Paths inside a sparse directory entry are only in its tree"""
+        assert self.data is not None
+        separator = target.find(b"/")
+        while separator >= 0:
+            directory = target[:separator + 1]
+            entry = self._lower_bound(directory)
+            if entry is not None and entry.name == directory:
+                if entry.mode != TREE_MODE:
+                    return None
+                hash_position = entry.start + STAT_SIZE
+                tree_hash = self.data[
+                    hash_position:hash_position + self.hash_length
+                ].hex()
+                return read_tree_entry_type(
+                    self.path.parent,
+                    tree_hash,
+                    target[separator + 1:].decode(),
+                )
+            separator = target.find(b"/", separator + 1)
+        return None
+
+    def close(self) -> None:
+        with self.lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.stat_key = None
+        self.restarts = None
+        self.restart_names = []
+
+
+def read_tree_entry_type(
+    git_directory: pathlib.Path, tree_hash: str, path: str,
+) -> Optional[str]:
+    """Ask git for the type of a path inside a tree that is not checked out"""
+    import subprocess  # noqa: PLC0415
+
+    try:
+        with trace.span("git cat-file -t", trace.SUBPROCESS):
+            process = subprocess.run(
+                ["git", "--git-dir", str(git_directory), "cat-file", "-t",
+                 "%s:%s" % (tree_hash, path)],
+                capture_output=True,
+                universal_newlines=True,
+                check=False,
+            )
+    except OSError:
+        return None
+    object_type = process.stdout.strip()
+    if object_type == "commit":
+        return TREE
+    if object_type in [BLOB, TREE]:
+        return object_type
+    return None
@@ -1,3 +1,5 @@
+from typing import cast
+
 from git_browse import typedefs
 
 
@@ -28,6 +30,7 @@ class GitlabHost(typedefs.Host):
         self.git_config = git_config
         self.user = user
         self.repository = repository
+        self.base_url = git_config.base_url or GITLAB_URL
 
     @staticmethod
     def create(git_config: typedefs.GitConfig) -> typedefs.Host:
@@ -41,10 +44,21 @@ class GitlabHost(typedefs.Host):
     def set_host_class(self, host_class: type[typedefs.Host]) -> None:
         return
 
+    def line_fragment(self, start: int, end: int) -> str:
+        if start == end:
+            return "#L%d" % start
+        return "#L%d-%d" % (start, end)
+
     def get_url(self, git_object: typedefs.GitObject) -> str:
-        repository_url = "%s%s/%s" % (GITLAB_URL, self.user, self.repository)
+        repository_url = "%s%s/%s" % (
+            self.base_url, self.user, self.repository,
+        )
         if git_object.is_commit_hash():
             return self.commit_hash_url(repository_url, git_object)
+        if git_object.is_commit_range():
+            return self.compare_url(
+                repository_url, cast(typedefs.FocusRange, git_object),
+            )
         if git_object.is_root():
             return self.root_url(repository_url, git_object)
         if git_object.is_directory():
@@ -60,6 +74,18 @@ class GitlabHost(typedefs.Host):
         )
         return repository_url
 
+    def compare_url(
+        self, repository_url: str, focus_range: typedefs.FocusRange,
+    ) -> str:
+        repository_url = "%s/-/compare/%s...%s" % (
+            repository_url,
+            focus_range.start,
+            focus_range.end,
+        )
+        if not focus_range.is_merge_base():
+            repository_url += "?straight=true"
+        return repository_url
+
     def root_url(
         self, repository_url: str, focus_object: typedefs.GitObject,
     ) -> str:
@@ -84,3 +110,9 @@ class GitlabHost(typedefs.Host):
             focus_object.identifier,
         )
         return repository_url
+
+
+HOST_REGEXES: dict[str, type[typedefs.Host]] = {
+    GITLAB_SSH_URL: GitlabHost,
+    GITLAB_HTTPS_URL: GitlabHost,
+}
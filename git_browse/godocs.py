@@ -1,7 +1,13 @@
-from typing import Optional
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Optional
 
 from git_browse import phabricator, typedefs
 
+if TYPE_CHECKING:  # pragma: no cover
+    from git_browse import gomod
+
 
 PUBLIC_GODOCS_URL = "https://godocs.io/"
 UBER_GODOCS_URL = "https://engdocs.uberinternal.com/api/go/pkg"
@@ -21,6 +27,7 @@ class GodocsHost(typedefs.Host):
         self.host_class: Optional[type[typedefs.Host]] = None
         self.host = host
         self.repository = repository
+        self.module_index: Optional[gomod.GoModuleIndex] = None
 
     @staticmethod
     def create(git_config: typedefs.GitConfig) -> typedefs.Host:
@@ -44,14 +51,47 @@ class GodocsHost(typedefs.Host):
         repository_url = "%s%s/%s" % (godocs_url, self.host, self.repository)
         if self.host_class == phabricator.PhabricatorHost:
             repository_url = UBER_GODOCS_URL
-        if git_object.is_commit_hash():
+        if git_object.is_commit_hash() or git_object.is_commit_range():
             return self.commit_hash_url(repository_url, git_object)
         if git_object.is_root():
-            return repository_url
+            return self.package_url("") or repository_url
         if git_object.is_directory():
             return self.directory_url(repository_url, git_object)
         return self.file_url(repository_url, git_object)
 
+    def get_module_index(self) -> Optional[gomod.GoModuleIndex]:
+        """The go.mod index of the repository, built on first use"""
+        repository_root = self.git_config.repository_root
+        if self.module_index is None and repository_root is not None:
+            from git_browse import context, gomod  # noqa: PLC0415
+
+            try:
+                repository_context = context.RepositoryContext.discover(
+                    repository_root,
+                )
+            except FileNotFoundError:
+                return None
+            self.module_index = gomod.GoModuleIndex(
+                repository_context.worktree_root,
+                repository_context.git_directory,
+            )
+        return self.module_index
+
+    def is_stale(self) -> bool:
+        return self.module_index is not None and self.module_index.is_stale()
+
+    def package_url(self, directory: str) -> Optional[str]:
+        """The url of the package in a directory, by the go.mod it is under"""
+        if self.host_class == phabricator.PhabricatorHost:
+            return None
+        module_index = self.get_module_index()
+        if module_index is None:
+            return None
+        package_path = module_index.package_path(directory.replace(os.sep, "/"))
+        if package_path is None:
+            return None
+        return PUBLIC_GODOCS_URL + package_path
+
     def commit_hash_url(
         self, repository_url: str, focus_hash: typedefs.GitObject,
     ) -> str:
@@ -61,6 +101,9 @@ class GodocsHost(typedefs.Host):
         self, repository_url: str, focus_object: typedefs.GitObject,
     ) -> str:
         path = focus_object.identifier
+        package_url = self.package_url(path)
+        if package_url is not None:
+            return package_url + "/"
         if repository_url == UBER_GODOCS_URL:
             path = '/'.join(path.split('/')[1:])
         repository_url = "%s/%s" % (repository_url, path)
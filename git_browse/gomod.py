@@ -0,0 +1,50 @@
+"""
+An index of the Go modules in a repository, mapping each module's directory
+to the module path its go.mod declares.  Directories are matched to their
+module by longest prefix, instead of walking up to the nearest go.mod for
+each one.
+"""
+
+import re
+from typing import Optional
+
+from git_browse import cache
+
+
+MODULE_FILE_NAME = "go.mod"
+# The module directive, quoted or not, and possibly in a block
+MODULE_REGEX = re.compile(
+    r"^[ \t]*module\s*\(?\s*(\"[^\"\n]*\"|`[^`\n]*`|[^\s()\"`]+)",
+    re.MULTILINE,
+)
+
+
+def parse_module_path(data: str) -> Optional[str]:
+    match = MODULE_REGEX.search(data)
+    if not match:
+        return None
+    return match.group(1).strip("\"`") or None
+
+
+class GoModuleIndex(cache.TrackedFileIndex):
+    """The module paths of a repository keyed by directory"""
+
+    cache_file_name = "git-browse-gomod.json"
+    file_name = MODULE_FILE_NAME
+
+    def parse(self, data: str) -> Optional[str]:
+        return parse_module_path(data)
+
+    def package_path(self, directory: str) -> Optional[str]:
+        """
+        The import path of the package in a slash separated directory, or
+        None if no module contains it
+        """
+        directory = directory.strip("/")
+        prefix = self.nearest(directory)
+        if prefix is None:
+            return None
+        remainder = directory[len(prefix):].lstrip("/")
+        if not remainder:
+            return str(self.entries[prefix])
+        return "%s/%s" % (self.entries[prefix], remainder)
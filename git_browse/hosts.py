@@ -0,0 +1,177 @@
+"""
+Host dispatch.  The hostname is taken from the remote url first, so that
+only the module registered for that hostname is imported and only its
+patterns are matched.  Each host module exposes a HOST_REGEXES dict.
+
+Self-hosted instances are declared in git config, and take precedence:
+
+    [browse "host.git.example.com"]
+        type = gitlab
+        url = https://git.example.com/
+"""
+
+import pathlib
+import re
+from typing import Any, Iterator, NamedTuple, Optional, cast
+
+from git_browse import gitconfig, typedefs
+
+
+# Hostname to the module that handles its remote urls
+HOST_MODULES = {
+    "github.com": "git_browse.github",
+    "code.uber.internal": "git_browse.github",
+    "objectconfig": "git_browse.github",
+    "bitbucket.org": "git_browse.bitbucket",
+    "gitlab.com": "git_browse.gitlab",
+}
+# Third party packages register host modules under this entry point group,
+# with the hostname as the entry point name
+ENTRY_POINT_GROUP = "git_browse.hosts"
+# An optional scheme, then optional credentials, then the hostname
+HOSTNAME_REGEX = re.compile(r"^(?:[a-z][a-z0-9+.-]*://)?(?:[^@/]*@)?([^:/@]+)")
+# The url layouts a configured host can take, by the class that builds them
+HOST_TYPES = {
+    "github": ("git_browse.github", "GithubHost"),
+    "gitlab": ("git_browse.gitlab", "GitlabHost"),
+    "bitbucket": ("git_browse.bitbucket", "BitbucketHost"),
+}
+CONFIG_SECTION = "browse"
+CONFIG_HOST_PREFIX = "host."
+
+
+class HostEntry(NamedTuple):
+    host_type: str
+    base_url: str
+    regex: str
+
+
+# Configured hosts keyed by lowercase hostname
+HostTable = dict[str, HostEntry]
+
+
+def get_hostname(git_url: str) -> Optional[str]:
+    """Return the hostname of an scp-like or url-like remote"""
+    match = HOSTNAME_REGEX.match(git_url.strip())
+    if not match:
+        return None
+    return match.group(1).lower()
+
+
+def get_configured_regex(hostname: str) -> str:
+    """Match the ssh, scp-like and https remotes of a configured hostname"""
+    return (
+        "^(?:[a-z][a-z0-9+.-]*://)?(?:[^@/]*@)?(?P<host>(?i:%s))(?::[0-9]+)?"
+        "[:/]%s/%s"
+    ) % (re.escape(hostname), typedefs.USER_REGEX, typedefs.REPOSITORY_REGEX)
+
+
+def compile_host_table(subsections: dict[str, dict[str, str]]) -> HostTable:
+    """
+    Build the host table from browse.host.<hostname> config, so that each
+    remote is dispatched with one lookup however many hosts are configured
+    """
+    host_table: HostTable = {}
+    for subsection, values in subsections.items():
+        if not subsection.startswith(CONFIG_HOST_PREFIX):
+            continue
+        hostname = subsection[len(CONFIG_HOST_PREFIX):].lower()
+        host_type = values.get("type", "").lower()
+        if host_type not in HOST_TYPES:
+            raise ValueError(
+                "unknown browse.%s.type: %s" % (subsection, host_type),
+            )
+        base_url = values.get("url") or "https://%s/" % hostname
+        host_table[hostname] = HostEntry(
+            host_type,
+            base_url.rstrip("/") + "/",
+            get_configured_regex(hostname),
+        )
+    return host_table
+
+
+def read_host_table(
+    local_config_path: Optional[pathlib.Path] = None,
+    git_directory: Optional[pathlib.Path] = None,
+    environ: Optional[dict[str, str]] = None,
+) -> HostTable:
+    """The hosts configured in the system, global and local config"""
+    subsections = gitconfig.read_config_subsections(
+        CONFIG_SECTION, local_config_path, git_directory, environ,
+    )
+    return compile_host_table(subsections)
+
+
+def get_host_type(host_type: str) -> type[typedefs.Host]:
+    import importlib  # noqa: PLC0415
+
+    module_name, class_name = HOST_TYPES[host_type]
+    module = importlib.import_module(module_name)
+    return cast(type[typedefs.Host], getattr(module, class_name))
+
+
+def get_host_regexes(module_name: str) -> dict[str, type[typedefs.Host]]:
+    import importlib  # noqa: PLC0415
+
+    module = importlib.import_module(module_name)
+    return cast(dict[str, type[typedefs.Host]], module.HOST_REGEXES)
+
+
+def get_plugin_module(hostname: str) -> Optional[str]:
+    """Look up a host module registered by another package"""
+    try:
+        from importlib import metadata  # noqa: PLC0415
+    except ImportError:  # pragma: no cover
+        # Python 3.7 has no entry point api in the standard library
+        return None
+    # A dict of groups before Python 3.10
+    entry_points: Any = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        group = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:  # pragma: no cover
+        group = entry_points.get(ENTRY_POINT_GROUP, [])
+    for entry_point in group:
+        if entry_point.name.lower() == hostname:
+            return str(entry_point.value)
+    return None
+
+
+def iter_candidate_modules(hostname: Optional[str]) -> Iterator[str]:
+    """
+    The registered module for a hostname, then every built in module as a
+    fallback for remotes whose hostname is not registered
+    """
+    if hostname in HOST_MODULES:
+        yield HOST_MODULES[hostname]
+    elif hostname is not None:
+        plugin_module = get_plugin_module(hostname)
+        if plugin_module is not None:
+            yield plugin_module
+    for module_name in dict.fromkeys(HOST_MODULES.values()):
+        yield module_name
+
+
+def get_host_class(
+    git_config: typedefs.GitConfig, host_table: Optional[HostTable] = None,
+) -> type[typedefs.Host]:
+    if host_table:
+        host_entry = host_table.get(get_hostname(git_config.git_url) or "")
+        if host_entry and git_config.try_url_match(host_entry.regex):
+            git_config.base_url = host_entry.base_url
+            return get_host_type(host_entry.host_type)
+    if git_config.url_regex_match and git_config.host_regex:
+        # Already matched, possibly loaded from the resolution cache
+        try:
+            hostname: Optional[str] = git_config.url_regex_match.group("host")
+        except IndexError:
+            hostname = None
+        for module_name in iter_candidate_modules(hostname):
+            host_regexes = get_host_regexes(module_name)
+            if git_config.host_regex in host_regexes:
+                return host_regexes[git_config.host_regex]
+    hostname = get_hostname(git_config.git_url)
+    for module_name in iter_candidate_modules(hostname):
+        for regex, host_class in get_host_regexes(module_name).items():
+            if git_config.try_url_match(regex):
+                return host_class
+    raise ValueError("git url not parseable")
@@ -0,0 +1,96 @@
+"""
+Bulk export of the browse url of every tracked file, streamed so that
+memory stays constant however large the repository is
+"""
+
+from json import encoder
+import os
+import pathlib
+import subprocess
+from typing import BinaryIO, Iterator, Optional
+
+from git_browse import trace, typedefs
+
+
+READ_SIZE = 1 << 16
+# Lines are encoded and written in batches rather than one at a time
+WRITE_BATCH_SIZE = 1024
+GITLINK_MODE = b"160000"
+encode_string = encoder.encode_basestring_ascii
+
+
+def iter_tracked_paths(
+    directory: pathlib.Path, pathspecs: Optional[list[str]] = None,
+) -> Iterator[tuple[str, bool]]:
+    """
+    Yield every path in the index relative to the repository root, along
+    with whether it is a submodule, reading `git ls-files` as it runs
+    """
+    with trace.span("git ls-files", trace.SUBPROCESS):
+        process = subprocess.Popen(
+            ["git", "ls-files", "-z", "--stage", "--full-name", "--",
+             *(pathspecs or [])],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=directory,
+        )
+        assert process.stdout and process.stderr
+        remainder = b""
+        previous = b""
+        try:
+            while True:
+                chunk = process.stdout.read(READ_SIZE)
+                if not chunk:
+                    break
+                *records, remainder = (remainder + chunk).split(b"\0")
+                for record in records:
+                    # "<mode> <hash> <stage>\t<path>"
+                    metadata, _, path = record.partition(b"\t")
+                    # Unmerged paths are listed once for each stage
+                    if path == previous:
+                        continue
+                    previous = path
+                    yield (
+                        path.decode("utf-8", "surrogateescape"),
+                        metadata.startswith(GITLINK_MODE),
+                    )
+        finally:
+            process.stdout.close()
+            error = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            if process.wait() and error:
+                raise RuntimeError(error)
+
+
+def write_manifest(
+    host: typedefs.Host,
+    paths: Iterator[tuple[str, bool]],
+    output: BinaryIO,
+    output_format: str = "tsv",
+) -> int:
+    """Write one path and url per line, returning the number of paths"""
+    count = 0
+    lines: list[str] = []
+    for path, is_submodule in paths:
+        identifier = path.replace("/", os.sep) if os.sep != "/" else path
+        if is_submodule:
+            identifier += os.sep
+        url = host.get_url(typedefs.FocusObject(identifier))
+        if output_format == "jsonl":
+            # Formatted directly; a dict through json.dumps is much slower
+            lines.append('{"path": %s, "url": %s}' % (
+                encode_string(path), encode_string(url),
+            ))
+        else:
+            lines.append("%s\t%s" % (path, url))
+        count += 1
+        if len(lines) >= WRITE_BATCH_SIZE:
+            output.write(encode_lines(lines))
+            lines = []
+    if lines:
+        output.write(encode_lines(lines))
+    return count
+
+
+def encode_lines(lines: list[str]) -> bytes:
+    return ("\n".join(lines) + "\n").encode("utf-8", "surrogateescape")
@@ -0,0 +1,523 @@
+"""
+Native object lookup for abbreviated hashes, through the fanout tables of
+mmap'd pack indexes and multi-pack-indexes, loose objects, and alternates
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import pathlib
+import struct
+import threading
+import zlib
+from typing import Iterator, NamedTuple, Optional
+
+
+# git refuses abbreviations shorter than this
+MIN_ABBREVIATION = 4
+MAX_ALTERNATE_DEPTH = 5
+# Same limit as git for chains of deltas and nested tags
+MAX_PEEL_DEPTH = 50
+IDX_V2_HEADER = b"\377tOc\0\0\0\2"
+FANOUT_SIZE = 256 * 4
+MIDX_SIGNATURE = b"MIDX"
+MIDX_HASH_LENGTHS = {1: 20, 2: 32}
+LARGE_OFFSET_FLAG = 0x80000000
+# Object types as stored in pack entry headers
+PACK_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+HEX_DIGITS = set("0123456789abcdef")
+
+
+class AmbiguousObjectError(ValueError):
+    def __init__(self, prefix: str, candidates: list[str]) -> None:
+        super().__init__(
+            "short object ID %s is ambiguous; the candidates are: %s"
+            % (prefix, ", ".join(sorted(candidates))),
+        )
+        self.prefix = prefix
+        self.candidates = candidates
+
+
+def is_abbreviated_hash(identifier: str, hash_length: int = 20) -> bool:
+    return (
+        MIN_ABBREVIATION <= len(identifier) <= hash_length * 2
+        and set(identifier) <= HEX_DIGITS
+    )
+
+
+class Prefix(object):
+    """A hex prefix as bytes, with its trailing half byte when odd"""
+
+    def __init__(self, prefix: str) -> None:
+        self.hex = prefix
+        self.whole = bytes.fromhex(prefix[:len(prefix) - len(prefix) % 2])
+        self.nibble: Optional[int] = None
+        if len(prefix) % 2:
+            self.nibble = int(prefix[-1], 16)
+        # The smallest hash with this prefix, for bisecting
+        self.lower_bound = bytes.fromhex(prefix + "0" * (len(prefix) % 2))
+
+    def matches(self, object_hash: bytes) -> bool:
+        if not object_hash.startswith(self.whole):
+            return False
+        if self.nibble is None:
+            return True
+        return object_hash[len(self.whole)] >> 4 == self.nibble
+
+
+def map_file(path: pathlib.Path) -> Optional[mmap.mmap]:
+    try:
+        with open(path, "rb") as handle:
+            return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Missing, unreadable, or empty
+        return None
+
+
+class HashTable(object):
+    """A sorted table of hashes behind a fanout table, as in every git index"""
+
+    def __init__(
+        self,
+        data: mmap.mmap,
+        fanout_start: int,
+        hashes_start: int,
+        stride: int,
+        hash_length: int,
+    ) -> None:
+        self.data = data
+        self.fanout_start = fanout_start
+        self.hashes_start = hashes_start
+        self.stride = stride
+        self.hash_length = hash_length
+        self.count = self.fanout(255)
+
+    def fanout(self, byte: int) -> int:
+        """Number of hashes whose first byte is at most byte"""
+        if byte < 0:
+            return 0
+        value: int = struct.unpack_from(
+            ">I", self.data, self.fanout_start + byte * 4,
+        )[0]
+        return value
+
+    def hash_at(self, position: int) -> bytes:
+        start = self.hashes_start + position * self.stride
+        return self.data[start:start + self.hash_length]
+
+    def find_prefix(self, prefix: Prefix, limit: int) -> Iterator[int]:
+        """Yield up to limit positions of hashes starting with prefix"""
+        first_byte = prefix.lower_bound[0]
+        low, high = self.fanout(first_byte - 1), self.fanout(first_byte)
+        while low < high:
+            middle = (low + high) // 2
+            if self.hash_at(middle) < prefix.lower_bound:
+                low = middle + 1
+            else:
+                high = middle
+        end = min(self.fanout(first_byte), low + limit)
+        for position in range(low, end):
+            if not prefix.matches(self.hash_at(position)):
+                return
+            yield position
+
+
+class PackIndex(object):
+    """A version 1 or 2 pack .idx file"""
+
+    def __init__(self, path: pathlib.Path, hash_length: int) -> None:
+        self.pack_path = path.with_suffix(".pack")
+        self.data = map_file(path)
+        self.table: Optional[HashTable] = None
+        if self.data is None:
+            return
+        if self.data[:len(IDX_V2_HEADER)] == IDX_V2_HEADER:
+            self.version = 2
+            self.table = HashTable(
+                self.data, 8, 8 + FANOUT_SIZE, hash_length, hash_length,
+            )
+        else:
+            self.version = 1
+            self.table = HashTable(
+                self.data, 0, FANOUT_SIZE + 4, hash_length + 4, hash_length,
+            )
+
+    def find_prefix(self, prefix: Prefix, limit: int) -> list[bytes]:
+        if self.table is None:
+            return []
+        return [
+            self.table.hash_at(position)
+            for position in self.table.find_prefix(prefix, limit)
+        ]
+
+    def offset(self, object_hash: bytes) -> Optional[int]:
+        """Return where an object is stored in the pack"""
+        if self.table is None or self.data is None:
+            return None
+        positions = list(self.table.find_prefix(Prefix(object_hash.hex()), 1))
+        if not positions:
+            return None
+        position = positions[0]
+        table = self.table
+        if self.version == 1:
+            start = table.hashes_start + position * table.stride - 4
+            offset: int = struct.unpack_from(">I", self.data, start)[0]
+            return offset
+        # After the hashes come crc32s, then 4-byte offsets, then 8-byte ones
+        offsets_start = table.hashes_start + table.count * (table.hash_length + 4)
+        offset = struct.unpack_from(">I", self.data, offsets_start + position * 4)[0]
+        if offset & LARGE_OFFSET_FLAG:
+            large_start = offsets_start + table.count * 4
+            offset = struct.unpack_from(
+                ">Q", self.data, large_start + (offset & ~LARGE_OFFSET_FLAG) * 8,
+            )[0]
+        return offset
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.table = None
+
+
+class MultiPackIndex(object):
+    """A multi-pack-index covering several packs with one hash table"""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.pack_directory = path.parent
+        self.data = map_file(path)
+        self.table: Optional[HashTable] = None
+        self.pack_names: list[str] = []
+        self.chunks: dict[bytes, int] = {}
+        if self.data is None or self.data[:4] != MIDX_SIGNATURE:
+            return
+        hash_length = MIDX_HASH_LENGTHS.get(self.data[5])
+        if hash_length is None:
+            return
+        chunk_count = self.data[6]
+        pack_count: int = struct.unpack_from(">I", self.data, 8)[0]
+        for index in range(chunk_count):
+            chunk_id = self.data[12 + index * 12:16 + index * 12]
+            offset: int = struct.unpack_from(">Q", self.data, 16 + index * 12)[0]
+            self.chunks[chunk_id] = offset
+        if not {b"PNAM", b"OIDF", b"OIDL", b"OOFF"} <= set(self.chunks):
+            return
+        names_start = self.chunks[b"PNAM"]
+        position = names_start
+        for _ in range(pack_count):
+            end = self.data.find(b"\0", position)
+            self.pack_names.append(self.data[position:end].decode())
+            position = end + 1
+        self.table = HashTable(
+            self.data,
+            self.chunks[b"OIDF"],
+            self.chunks[b"OIDL"],
+            hash_length,
+            hash_length,
+        )
+
+    def find_prefix(self, prefix: Prefix, limit: int) -> list[bytes]:
+        if self.table is None:
+            return []
+        return [
+            self.table.hash_at(position)
+            for position in self.table.find_prefix(prefix, limit)
+        ]
+
+    def locate(self, object_hash: bytes) -> Optional[tuple[pathlib.Path, int]]:
+        """Return the pack holding an object and where it is stored there"""
+        if self.table is None or self.data is None:
+            return None
+        positions = list(self.table.find_prefix(Prefix(object_hash.hex()), 1))
+        if not positions:
+            return None
+        start = self.chunks[b"OOFF"] + positions[0] * 8
+        pack_id, offset = struct.unpack_from(">II", self.data, start)
+        if offset & LARGE_OFFSET_FLAG and b"LOFF" in self.chunks:
+            offset = struct.unpack_from(
+                ">Q",
+                self.data,
+                self.chunks[b"LOFF"] + (offset & ~LARGE_OFFSET_FLAG) * 8,
+            )[0]
+        pack_name = self.pack_names[pack_id]
+        return self.pack_directory / pack_name.replace(".idx", ".pack"), offset
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.table = None
+
+
+def read_alternates(
+    objects_directory: pathlib.Path, depth: int = 0,
+) -> list[pathlib.Path]:
+    """Return an object directory followed by its alternates, recursively"""
+    directories = [objects_directory]
+    if depth >= MAX_ALTERNATE_DEPTH:
+        return directories
+    try:
+        with open(objects_directory / "info" / "alternates", "r") as handle:
+            lines = handle.read().splitlines()
+    except OSError:
+        return directories
+    for line in lines:
+        entry = line.strip()
+        if not entry or entry.startswith("#"):
+            continue
+        # Relative alternates are relative to the objects directory
+        alternate = objects_directory.joinpath(entry)
+        directories += read_alternates(alternate, depth + 1)
+    return directories
+
+
+class ObjectDirectory(object):
+    """The packs and loose objects of one objects directory"""
+
+    def __init__(self, path: pathlib.Path, hash_length: int) -> None:
+        self.path = path
+        self.hash_length = hash_length
+        self.pack_directory = path / "pack"
+        self.pack_mtime: Optional[int] = None
+        self.indexes: list[PackIndex | MultiPackIndex] = []
+        self.pack_indexes: dict[pathlib.Path, PackIndex] = {}
+
+    def refresh(self) -> None:
+        """Reload the pack list when packs are added or removed"""
+        try:
+            pack_mtime = os.stat(self.pack_directory).st_mtime_ns
+        except OSError:
+            pack_mtime = None
+        if pack_mtime == self.pack_mtime and self.pack_mtime is not None:
+            return
+        self.close()
+        self.pack_mtime = pack_mtime
+        if pack_mtime is None:
+            return
+        multi_pack_index = MultiPackIndex(
+            self.pack_directory / "multi-pack-index",
+        )
+        covered = set(multi_pack_index.pack_names)
+        if multi_pack_index.table is not None:
+            self.indexes.append(multi_pack_index)
+        for name in sorted(os.listdir(self.pack_directory)):
+            if not name.endswith(".idx") or name in covered:
+                continue
+            pack_index = PackIndex(self.pack_directory / name, self.hash_length)
+            self.indexes.append(pack_index)
+            self.pack_indexes[pack_index.pack_path] = pack_index
+
+    def find_prefix(self, prefix: Prefix, limit: int) -> set[bytes]:
+        self.refresh()
+        found: set[bytes] = set()
+        for index in self.indexes:
+            found.update(index.find_prefix(prefix, limit))
+        try:
+            loose = os.listdir(self.path / prefix.hex[:2])
+        except OSError:
+            loose = []
+        for name in loose:
+            if name.startswith(prefix.hex[2:]) and len(name) == (
+                self.hash_length * 2 - 2
+            ):
+                found.add(bytes.fromhex(prefix.hex[:2] + name))
+        return found
+
+    def locate(self, object_hash: bytes) -> Optional[tuple[pathlib.Path, int]]:
+        """Return the pack and offset of a packed object"""
+        self.refresh()
+        for index in self.indexes:
+            if isinstance(index, MultiPackIndex):
+                location = index.locate(object_hash)
+                if location is not None:
+                    return location
+                continue
+            offset = index.offset(object_hash)
+            if offset is not None:
+                return index.pack_path, offset
+        return None
+
+    def read_loose(self, object_hash: str) -> Optional[bytes]:
+        """Return the start of a loose object: its header and some content"""
+        path = self.path / object_hash[:2] / object_hash[2:]
+        try:
+            with open(path, "rb") as handle:
+                compressed = handle.read(4096)
+            return zlib.decompressobj().decompress(compressed, 4096)
+        except (OSError, zlib.error):
+            return None
+
+    def close(self) -> None:
+        for index in self.indexes:
+            index.close()
+        self.indexes = []
+        self.pack_indexes = {}
+        self.pack_mtime = None
+
+
+class PackEntry(NamedTuple):
+    object_type: int
+    # Where a delta's base is, in this pack or by hash
+    base_offset: Optional[int]
+    base_hash: Optional[bytes]
+    # The start of the inflated content of a whole object
+    content: bytes
+
+
+def read_pack_entry(
+    pack_path: pathlib.Path, offset: int, hash_length: int,
+) -> Optional[PackEntry]:
+    try:
+        with open(pack_path, "rb") as handle:
+            handle.seek(offset)
+            data = handle.read(4096)
+    except OSError:
+        return None
+    if not data:
+        return None
+    # A type and a variable length size, then the base of deltas
+    position = 0
+    byte = data[position]
+    object_type = (byte >> 4) & 7
+    while byte & 0x80:
+        position += 1
+        byte = data[position]
+    position += 1
+    if object_type == OFS_DELTA:
+        byte = data[position]
+        distance = byte & 0x7F
+        while byte & 0x80:
+            position += 1
+            byte = data[position]
+            distance = ((distance + 1) << 7) | (byte & 0x7F)
+        return PackEntry(object_type, offset - distance, None, b"")
+    if object_type == REF_DELTA:
+        base_hash = data[position:position + hash_length]
+        return PackEntry(object_type, None, base_hash, b"")
+    try:
+        content = zlib.decompressobj().decompress(data[position:], 512)
+    except zlib.error:
+        content = b""
+    return PackEntry(object_type, None, None, content)
+
+
+class ObjectStore(object):
+    """
+    Answers which objects an abbreviated hash could mean, and peels them to
+    commits, without spawning git.  Returns None when an answer would need
+    delta resolution, so callers can fall back to git.
+    """
+
+    def __init__(
+        self, common_directory: pathlib.Path, hash_length: int = 20,
+    ) -> None:
+        self.hash_length = hash_length
+        # Pack lists are reloaded in place, so lookups are serialized
+        self.lock = threading.Lock()
+        self.directories = [
+            ObjectDirectory(path, hash_length)
+            for path in read_alternates(common_directory / "objects")
+        ]
+
+    def find_prefix(self, prefix: str, limit: int = 10) -> list[str]:
+        """Return the distinct objects whose hash starts with prefix"""
+        parsed_prefix = Prefix(prefix)
+        found: set[bytes] = set()
+        for directory in self.directories:
+            found.update(directory.find_prefix(parsed_prefix, limit))
+        return sorted(object_hash.hex() for object_hash in found)
+
+    def read_object(
+        self, object_hash: str, depth: int = 0,
+    ) -> Optional[tuple[str, bytes]]:
+        """Return the type of an object and the start of its content"""
+        if depth >= MAX_PEEL_DEPTH:
+            return None
+        for directory in self.directories:
+            data = directory.read_loose(object_hash)
+            if data is not None:
+                header, _, content = data.partition(b"\0")
+                return header.split(b" ", 1)[0].decode(), content
+        for directory in self.directories:
+            location = directory.locate(bytes.fromhex(object_hash))
+            if location is not None:
+                return self.read_packed(*location, depth)
+        return None
+
+    def read_packed(
+        self, pack_path: pathlib.Path, offset: int, depth: int,
+    ) -> Optional[tuple[str, bytes]]:
+        """Follow deltas to the type of the whole object they are based on"""
+        is_delta = False
+        for _ in range(MAX_PEEL_DEPTH - depth):
+            entry = read_pack_entry(pack_path, offset, self.hash_length)
+            if entry is None:
+                return None
+            if entry.object_type in PACK_TYPES:
+                object_type = PACK_TYPES[entry.object_type]
+                if not is_delta:
+                    return object_type, entry.content
+                if object_type == "tag":
+                    # A deltified tag's content needs its base applied
+                    return None
+                return object_type, b""
+            if entry.base_hash is not None:
+                base = self.read_object(entry.base_hash.hex(), depth + 1)
+                if base is None or base[0] == "tag":
+                    # A deltified tag's content needs its base applied
+                    return None
+                return base[0], b""
+            if entry.base_offset is None:
+                return None
+            offset = entry.base_offset
+            is_delta = True
+        return None
+
+    def peel_to_commit(self, object_hash: str) -> Optional[str]:
+        """Follow tags from an object to the commit they point at"""
+        for _ in range(MAX_PEEL_DEPTH):
+            found = self.read_object(object_hash)
+            if found is None:
+                return None
+            object_type, content = found
+            if object_type == "commit":
+                return object_hash
+            if object_type != "tag" or not content.startswith(b"object "):
+                return None
+            object_hash = content[7:content.find(b"\n")].decode()
+        return None
+
+    def resolve(self, prefix: str) -> Optional[str]:
+        """
+        Resolve an abbreviated hash to a commit.  Like git, a prefix shared
+        by several objects is fine as long as only one of them is a commit
+        or a tag pointing at one.
+        """
+        with self.lock:
+            return self._resolve(prefix)
+
+    def _resolve(self, prefix: str) -> Optional[str]:
+        candidates = self.find_prefix(prefix)
+        if len(candidates) == 1:
+            return self.peel_to_commit(candidates[0])
+        commits: dict[str, str] = {}
+        for candidate in candidates:
+            if self.read_object(candidate) is None:
+                # Unknown types cannot be ruled out, so let git decide
+                return None
+            commit = self.peel_to_commit(candidate)
+            if commit is not None:
+                commits[candidate] = commit
+        if len(commits) == 1:
+            return list(commits.values())[0]
+        if candidates:
+            raise AmbiguousObjectError(prefix, list(commits) or candidates)
+        return None
+
+    def close(self) -> None:
+        with self.lock:
+            for directory in self.directories:
+                directory.close()
@@ -0,0 +1,147 @@
+"""
+Browser launcher discovery.  webbrowser probes for a launcher on every run,
+so the command it would settle on is found once, cached per user for the
+environment that decided it, and called directly afterwards.
+"""
+
+import json
+import os
+import pathlib
+import shlex
+import sys
+from typing import Optional
+
+from git_browse import cache
+
+
+CACHE_DIRECTORY_NAME = "git-browse"
+CACHE_FILE_NAME = "opener.json"
+CACHE_VERSION = 1
+# The variables that decide which launcher webbrowser would pick
+ENVIRONMENT_KEYS = ["PATH", "BROWSER", "DISPLAY", "WAYLAND_DISPLAY"]
+# Graphical launchers in the order webbrowser prefers them
+DESKTOP_LAUNCHERS = [
+    ["xdg-open"],
+    ["gio", "open"],
+    ["gvfs-open"],
+    ["x-www-browser"],
+    ["firefox"],
+    ["google-chrome"],
+    ["chromium"],
+    ["chromium-browser"],
+]
+Launcher = list[str]
+
+
+def get_cache_path(environ: Optional[dict[str, str]] = None) -> pathlib.Path:
+    if environ is None:
+        environ = dict(os.environ)
+    cache_home = environ.get("XDG_CACHE_HOME")
+    if not cache_home:
+        home = environ.get("HOME", os.path.expanduser("~"))
+        cache_home = os.path.join(home, ".cache")
+    return pathlib.Path(cache_home) / CACHE_DIRECTORY_NAME / CACHE_FILE_NAME
+
+
+def get_cache_key(environ: dict[str, str]) -> list[Optional[str]]:
+    return [sys.platform] + [environ.get(key) for key in ENVIRONMENT_KEYS]
+
+
+def which(command: str, environ: dict[str, str]) -> Optional[str]:
+    import shutil  # noqa: PLC0415
+
+    return shutil.which(command, path=environ.get("PATH"))
+
+
+def discover(environ: dict[str, str]) -> Optional[Launcher]:
+    """
+    Find the launcher webbrowser would use, with its executable resolved to
+    an absolute path.  Returns None where only webbrowser itself will do,
+    such as on Windows or a console without a display.
+    """
+    for entry in environ.get("BROWSER", "").split(os.pathsep):
+        command = shlex.split(entry)
+        if not command:
+            continue
+        executable = which(command[0], environ)
+        if executable:
+            return [executable] + command[1:]
+    if sys.platform == "darwin":
+        executable = which("open", environ)
+        return [executable] if executable else None
+    if not environ.get("DISPLAY") and not environ.get("WAYLAND_DISPLAY"):
+        return None
+    for command in DESKTOP_LAUNCHERS:
+        executable = which(command[0], environ)
+        if executable:
+            return [executable] + command[1:]
+    return None
+
+
+def load(environ: dict[str, str]) -> Optional[Launcher]:
+    """Return the cached launcher if it was found in this environment"""
+    try:
+        with open(get_cache_path(environ), "r") as handle:
+            data = json.load(handle)
+        if data["version"] != CACHE_VERSION:
+            return None
+        if data["key"] != get_cache_key(environ):
+            return None
+        launcher = [str(argument) for argument in data["launcher"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # A launcher that was uninstalled is found again
+    if not launcher or not os.access(launcher[0], os.X_OK):
+        return None
+    return launcher
+
+
+def store(environ: dict[str, str], launcher: Launcher) -> None:
+    cache_path = get_cache_path(environ)
+    data = {
+        "version": CACHE_VERSION,
+        "key": get_cache_key(environ),
+        "launcher": launcher,
+    }
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_atomic(cache_path, json.dumps(data))
+    except OSError:
+        pass
+
+
+def forget(environ: Optional[dict[str, str]] = None) -> None:
+    try:
+        os.remove(get_cache_path(environ))
+    except OSError:
+        pass
+
+
+def get_launcher(
+    environ: Optional[dict[str, str]] = None, refresh: bool = False,
+) -> Optional[Launcher]:
+    """Return the cached launcher, discovering and caching it if needed"""
+    if environ is None:
+        environ = dict(os.environ)
+    if not refresh:
+        launcher = load(environ)
+        if launcher is not None:
+            return launcher
+    launcher = discover(environ)
+    if launcher is None:
+        forget(environ)
+    else:
+        store(environ, launcher)
+    return launcher
+
+
+def parse_opener(opener: str) -> Launcher:
+    """Split a browse.opener value the way BROWSER entries are split"""
+    return shlex.split(opener)
+
+
+def get_command(launcher: Launcher, url: str) -> list[str]:
+    """Substitute the url for %s, as webbrowser does, or append it"""
+    if any("%s" in argument for argument in launcher):
+        return [argument.replace("%s", url) for argument in launcher]
+    return launcher + [url]
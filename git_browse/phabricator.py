@@ -1,7 +1,11 @@
+from __future__ import annotations
+
 import json
+import os
 import pathlib
+from typing import Optional, cast
 
-from git_browse import typedefs
+from git_browse import cache, context, typedefs
 
 
 UBER_HOST = "(?P<host>code\\.uber\\.internal)"
@@ -20,6 +24,52 @@ UBER_OC_URL = "oc://%s/%s" % (
     typedefs.REPOSITORY_REGEX,
 )
 DEFAULT_BRANCH = "master"
+ARCCONFIG_FILE_NAME = ".arcconfig"
+
+
+def read_arcconfig(data: str) -> dict[str, str]:
+    """The phabricator url, callsign, and default branch of an .arcconfig"""
+    try:
+        arcconfig_data = json.loads(data)
+    except json.decoder.JSONDecodeError as err:
+        raise RuntimeError('Cannot parse ".arcconfig" file as json') from err
+    if not isinstance(arcconfig_data, dict):
+        raise RuntimeError('Cannot parse ".arcconfig" file as json')
+    repository_callsign = arcconfig_data.get("repository.callsign")
+    if not repository_callsign:
+        raise RuntimeError("Cannot get repository callsign")
+    phabricator_url = arcconfig_data.get("phabricator.uri")
+    if not phabricator_url:
+        phabricator_url = arcconfig_data.get("conduit_uri")
+        if not phabricator_url:
+            raise RuntimeError("Cannot get phabricator url")
+    default_branch = arcconfig_data.get(
+        "git.default-relative-commit", DEFAULT_BRANCH,
+    )
+    if "/" in default_branch:
+        default_branch = default_branch.split("/", 1)[1]
+    return {
+        "phabricator_url": phabricator_url.rstrip("/"),
+        "repository_callsign": repository_callsign,
+        "default_branch": default_branch,
+    }
+
+
+class ArcconfigIndex(cache.TrackedFileIndex):
+    """
+    The projects of a monorepo keyed by directory, for sub-projects that
+    carry their own .arcconfig and callsign
+    """
+
+    cache_file_name = "git-browse-arcconfig.json"
+    file_name = ARCCONFIG_FILE_NAME
+
+    def parse(self, data: str) -> Optional[dict[str, str]]:
+        try:
+            return read_arcconfig(data)
+        except RuntimeError:
+            # arc ignores a broken config, so the enclosing project applies
+            return None
 
 
 class PhabricatorHost(typedefs.Host):
@@ -30,21 +80,26 @@ class PhabricatorHost(typedefs.Host):
         self.phabricator_url = ""
         self.repository_callsign = ""
         self.default_branch = ""
+        self.repository_root: Optional[pathlib.Path] = None
+        self.project_index: Optional[ArcconfigIndex] = None
+        # Hosts for nested projects, keyed by their directory
+        self.projects: dict[str, PhabricatorHost] = {}
 
     @staticmethod
     def create(git_config: typedefs.GitConfig) -> typedefs.Host:
-        # Fix circular import
-        from git_browse import browse  # noqa: PLC0415
-
+        repository_root = git_config.repository_root
+        if repository_root is None:
+            repository_root = context.RepositoryContext.discover().worktree_root
         host = PhabricatorHost()
-        host._parse_arcconfig(browse.get_repository_root())
+        host._parse_arcconfig(repository_root)
+        host.repository_root = repository_root
         return host
 
     def set_host_class(self, host_class: type[typedefs.Host]) -> None:
         return
 
     def _parse_arcconfig(self, repository_root: pathlib.Path) -> None:
-        arcconfig_file = repository_root / ".arcconfig"
+        arcconfig_file = repository_root / ARCCONFIG_FILE_NAME
         try:
             with open(arcconfig_file, "r") as handle:
                 data = handle.read()
@@ -54,32 +109,69 @@ class PhabricatorHost(typedefs.Host):
                 "for repository configuration.  Expected file at %s."
                 % arcconfig_file,
             ) from err
-        try:
-            arcconfig_data = json.loads(data)
-        except json.decoder.JSONDecodeError as err:
-            raise RuntimeError('Cannot parse ".arcconfig" file as json') from err
-        self.repository_callsign = arcconfig_data.get("repository.callsign")
-        if not self.repository_callsign:
-            raise RuntimeError("Cannot get repository callsign")
-        self.phabricator_url = arcconfig_data.get("phabricator.uri")
-        if not self.phabricator_url:
-            self.phabricator_url = arcconfig_data.get("conduit_uri")
-            if not self.phabricator_url:
-                raise RuntimeError("Cannot get phabricator url")
-        self.phabricator_url = self.phabricator_url.rstrip("/")
-        default_branch = arcconfig_data.get(
-            "git.default-relative-commit", DEFAULT_BRANCH,
-        )
-        if "/" in default_branch:
-            default_branch = default_branch.split("/", 1)[1]
-        self.default_branch = default_branch
+        self._set_project(read_arcconfig(data))
+
+    def _set_project(self, project: dict[str, str]) -> None:
+        self.phabricator_url = project["phabricator_url"]
+        self.repository_callsign = project["repository_callsign"]
+        self.default_branch = project["default_branch"]
+
+    def is_stale(self) -> bool:
+        return self.project_index is not None and self.project_index.is_stale()
+
+    def get_project_index(self) -> Optional[ArcconfigIndex]:
+        """The .arcconfig index of the repository, built on first use"""
+        if self.project_index is None and self.repository_root is not None:
+            try:
+                repository_context = context.RepositoryContext.discover(
+                    self.repository_root,
+                )
+            except FileNotFoundError:
+                return None
+            self.project_index = ArcconfigIndex(
+                repository_context.worktree_root,
+                repository_context.git_directory,
+            )
+        return self.project_index
+
+    def get_project(self, path: str) -> tuple[PhabricatorHost, str]:
+        """
+        The host of the nearest project containing a path, and the path
+        relative to that project
+        """
+        project_index = self.get_project_index()
+        if project_index is None:
+            return self, path
+        directory = project_index.nearest(path.replace(os.sep, "/"))
+        if not directory:
+            return self, path
+        if directory not in self.projects:
+            host = PhabricatorHost()
+            try:
+                host._set_project(project_index.entries[directory])
+            except (KeyError, TypeError):
+                return self, path
+            self.projects[directory] = host
+        return self.projects[directory], path[len(directory) + 1:]
+
+    def line_fragment(self, start: int, end: int) -> str:
+        if start == end:
+            return "$%d" % start
+        return "$%d-%d" % (start, end)
 
     def get_url(self, git_object: typedefs.GitObject) -> str:
         if git_object.is_commit_hash():
             return self.commit_hash_url(git_object)
+        if git_object.is_commit_range():
+            return self.compare_url(cast(typedefs.FocusRange, git_object))
         if git_object.is_root():
             return self.root_url(git_object)
-        return self.file_url(git_object)
+        host, path = self.get_project(git_object.identifier)
+        if host is self:
+            return self.file_url(git_object)
+        if not path:
+            return host.root_url(typedefs.FocusObject.default())
+        return host.file_url(typedefs.FocusObject(path))
 
     def commit_hash_url(self, focus_hash: typedefs.GitObject) -> str:
         repository_url = "%s/r%s%s" % (
@@ -89,6 +181,16 @@ class PhabricatorHost(typedefs.Host):
         )
         return repository_url
 
+    def compare_url(self, focus_range: typedefs.FocusRange) -> str:
+        # Diffusion compares from the merge base
+        repository_url = "%s/diffusion/%s/compare/?head=%s&against=%s" % (
+            self.phabricator_url,
+            self.repository_callsign,
+            focus_range.end,
+            focus_range.start,
+        )
+        return repository_url
+
     def root_url(self, focus_object: typedefs.GitObject) -> str:
         repository_url = "%s/diffusion/%s/repository/%s/" % (
             self.phabricator_url,
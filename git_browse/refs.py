@@ -0,0 +1,321 @@
+"""
+Native ref resolution from HEAD, loose refs and packed-refs, so that
+branches and tags can be resolved without spawning git
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import string
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import mmap
+
+    from git_browse import context
+
+
+# Same limit as git for chains of symbolic refs and nested tags
+MAX_SYMREF_DEPTH = 5
+HASH_LENGTHS = [40, 64]
+HEX_DIGITS = set(string.hexdigits.lower())
+PACKED_REFS_HEADER = b"# pack-refs with:"
+# The order git tries when expanding a short ref name
+DWIM_RULES = [
+    "refs/%s",
+    "refs/tags/%s",
+    "refs/heads/%s",
+    "refs/remotes/%s",
+    "refs/remotes/%s/HEAD",
+]
+# Refs that only ever point at commits, along with pseudo refs like HEAD
+COMMIT_REF_PREFIXES = ("refs/heads/", "refs/remotes/")
+# Refs that live in each worktree's git directory rather than the common one
+PER_WORKTREE_PREFIXES = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+INVALID_NAME_SEQUENCES = ["..", "@{", "//", "/.", ".lock/"]
+INVALID_NAME_CHARACTERS = set(" ~^:?*[\\\x7f")
+
+
+class RefValue(NamedTuple):
+    object_hash: str
+    # The commit a tag points to, if known without reading objects
+    peeled: Optional[str]
+
+
+def is_hash(value: str) -> bool:
+    return len(value) in HASH_LENGTHS and set(value) <= HEX_DIGITS
+
+
+def is_valid_name(name: str) -> bool:
+    """Roughly git's check-ref-format, rejecting revision syntax"""
+    if not name or name.startswith(("/", ".", "-")) or name.endswith(
+        ("/", ".", ".lock"),
+    ):
+        return False
+    if any(sequence in name for sequence in INVALID_NAME_SEQUENCES):
+        return False
+    return not any(
+        char in INVALID_NAME_CHARACTERS or ord(char) < 32 for char in name
+    )
+
+
+def is_pseudo_ref(name: str) -> bool:
+    """HEAD, FETCH_HEAD, ORIG_HEAD and friends"""
+    return name.endswith("HEAD") and all(
+        char.isupper() or char == "_" for char in name
+    )
+
+
+class PackedRefs(object):
+    """
+    Looks up refs in a packed-refs file by binary search over an mmap, so a
+    lookup reads a handful of pages no matter how many refs are packed
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.stat_key: Optional[tuple[int, int, int]] = None
+        self.data: Optional[mmap.mmap] = None
+        self.start = 0
+        self.sorted = False
+        self.fully_peeled = False
+        self.tags_peeled = False
+        self.unsorted_refs: Optional[dict[bytes, RefValue]] = None
+        import threading  # noqa: PLC0415
+
+        # Remapping must not close the mmap under another thread's lookup
+        self.lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """Remap the file when git has rewritten it since the last lookup"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._close()
+            return
+        stat_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stat_key == self.stat_key:
+            return
+        self._close()
+        self.stat_key = stat_key
+        if not stat.st_size:
+            return
+        import mmap  # noqa: PLC0415
+
+        with open(self.path, "rb") as handle:
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.start = 0
+        traits: list[bytes] = []
+        if self.data[:len(PACKED_REFS_HEADER)] == PACKED_REFS_HEADER:
+            end = self._line_end(0)
+            traits = self.data[len(PACKED_REFS_HEADER):end].split()
+            self.start = end + 1
+        self.sorted = b"sorted" in traits
+        self.fully_peeled = b"fully-peeled" in traits
+        self.tags_peeled = self.fully_peeled or b"peeled" in traits
+
+    def _line_end(self, position: int) -> int:
+        assert self.data is not None
+        end = self.data.find(b"\n", position)
+        return len(self.data) if end == -1 else end
+
+    def _read_value(self, position: int, end: int) -> RefValue:
+        assert self.data is not None
+        object_hash = self.data[position:self.data.find(b" ", position, end)]
+        name = self.data[position + len(object_hash) + 1:end]
+        peeled = None
+        if self.data[end + 1:end + 2] == b"^":
+            peeled_end = self._line_end(end + 1)
+            peeled = self.data[end + 2:peeled_end].strip().decode()
+        elif self.fully_peeled or (
+            self.tags_peeled and name.startswith(b"refs/tags/")
+        ):
+            # git recorded that this ref does not point at a tag object
+            peeled = object_hash.decode()
+        return RefValue(object_hash.decode(), peeled)
+
+    def _next_record(self, end: int) -> int:
+        """Return the start of the record after the line ending at end"""
+        assert self.data is not None
+        if self.data[end + 1:end + 2] == b"^":
+            return self._line_end(end + 1) + 1
+        return end + 1
+
+    def lookup(self, name: str) -> Optional[RefValue]:
+        with self.lock:
+            return self._lookup(name)
+
+    def _lookup(self, name: str) -> Optional[RefValue]:
+        self._refresh()
+        if self.data is None:
+            return None
+        target = name.encode()
+        if not self.sorted:
+            return self._lookup_unsorted(target)
+        data = self.data
+        low, high = self.start, len(data)
+        while low < high:
+            # Back up to the start of the line containing the midpoint; rfind
+            # returns -1 when low itself is that line's start
+            position = data.rfind(b"\n", low, (low + high) // 2) + 1 or low
+            if data[position:position + 1] == b"^" and position > low:
+                # A peeled "^" line belongs to the record before it
+                position = data.rfind(b"\n", low, position - 1) + 1 or low
+            end = data.find(b"\n", position)
+            if end == -1:
+                end = len(data)
+            record_name = data[data.find(b" ", position, end) + 1:end]
+            if record_name == target:
+                return self._read_value(position, end)
+            if record_name < target:
+                low = self._next_record(end)
+            else:
+                high = position
+        return None
+
+    def _lookup_unsorted(self, target: bytes) -> Optional[RefValue]:
+        """Files without the sorted trait are indexed once with a scan"""
+        assert self.data is not None
+        if self.unsorted_refs is None:
+            self.unsorted_refs = {}
+            position = self.start
+            while position < len(self.data):
+                if self.data[position:position + 1] in [b"#", b"^"]:
+                    position = self._line_end(position) + 1
+                    continue
+                end = self._line_end(position)
+                value = self._read_value(position, end)
+                record_name = self.data[
+                    position + len(value.object_hash) + 1:end
+                ].rstrip(b"\r")
+                self.unsorted_refs[record_name] = value
+                position = self._next_record(end)
+        return self.unsorted_refs.get(target)
+
+    def close(self) -> None:
+        with self.lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.stat_key = None
+        self.unsorted_refs = None
+
+
+class RefStore(object):
+    """
+    Resolves ref names to commit hashes the way git does, reading loose refs
+    before packed ones.  Returns None whenever the answer would need an
+    object that is not a loose object, so callers can fall back to git.
+    """
+
+    def __init__(
+        self, git_directory: pathlib.Path, common_directory: pathlib.Path,
+    ) -> None:
+        self.git_directory = git_directory
+        self.common_directory = common_directory
+        self.packed_refs = PackedRefs(common_directory / "packed-refs")
+
+    @staticmethod
+    def from_context(
+        repository_context: context.RepositoryContext,
+    ) -> RefStore:
+        return RefStore(
+            repository_context.git_directory,
+            repository_context.common_directory,
+        )
+
+    def ref_path(self, name: str) -> pathlib.Path:
+        if is_pseudo_ref(name) or name.startswith(PER_WORKTREE_PREFIXES):
+            return self.git_directory / name
+        return self.common_directory / name
+
+    def read_ref(self, name: str, depth: int = 0) -> Optional[RefValue]:
+        """Read a full ref name, following symbolic refs"""
+        try:
+            with open(self.ref_path(name), "r") as handle:
+                data = handle.read()
+        except OSError:
+            # Missing, or a directory of refs with this name as a prefix
+            if name.startswith("refs/"):
+                return self.packed_refs.lookup(name)
+            return None
+        if data.startswith("ref:"):
+            if depth >= MAX_SYMREF_DEPTH:
+                return None
+            return self.read_ref(data[4:].strip(), depth + 1)
+        fields = data.split(None, 1)
+        if not fields or not is_hash(fields[0]):
+            return None
+        return RefValue(fields[0], None)
+
+    def read_symref(self, name: str) -> Optional[str]:
+        """Return the ref a symbolic ref points to"""
+        try:
+            with open(self.ref_path(name), "r") as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        if not data.startswith("ref:"):
+            return None
+        return data[4:].strip()
+
+    def remote_head(self, remote: str = "origin") -> Optional[str]:
+        """The default branch of a remote, as recorded by clone or set-head"""
+        prefix = "refs/remotes/%s/" % remote
+        target = self.read_symref(prefix + "HEAD")
+        if target is None or not target.startswith(prefix):
+            return None
+        return target[len(prefix):]
+
+    def resolve(self, identifier: str) -> Optional[str]:
+        """Resolve a ref name, full or abbreviated, to a commit hash"""
+        if identifier == "@":
+            identifier = "HEAD"
+        if is_hash(identifier) or not is_valid_name(identifier):
+            return None
+        candidates = [rule % identifier for rule in DWIM_RULES]
+        if identifier.startswith("refs/") or is_pseudo_ref(identifier):
+            candidates.insert(0, identifier)
+        for candidate in candidates:
+            value = self.read_ref(candidate)
+            if value is None:
+                continue
+            if value.peeled:
+                return value.peeled
+            if is_pseudo_ref(candidate) or candidate.startswith(
+                COMMIT_REF_PREFIXES,
+            ):
+                return value.object_hash
+            return self.peel_loose_object(value.object_hash)
+        return None
+
+    def peel_loose_object(self, object_hash: str, depth: int = 0) -> Optional[str]:
+        """Follow tag objects to a commit, if they are stored loose"""
+        import zlib  # noqa: PLC0415
+
+        path = self.common_directory.joinpath(
+            "objects", object_hash[:2], object_hash[2:],
+        )
+        try:
+            with open(path, "rb") as handle:
+                compressed = handle.read(4096)
+            data = zlib.decompressobj().decompress(compressed, 4096)
+        except (OSError, zlib.error):
+            return None
+        header, _, body = data.partition(b"\0")
+        object_type = header.split(b" ", 1)[0]
+        if object_type == b"commit":
+            return object_hash
+        if object_type != b"tag" or depth >= MAX_SYMREF_DEPTH:
+            return None
+        first_line = body.split(b"\n", 1)[0].decode(errors="replace")
+        if not first_line.startswith("object "):
+            return None
+        return self.peel_loose_object(first_line[7:].strip(), depth + 1)
+
+    def close(self) -> None:
+        self.packed_refs.close()
@@ -0,0 +1,87 @@
+import pathlib
+from typing import Optional
+
+from git_browse import browse, cache, catfile, context, gitconfig, typedefs
+
+
+def get_watched_paths(
+    repository_context: context.RepositoryContext,
+) -> list[pathlib.Path]:
+    """The files whose changes make a repository's hosts and config stale"""
+    common_directory = repository_context.common_directory
+    return [
+        browse.get_git_config_path(repository_context),
+        repository_context.git_directory / "config.worktree",
+        repository_context.git_directory / "HEAD",
+        common_directory / "packed-refs",
+        common_directory / "refs" / "remotes" / "origin" / "HEAD",
+        repository_context.worktree_root / ".arcconfig",
+        *gitconfig.get_user_config_paths(),
+    ]
+
+
+class WarmRepository(object):
+    """Hosts and a commit resolver for one repository, kept between requests"""
+
+    def __init__(self, repository_context: context.RepositoryContext) -> None:
+        self.context = repository_context
+        repository_root = repository_context.worktree_root
+        self.watched_paths = get_watched_paths(repository_context)
+        self.fingerprint = cache.stat_fingerprint(self.watched_paths)
+        self.hosts: dict[tuple[bool, bool], typedefs.Host] = {}
+        self.resolver = catfile.CommitResolver(repository_root)
+
+    def is_stale(self) -> bool:
+        return cache.stat_fingerprint(self.watched_paths) != self.fingerprint
+
+    def get_host(self, use_sourcegraph: bool, use_godocs: bool) -> typedefs.Host:
+        key = (use_sourcegraph, use_godocs)
+        if key not in self.hosts or self.hosts[key].is_stale():
+            self.hosts[key] = browse.get_repository_host(
+                use_sourcegraph, use_godocs, self.context,
+            )
+        return self.hosts[key]
+
+    def close(self, release_shared: bool = True) -> None:
+        self.resolver.close()
+        # Drop the shared per-repository state, such as the host table
+        browse.release_repository(self.context, release_shared)
+
+
+class WarmRepositoryPool(object):
+    """Warm repositories keyed by root, rebuilt when their files change"""
+
+    def __init__(self) -> None:
+        self.repositories: dict[pathlib.Path, WarmRepository] = {}
+
+    def get(self, directory: pathlib.Path) -> WarmRepository:
+        """Return the warm repository containing directory"""
+        repository_context = context.RepositoryContext.discover(directory)
+        repository_root = repository_context.worktree_root
+        repository = self.repositories.get(repository_root)
+        if repository is not None and repository.is_stale():
+            self.invalidate(repository_root)
+            repository = None
+        if repository is None:
+            repository = WarmRepository(repository_context)
+            self.repositories[repository_root] = repository
+        return repository
+
+    def invalidate(self, repository_root: Optional[pathlib.Path] = None) -> None:
+        if repository_root is None:
+            roots = list(self.repositories)
+        else:
+            roots = [repository_root]
+        for root in roots:
+            repository = self.repositories.pop(root, None)
+            if repository is None:
+                continue
+            # Other warm worktrees of the same clone keep the object store
+            common_directory = repository.context.common_directory
+            repository.close(not any(
+                other.context.common_directory == common_directory
+                for other in self.repositories.values()
+            ))
+
+    def close(self) -> None:
+        self.invalidate()
@@ -0,0 +1,170 @@
+"""
+A library api for resolving urls from long running processes.  A Resolver
+holds everything the command line re-reads on each run: the repository
+context, parsed config, hosts, and git processes.
+
+    with git_browse.Resolver("/path/to/checkout") as resolver:
+        resolver.resolve("README.md")
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Union
+
+from git_browse import browse, cache, context, gitconfig, repository, typedefs
+
+if TYPE_CHECKING:  # pragma: no cover
+    from git_browse import catfile
+
+
+class TargetResult(NamedTuple):
+    target: str
+    url: Optional[str]
+    error: Optional[str]
+
+
+class Resolver(object):
+    """
+    Resolves targets in one repository to urls.  Hosts are created once per
+    remote url, and dropped when the repository's config or refs change; git
+    processes are kept running until the resolver is closed.  A resolver is
+    not safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, os.PathLike[str]]] = None,
+        use_sourcegraph: bool = False,
+        godocs: bool = False,
+    ) -> None:
+        if directory is None:
+            directory = pathlib.Path.cwd()
+        self.directory = pathlib.Path(os.path.abspath(directory))
+        self.context = context.RepositoryContext.discover(self.directory)
+        self.use_sourcegraph = use_sourcegraph
+        self.godocs = godocs
+        # Keyed by remote url, with None for the remote git-browse defaults to
+        self.hosts: dict[Optional[str], typedefs.Host] = {}
+        self.remote_config: Optional[gitconfig.RemoteConfig] = None
+        self.commit_resolver: Optional[catfile.CommitResolver] = None
+        self.watched_paths = repository.get_watched_paths(self.context)
+        self.fingerprint = cache.stat_fingerprint(self.watched_paths)
+
+    def __enter__(self) -> Resolver:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def refresh(self) -> None:
+        """Forget the parsed config and hosts if their files have changed"""
+        fingerprint = cache.stat_fingerprint(self.watched_paths)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.remote_config = None
+            self.hosts = {}
+
+    def get_remote_config(self) -> gitconfig.RemoteConfig:
+        self.refresh()
+        if self.remote_config is None:
+            try:
+                self.remote_config = gitconfig.read_remote_config(
+                    browse.get_git_config_path(self.context),
+                    self.context.git_directory,
+                )
+            except ValueError as err:
+                raise RuntimeError("git config file not parseable") from err
+        return self.remote_config
+
+    def get_host(self, remote: Optional[str] = None) -> typedefs.Host:
+        """The host of a remote, by default the one the command line uses"""
+        self.refresh()
+        if remote is None:
+            if None not in self.hosts or self.hosts[None].is_stale():
+                self.hosts[None] = browse.get_repository_host(
+                    self.use_sourcegraph, self.godocs, self.context,
+                )
+            return self.hosts[None]
+        remote_config = self.get_remote_config()
+        if remote not in remote_config.urls:
+            raise ValueError("remote not found: %s" % remote)
+        git_url = remote_config.urls[remote]
+        if git_url not in self.hosts or self.hosts[git_url].is_stale():
+            ref_store = browse.get_ref_store(self.context)
+            git_config = typedefs.GitConfig(
+                git_url,
+                ref_store.remote_head(remote) or browse.get_default_branch(
+                    remote_config.branches,
+                ),
+            )
+            git_config.repository_root = self.context.worktree_root
+            self.hosts[git_url] = browse.parse_git_url(
+                git_config,
+                self.use_sourcegraph,
+                self.godocs,
+                browse.get_host_table(self.context),
+            )
+        return self.hosts[git_url]
+
+    def get_commit_resolver(self) -> catfile.CommitResolver:
+        if self.commit_resolver is None:
+            from git_browse import catfile  # noqa: PLC0415
+
+            self.commit_resolver = catfile.CommitResolver(
+                self.context.worktree_root,
+            )
+        return self.commit_resolver
+
+    def resolve(
+        self,
+        target: str = "",
+        path: Optional[Union[str, os.PathLike[str]]] = None,
+        remote: Optional[str] = None,
+    ) -> str:
+        """
+        Return the url of a file, directory, or commit-ish.  Relative targets
+        are resolved against path, which is itself relative to the directory
+        the resolver was created for.
+        """
+        host = self.get_host(remote)
+        directory = self.directory.joinpath(path or "")
+        if remote is None:
+            git_object = browse.get_git_object(
+                target,
+                directory,
+                host,
+                self.get_commit_resolver(),
+                self.context,
+            )
+        else:
+            git_object = browse.get_remote_git_object(
+                remote, target, directory, host, self.context,
+            )
+        return host.get_url(git_object)
+
+    def resolve_many(
+        self,
+        targets: Iterable[str],
+        path: Optional[Union[str, os.PathLike[str]]] = None,
+        remote: Optional[str] = None,
+    ) -> list[TargetResult]:
+        """Resolve each target, reporting failures rather than raising them"""
+        results = []
+        for target in targets:
+            try:
+                url = self.resolve(target, path, remote)
+            except (
+                FileNotFoundError, NotImplementedError, RuntimeError, ValueError,
+            ) as err:
+                results.append(TargetResult(target, None, str(err)))
+                continue
+            results.append(TargetResult(target, url, None))
+        return results
+
+    def close(self) -> None:
+        if self.commit_resolver is not None:
+            self.commit_resolver.close()
+            self.commit_resolver = None
+        browse.release_repository(self.context)
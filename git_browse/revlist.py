@@ -0,0 +1,69 @@
+"""
+The url of every commit in a range, streamed from a single `git rev-list`
+so that memory stays constant however many commits the range holds
+"""
+
+from json import encoder
+import pathlib
+import subprocess
+from typing import BinaryIO, Iterator
+
+from git_browse import trace, typedefs
+
+
+# Lines are encoded and written in batches rather than one at a time
+WRITE_BATCH_SIZE = 1024
+encode_string = encoder.encode_basestring_ascii
+
+
+def iter_commits(
+    directory: pathlib.Path, focus_range: typedefs.FocusRange,
+) -> Iterator[str]:
+    """Yield the hash of each commit in a range, newest first"""
+    with trace.span("git rev-list", trace.SUBPROCESS):
+        process = subprocess.Popen(
+            ["git", "rev-list", focus_range.identifier, "--"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=directory,
+        )
+        assert process.stdout and process.stderr
+        try:
+            for line in process.stdout:
+                yield line.rstrip().decode("ascii")
+        finally:
+            process.stdout.close()
+            error = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            if process.wait() and error:
+                raise RuntimeError(error)
+
+
+def write_commit_urls(
+    host: typedefs.Host,
+    commits: Iterator[str],
+    output: BinaryIO,
+    as_json: bool = False,
+) -> int:
+    """Write the url of each commit, one per line, returning the count"""
+    count = 0
+    lines: list[str] = []
+    for commit in commits:
+        url = host.get_url(typedefs.FocusHash(commit))
+        if as_json:
+            lines.append('{"commit": "%s", "url": %s}' % (
+                commit, encode_string(url),
+            ))
+        else:
+            lines.append(url)
+        count += 1
+        if len(lines) >= WRITE_BATCH_SIZE:
+            output.write(encode_lines(lines))
+            lines = []
+    if lines:
+        output.write(encode_lines(lines))
+    return count
+
+
+def encode_lines(lines: list[str]) -> bytes:
+    return ("\n".join(lines) + "\n").encode("utf-8")
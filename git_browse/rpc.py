@@ -0,0 +1,177 @@
+import json
+import pathlib
+from typing import Any, Optional, TextIO
+
+from git_browse import browse, context, repository
+
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+RESOLVE_ERROR = -32000
+MODES = {
+    "default": (False, False),
+    "sourcegraph": (True, False),
+    "godocs": (False, True),
+}
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class StdioServer(object):
+    """
+    Line-delimited JSON-RPC 2.0 server for editor integrations.  Each
+    workspace keeps its hosts and git processes warm for the session.
+    """
+
+    def __init__(self) -> None:
+        # Relative paths are resolved against where the server was started
+        self.cwd = pathlib.Path.cwd()
+        self.pool = repository.WarmRepositoryPool()
+        self.methods = {
+            "resolve": self.resolve,
+            "resolveMany": self.resolve_many,
+            "invalidate": self.invalidate,
+        }
+
+    def serve(self, stdin: TextIO, stdout: TextIO) -> None:
+        try:
+            for line in stdin:
+                if not line.strip():
+                    continue
+                response = self.handle(line)
+                if response is not None:
+                    stdout.write(json.dumps(response) + "\n")
+                    stdout.flush()
+        finally:
+            self.pool.close()
+
+    def handle(self, line: str) -> Optional[dict[str, Any]]:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return error_response(None, PARSE_ERROR, "Parse error")
+        if not isinstance(message, dict) or "method" not in message:
+            return error_response(None, INVALID_REQUEST, "Invalid Request")
+        message_id = message.get("id")
+        params = message.get("params", {})
+        try:
+            method_name = message["method"]
+            if not isinstance(method_name, str):
+                raise RPCError(INVALID_REQUEST, "Invalid Request")
+            method = self.methods.get(method_name)
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, "Method not found")
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params must be an object")
+            result = method(params)
+        except RPCError as err:
+            response = error_response(message_id, err.code, err.message)
+        except Exception as err:
+            # A bug in one request must not end the session
+            response = error_response(
+                message_id, INTERNAL_ERROR, "Internal error: %s" % err,
+            )
+        else:
+            response = {"jsonrpc": "2.0", "id": message_id, "result": result}
+        if "id" not in message:
+            # Notifications are never answered
+            return None
+        return response
+
+    def resolve(self, params: dict[str, Any]) -> dict[str, str]:
+        path = params.get("path")
+        if not isinstance(path, str):
+            raise RPCError(INVALID_PARAMS, "path must be a string")
+        mode = params.get("mode") or "default"
+        if not isinstance(mode, str):
+            raise RPCError(INVALID_PARAMS, "mode must be a string")
+        if mode not in MODES:
+            raise RPCError(INVALID_PARAMS, "unknown mode: %s" % mode)
+        line_range = parse_line_range(params.get("line_range"))
+        target = self.cwd.joinpath(path)
+        directory = target if target.is_dir() else target.parent
+        try:
+            warm_repository = self.pool.get(directory)
+            host = warm_repository.get_host(*MODES[mode])
+            git_object = browse.get_git_object(
+                path,
+                self.cwd,
+                host,
+                warm_repository.resolver,
+                warm_repository.context,
+            )
+            url = host.get_url(git_object)
+        except (
+            FileNotFoundError, NotImplementedError, RuntimeError, ValueError,
+        ) as err:
+            raise RPCError(RESOLVE_ERROR, str(err)) from err
+        kind = browse.get_object_kind(git_object)
+        if line_range and kind == "file":
+            url += host.line_fragment(*line_range)
+        return {"url": url, "kind": kind}
+
+    def resolve_many(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        items = params.get("items")
+        if not isinstance(items, list):
+            raise RPCError(INVALID_PARAMS, "items must be a list")
+        results: list[dict[str, Any]] = []
+        for item in items:
+            try:
+                if not isinstance(item, dict):
+                    raise RPCError(INVALID_PARAMS, "item must be an object")
+                results.append(self.resolve(item))
+            except RPCError as err:
+                results.append({
+                    "error": {"code": err.code, "message": err.message},
+                })
+        return results
+
+    def invalidate(self, params: dict[str, Any]) -> None:
+        path = params.get("path")
+        if path is None:
+            self.pool.invalidate()
+            return
+        if not isinstance(path, str):
+            raise RPCError(INVALID_PARAMS, "path must be a string")
+        target = self.cwd.joinpath(path)
+        directory = target if target.is_dir() else target.parent
+        try:
+            repository_context = context.RepositoryContext.discover(directory)
+            self.pool.invalidate(repository_context.worktree_root)
+        except FileNotFoundError:
+            pass
+
+
+def parse_line_range(line_range: object) -> Optional[tuple[int, int]]:
+    if line_range is None:
+        return None
+    if (
+        not isinstance(line_range, list)
+        or len(line_range) not in [1, 2]
+        or not all(isinstance(line, int) for line in line_range)
+    ):
+        raise RPCError(
+            INVALID_PARAMS, "line_range must be [start] or [start, end]",
+        )
+    start, end = line_range[0], line_range[-1]
+    if start < 1 or end < start:
+        raise RPCError(INVALID_PARAMS, "line_range is out of order")
+    return start, end
+
+
+def error_response(
+    message_id: object, code: int, message: str,
+) -> dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": message_id,
+        "error": {"code": code, "message": message},
+    }
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, cast
 
 from git_browse import github, phabricator, typedefs
 
@@ -39,6 +39,11 @@ class SourcegraphHost(typedefs.Host):
     def set_host_class(self, host_class: type[typedefs.Host]) -> None:
         self.host_class = host_class
 
+    def line_fragment(self, start: int, end: int) -> str:
+        if start == end:
+            return "?L%d" % start
+        return "?L%d-%d" % (start, end)
+
     def get_url(self, git_object: typedefs.GitObject) -> str:
         if self.host_class in [github.UberGithubHost, phabricator.PhabricatorHost]:
             repository_url = "%s%s/%s" % (
@@ -54,6 +59,10 @@ class SourcegraphHost(typedefs.Host):
             )
         if git_object.is_commit_hash():
             return self.commit_hash_url(repository_url, git_object)
+        if git_object.is_commit_range():
+            return self.compare_url(
+                repository_url, cast(typedefs.FocusRange, git_object),
+            )
         if git_object.is_root():
             return repository_url
         if git_object.is_directory():
@@ -69,6 +78,15 @@ class SourcegraphHost(typedefs.Host):
         )
         return repository_url
 
+    def compare_url(
+        self, repository_url: str, focus_range: typedefs.FocusRange,
+    ) -> str:
+        repository_url = "%s/-/compare/%s" % (
+            repository_url,
+            focus_range.identifier,
+        )
+        return repository_url
+
     def directory_url(
         self, repository_url: str, focus_object: typedefs.GitObject,
     ) -> str:
@@ -0,0 +1,52 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+from git_browse.benchmarks import runner
+
+
+class TestBenchmarks(unittest.TestCase):
+    original_directory: pathlib.Path
+    temp_dir: tempfile.TemporaryDirectory[str]
+    results: list[runner.Result]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.original_directory = pathlib.Path.cwd()
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.results = runner.run_benchmarks(
+            pathlib.Path(cls.temp_dir.name), ["simple"], 2,
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temp_dir.cleanup()
+
+    def test_run(self) -> None:
+        self.assertEqual(pathlib.Path.cwd(), self.original_directory)
+        stages = {result.stage for result in self.results}
+        self.assertIn("get_repository_root", stages)
+        self.assertIn("get_commit_hash", stages)
+        self.assertIn("end_to_end", stages)
+        hosts = {result.host for result in self.results}
+        self.assertEqual(hosts - {""}, set(runner.HOST_CONFIGS))
+        for result in self.results:
+            self.assertEqual(result.error, "", result)
+            self.assertGreater(result.median_us, 0)
+
+    def test_dump_load(self) -> None:
+        loaded = runner.load_results(runner.dump_results(self.results))
+        self.assertEqual(loaded, self.results)
+
+    def test_format(self) -> None:
+        output = runner.format_results(self.results)
+        self.assertEqual(len(output.splitlines()), len(self.results) + 1)
+        comparison = runner.compare_results(self.results, self.results)
+        self.assertIn("1.00x", comparison)
+
+    def test_time_stage_error(self) -> None:
+        result = runner.time_stage(
+            "fixture", "stage", "", lambda: os.stat("/asdf/asdf"), 1,
+        )
+        self.assertIn("FileNotFoundError", result.error)
@@ -26,6 +26,13 @@ class TestBitbucketHost(unittest.TestCase):
         url = self.host.get_url(self.focus_object)
         self.assertEqual(url, self.repository_url)
 
+    def test_get_url_compare(self) -> None:
+        focus_range = typedefs.FocusRange("abcd", "..", "bcde")
+        self.assertEqual(
+            self.host.get_url(focus_range),
+            self.repository_url + "/branches/compare/bcde%0Dabcd",
+        )
+
     def test_root_url(self) -> None:
         url = self.host.root_url(self.repository_url, self.focus_object)
         self.assertEqual(url, self.repository_url)
@@ -52,3 +59,7 @@ class TestBitbucketHost(unittest.TestCase):
             "https://bitbucket.org/albertyw/git-browse/commits/%s"
             % test_util.get_tag(),
         )
+
+    def test_line_fragment(self) -> None:
+        self.assertEqual(self.host.line_fragment(3, 3), "#lines-3")
+        self.assertEqual(self.host.line_fragment(3, 5), "#lines-3:5")
@@ -1,14 +1,27 @@
+from contextlib import ExitStack
+import gzip
+import io
+import json
 import os
 import pathlib
 import re
 import shutil
 import sys
 import tempfile
-from typing import cast
+import threading
+from typing import Callable, cast
 import unittest
-from unittest.mock import MagicMock, patch
-
-from git_browse import browse, github, sourcegraph, typedefs
+from unittest.mock import ANY, MagicMock, patch
+
+from git_browse import (
+    browse,
+    context,
+    github,
+    sourcegraph,
+    trace,
+    typedefs,
+)
+from git_browse.benchmarks import fixtures
 from git_browse.tests import test_util
 
 BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
@@ -45,6 +58,37 @@ class GetGitConfigPath(unittest.TestCase):
         self.assertEqual(directory, expected)
         temp_dir.cleanup()
 
+    def test_worktree_get(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        root = pathlib.Path(temp_dir.name).resolve()
+        worktree_git = root / "main" / ".git" / "worktrees" / "feature"
+        os.makedirs(worktree_git)
+        with open(worktree_git / "commondir", "w") as handle:
+            handle.write("../..\n")
+        with open(root / "main" / ".git" / "config", "w") as handle:
+            handle.write(
+                "[extensions]\n"
+                "    worktreeConfig = true\n"
+                '[remote "origin"]\n'
+                "    url = git@github.com:albertyw/git-browse\n",
+            )
+        with open(worktree_git / "config.worktree", "w") as handle:
+            handle.write('[branch "feature"]\n')
+        os.makedirs(root / "feature")
+        with open(root / "feature" / ".git", "w") as handle:
+            handle.write("gitdir: ../main/.git/worktrees/feature\n")
+        os.chdir(root / "feature")
+        directory = browse.get_git_config_path()
+        self.assertEqual(directory.resolve(), root / "main" / ".git" / "config")
+        host = browse.get_repository_host()
+        self.assertEqual(host.get_url(typedefs.FocusObject.default()), (
+            "https://github.com/albertyw/git-browse"
+        ))
+        assert isinstance(host, github.GithubHost)
+        self.assertEqual(host.git_config.default_branch, "feature")
+        os.chdir(BASE_DIRECTORY)
+        temp_dir.cleanup()
+
 
 class GetGitConfigData(unittest.TestCase):
     def setUp(self) -> None:
@@ -184,6 +228,61 @@ class TestGetFocusObject(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             browse.get_git_object("asdf", pathlib.Path.cwd(), self.host)
 
+    def test_indexed_focus_object(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = fixtures.create_repository(
+                pathlib.Path(temp_dir) / "repository",
+            )
+            repository_context = context.RepositoryContext.discover(repository)
+            # Tracked, but missing from the working tree like a sparse file
+            os.remove(repository / "directory" / "file")
+            os.rmdir(repository / "directory")
+            for target, expected in [
+                ("directory", "directory" + os.sep),
+                ("directory/file", "directory" + os.sep + "file"),
+            ]:
+                focus_object = browse.get_git_object(
+                    target,
+                    repository,
+                    self.host,
+                    repository_context=repository_context,
+                )
+                self.assertEqual(focus_object.identifier, expected)
+            browse.INDEXES.pop(repository_context.git_directory).close()
+
+    def test_untracked_focus_object(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = fixtures.create_repository(
+                pathlib.Path(temp_dir) / "repository",
+            )
+            repository_context = context.RepositoryContext.discover(repository)
+            with open(repository / "untracked", "w"):
+                pass
+            os.makedirs(repository / "empty")
+            for target in ["untracked", "empty", "directory/../untracked"]:
+                with self.assertRaises(FileNotFoundError) as error:
+                    browse.get_git_object(
+                        target,
+                        repository,
+                        self.host,
+                        repository_context=repository_context,
+                    )
+                self.assertIn("not tracked", str(error.exception))
+            focus_object = browse.get_git_object(
+                ".", repository, self.host, repository_context=repository_context,
+            )
+            self.assertTrue(focus_object.is_directory())
+            # Without a readable index, the working tree is trusted
+            os.remove(repository / ".git" / "index")
+            focus_object = browse.get_git_object(
+                "untracked",
+                repository,
+                self.host,
+                repository_context=repository_context,
+            )
+            self.assertEqual(focus_object.identifier, "untracked")
+            browse.release_repository(repository_context)
+
 
 class TestGetCommitHash(unittest.TestCase):
     def test_get_unknown_hash(self) -> None:
@@ -197,15 +296,413 @@ class TestGetCommitHash(unittest.TestCase):
         focus_hash = cast(typedefs.FocusHash, focus_hash)
         self.assertTrue(focus_hash.identifier)
 
+    def test_get_native_hash(self) -> None:
+        repository_context = context.RepositoryContext.discover(BASE_DIRECTORY)
+        commit_hash = test_util.get_tag_commit_hash()
+        for identifier in [
+            test_util.get_tag(), commit_hash[:7], commit_hash[:9].upper(),
+        ]:
+            focus_hash = browse.get_commit_hash(
+                identifier, repository_context=repository_context,
+            )
+            assert focus_hash
+            self.assertEqual(focus_hash.identifier, commit_hash)
+
+
+class TestGetCommitRange(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        for message in ["second", "third"]:
+            fixtures.git(
+                self.repository, "commit", "--allow-empty", "-m", message,
+            )
+        self.repository_context = context.RepositoryContext.discover(
+            self.repository,
+        )
+        self.head = fixtures.git(self.repository, "rev-parse", "HEAD").strip()
+        self.tag = fixtures.git(
+            self.repository, "rev-parse", fixtures.TAG + "^{commit}",
+        ).strip()
+
+    def tearDown(self) -> None:
+        browse.release_repository(self.repository_context)
+        self.temp_dir.cleanup()
+
+    def test_is_commit_range(self) -> None:
+        for identifier in ["a..b", "a...b", "..b", "a..", "HEAD~3..origin/a"]:
+            self.assertTrue(browse.is_commit_range(identifier), identifier)
+        for identifier in ["a", "..", "../a", "a/../b", "a/...", "a.b"]:
+            self.assertFalse(browse.is_commit_range(identifier), identifier)
+
+    def test_get_commit_range(self) -> None:
+        focus_range = browse.get_commit_range(
+            fixtures.TAG + "..", repository_context=self.repository_context,
+        )
+        self.assertEqual(focus_range.start, self.tag)
+        self.assertEqual(focus_range.end, self.head)
+        self.assertFalse(focus_range.is_merge_base())
+        focus_range = browse.get_commit_range(
+            "master~1..." + fixtures.TAG,
+            repository_context=self.repository_context,
+        )
+        self.assertTrue(focus_range.is_merge_base())
+        self.assertEqual(focus_range.end, self.tag)
+        with self.assertRaises(ValueError):
+            browse.get_commit_range(
+                "asdf..HEAD", repository_context=self.repository_context,
+            )
+
+    def test_get_git_object(self) -> None:
+        git_object = browse.get_git_object(
+            fixtures.TAG + "..HEAD",
+            self.repository,
+            MagicMock(),
+            repository_context=self.repository_context,
+        )
+        self.assertTrue(git_object.is_commit_range())
+        self.assertEqual(browse.get_object_kind(git_object), "range")
+        with self.assertRaises(FileNotFoundError):
+            browse.get_git_object(
+                "../asdf",
+                self.repository,
+                MagicMock(),
+                repository_context=self.repository_context,
+            )
+
 
+class TestResolveStream(unittest.TestCase):
+    def setUp(self) -> None:
+        os.chdir(BASE_DIRECTORY)
+        git_config = typedefs.GitConfig("", "master")
+        self.host = github.GithubHost(git_config, "albertyw", "git-browse")
+        self.repository_url = "https://github.com/albertyw/git-browse"
+
+    def test_urls(self) -> None:
+        output = io.StringIO()
+        failures = browse.resolve_stream(
+            ["README.md\n", "\n", "git_browse\n"],
+            BASE_DIRECTORY,
+            self.host,
+            output,
+        )
+        self.assertEqual(failures, 0)
+        expected = [
+            self.repository_url + "/blob/master/README.md",
+            self.repository_url + "/tree/master/git_browse/",
+        ]
+        self.assertEqual(output.getvalue().splitlines(), expected)
+
+    @patch("sys.stderr", new_callable=io.StringIO)
+    def test_error_inline(self, mock_stderr: io.StringIO) -> None:
+        output = io.StringIO()
+        failures = browse.resolve_stream(
+            ["asdf\n", "README.md\n"], BASE_DIRECTORY, self.host, output,
+        )
+        self.assertEqual(failures, 1)
+        self.assertEqual(
+            output.getvalue(), self.repository_url + "/blob/master/README.md\n",
+        )
+        self.assertIn("asdf", mock_stderr.getvalue())
+
+    def test_json(self) -> None:
+        output = io.StringIO()
+        failures = browse.resolve_stream(
+            ["README.md", "asdf"], BASE_DIRECTORY, self.host, output, True,
+        )
+        self.assertEqual(failures, 1)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(records[0]["target"], "README.md")
+        self.assertEqual(records[0]["kind"], "file")
+        self.assertEqual(
+            records[0]["url"], self.repository_url + "/blob/master/README.md",
+        )
+        self.assertEqual(records[1]["target"], "asdf")
+        self.assertIn("error", records[1])
+
+    def test_object_kind(self) -> None:
+        self.assertEqual(
+            browse.get_object_kind(typedefs.FocusObject.default()), "root",
+        )
+        self.assertEqual(
+            browse.get_object_kind(typedefs.FocusHash("abcd")), "commit",
+        )
+
+
+class TestResolveAllRemotes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        fixtures.git(
+            self.repository, "remote", "add", "upstream",
+            "https://gitlab.com/albertyw/git-browse",
+        )
+        fixtures.git(self.repository, "remote", "add", "broken", "asdf")
+        self.repository_context = context.RepositoryContext.discover(
+            self.repository,
+        )
+
+    def tearDown(self) -> None:
+        browse.release_repository(self.repository_context)
+        self.temp_dir.cleanup()
+
+    def resolve(self, focus_object: str) -> list[browse.RemoteResult]:
+        return browse.resolve_all_remotes(
+            focus_object,
+            self.repository,
+            repository_context=self.repository_context,
+        )
+
+    def test_resolve(self) -> None:
+        results = self.resolve("README.md")
+        self.assertEqual(
+            [result.remote for result in results],
+            ["origin", "upstream", "broken"],
+        )
+        self.assertEqual(results[0], browse.RemoteResult(
+            "origin",
+            "https://github.com/albertyw/git-browse/blob/master/README.md",
+            None,
+        ))
+        self.assertEqual(results[1], browse.RemoteResult(
+            "upstream",
+            "https://gitlab.com/albertyw/git-browse/-/blob/master/README.md",
+            None,
+        ))
+        self.assertIsNone(results[2].url)
+        self.assertIsNotNone(results[2].error)
+
+    def test_tracking_ref(self) -> None:
+        head = fixtures.git(self.repository, "rev-parse", "HEAD").strip()
+        fixtures.git(
+            self.repository, "update-ref", "refs/remotes/upstream/feature", head,
+        )
+        results = self.resolve("feature")
+        self.assertEqual(
+            results[1].url,
+            "https://gitlab.com/albertyw/git-browse/-/commit/%s" % head,
+        )
+        self.assertIsNotNone(results[0].error)
+
+    def test_configured_host(self) -> None:
+        fixtures.git(
+            self.repository, "remote", "add", "enterprise",
+            "git@git.example.com:group/git-browse.git",
+        )
+        fixtures.git(
+            self.repository, "config", "browse.host.git.example.com.type",
+            "gitlab",
+        )
+        results = self.resolve("README.md")
+        self.assertEqual(results[3], browse.RemoteResult(
+            "enterprise",
+            "https://git.example.com/group/git-browse/-/blob/master/README.md",
+            None,
+        ))
+        host = browse.get_repository_host(
+            repository_context=self.repository_context,
+        )
+        self.assertIsInstance(host, github.GithubHost)
+
+    def test_host_table_cached(self) -> None:
+        fixtures.git(
+            self.repository, "config", "browse.host.git.example.com.type",
+            "gitlab",
+        )
+        host_table = browse.get_host_table(self.repository_context)
+        browse.release_repository(self.repository_context)
+        # A new process reads the section back from the git directory
+        with patch("git_browse.gitconfig.read_config_section") as mock_read:
+            self.assertEqual(
+                browse.get_host_table(self.repository_context), host_table,
+            )
+            mock_read.assert_not_called()
+
+    def test_opener_cached(self) -> None:
+        fixtures.git(self.repository, "config", "browse.opener", "open")
+        self.assertEqual(
+            browse.get_configured_opener(self.repository_context), "open",
+        )
+        browse.release_repository(self.repository_context)
+        # A new process reads the section back from the git directory
+        with patch("git_browse.gitconfig.read_config_section") as mock_read:
+            self.assertEqual(
+                browse.get_configured_opener(self.repository_context), "open",
+            )
+            mock_read.assert_not_called()
+        fixtures.git(self.repository, "config", "browse.opener", "other")
+        self.assertEqual(
+            browse.get_configured_opener(self.repository_context), "other",
+        )
+
+    def test_host_table_reloaded(self) -> None:
+        fixtures.git(
+            self.repository, "remote", "set-url", "origin",
+            "git@git.example.com:group/git-browse.git",
+        )
+        with self.assertRaises(ValueError):
+            browse.get_repository_host(
+                repository_context=self.repository_context,
+            )
+        fixtures.git(
+            self.repository, "config", "browse.host.git.example.com.type",
+            "gitlab",
+        )
+        host = browse.get_repository_host(
+            repository_context=self.repository_context,
+        )
+        self.assertEqual(
+            host.get_url(typedefs.FocusObject.default()),
+            "https://git.example.com/group/git-browse",
+        )
+
+    def test_shared_state_created_up_front(self) -> None:
+        threads: dict[str, set[threading.Thread]] = {}
+
+        def record(name: str, getter: Callable[..., object]) -> MagicMock:
+            def call(*args: object) -> object:
+                threads.setdefault(name, set()).add(threading.current_thread())
+                return getter(*args)
+            return MagicMock(side_effect=call)
+
+        getters = [
+            "get_ref_store", "get_host_table", "get_index",
+            "get_object_store", "get_commit_resolver",
+        ]
+        with ExitStack() as stack:
+            for name in getters:
+                stack.enter_context(patch.object(
+                    browse, name, record(name, getattr(browse, name)),
+                ))
+            self.resolve("README.md")
+        for name in getters:
+            self.assertIn(threading.current_thread(), threads[name], name)
+
+    def test_no_remotes(self) -> None:
+        for remote in ["origin", "upstream", "broken"]:
+            fixtures.git(self.repository, "remote", "remove", remote)
+        with self.assertRaises(RuntimeError):
+            self.resolve("")
+
+
+class TestResolveRepositories(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = pathlib.Path(self.temp_dir.name)
+        for name in ["a", "b"]:
+            fixtures.create_repository(self.base / "checkouts" / name)
+        (self.base / "checkouts" / "c").mkdir()
+        with open(self.base / "checkouts" / "file", "w"):
+            pass
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_expand_repositories(self) -> None:
+        checkouts = self.base / "checkouts"
+        repositories = browse.expand_repositories([
+            str(checkouts / "*"), str(checkouts / "a"), str(self.base / "x*"),
+        ])
+        self.assertEqual(repositories, [
+            checkouts / "a", checkouts / "b", checkouts / "c", self.base / "x*",
+        ])
+
+    def test_resolve(self) -> None:
+        repositories = browse.expand_repositories([
+            str(self.base / "checkouts" / "*"),
+        ])
+        results = browse.resolve_repositories(
+            repositories, "README.md",
+        )
+        by_repository = {result.repository: result for result in results}
+        self.assertEqual(len(by_repository), 3)
+        for name in ["a", "b"]:
+            result = by_repository[str(self.base / "checkouts" / name)]
+            self.assertEqual(
+                result.url,
+                "https://github.com/albertyw/git-browse/blob/master/README.md",
+            )
+        result = by_repository[str(self.base / "checkouts" / "c")]
+        self.assertIsNone(result.url)
+        self.assertIsNotNone(result.error)
+        for repository in repositories:
+            self.assertNotIn(repository / ".git", browse.REF_STORES)
+
+    def test_not_a_checkout_inside_a_checkout(self) -> None:
+        directory = self.base / "checkouts" / "a" / "notrepo"
+        directory.mkdir()
+        result = browse.resolve_repository(directory, "README.md")
+        self.assertIsNone(result.url)
+        self.assertEqual(result.error, ".git/config file not found")
+
+    def test_shared_object_store(self) -> None:
+        checkout = self.base / "checkouts" / "a"
+        worktree = self.base / "worktree"
+        fixtures.git(checkout, "worktree", "add", "--quiet", str(worktree))
+        head = fixtures.git(checkout, "rev-parse", "HEAD").strip()
+        with patch.object(browse, "release_object_store") as release:
+            results = list(browse.resolve_repositories(
+                [checkout, worktree], head[:7],
+            ))
+        self.assertEqual([result.error for result in results], [None, None])
+        release.assert_called_once_with(checkout / ".git")
+        browse.OBJECT_STORES.pop(checkout / ".git").close()
+
+    def test_relative_path(self) -> None:
+        result = browse.resolve_repository(
+            self.base / "checkouts" / "a", "file", "directory",
+        )
+        self.assertEqual(
+            result.url,
+            "https://github.com/albertyw/git-browse/blob/master/directory/file",
+        )
+        result = browse.resolve_repository(
+            self.base / "checkouts" / "a", fixtures.TAG,
+        )
+        assert result.url
+        self.assertIn("/commit/", result.url)
+
+
+@patch("git_browse.opener.get_launcher", MagicMock(return_value=None))
+@patch("git_browse.browse.get_configured_opener", MagicMock(return_value=None))
 class TestOpenURL(unittest.TestCase):
     @patch("builtins.print", autospec=True)
     @patch("webbrowser.open")
     def test_open_url(self, mock_print: MagicMock, mock_open: MagicMock) -> None:
-        browse.open_url("asdf")
+        browse.open_url("asdf", wait=True)
         mock_print.assert_called_with("asdf")
         mock_open.assert_called_with("asdf")
 
+    @patch("builtins.print", autospec=True)
+    @patch("subprocess.Popen")
+    def test_open_url_detached(
+        self, mock_popen: MagicMock, mock_print: MagicMock,
+    ) -> None:
+        self.assertTrue(browse.open_url("asdf", copy_clipboard=True))
+        mock_print.assert_called_with("asdf")
+        commands = [call.args[0] for call in mock_popen.call_args_list]
+        self.assertEqual(commands[0], ["pbcopy", "w"])
+        self.assertEqual(commands[1][-1], "asdf")
+        for call in mock_popen.call_args_list:
+            self.assertTrue(call.kwargs["start_new_session"])
+        mock_popen.return_value.stdin.write.assert_any_call(b"asdf")
+        mock_popen.return_value.wait.assert_not_called()
+
+    def test_launch(self) -> None:
+        self.assertTrue(browse.launch(
+            [sys.executable, "-c", "import sys; sys.stdin.read()"],
+            b"asdf",
+            wait=True,
+        ))
+        self.assertFalse(browse.launch(
+            [sys.executable, "-c", "import sys; sys.exit(1)"], wait=True,
+        ))
+        self.assertFalse(browse.launch(["git-browse-missing-command"]))
+
 
 class FullTest(unittest.TestCase):
     def setUp(self) -> None:
@@ -215,6 +712,10 @@ class FullTest(unittest.TestCase):
         os.makedirs(self.test_dir, exist_ok=True)
         with open(test_file, "w"):
             pass
+        # The test directory is created here, so git does not track it
+        untracked = patch("git_browse.browse.is_untracked", return_value=False)
+        untracked.start()
+        self.addCleanup(untracked.stop)
 
     def tearDown(self) -> None:
         sys.argv = self.original_sys_argv
@@ -282,7 +783,117 @@ class FullTest(unittest.TestCase):
     ) -> None:
         sys.argv = sys_argv
         browse.main()
-        mock_open_url.assert_called_with(expected, False, False)
+        mock_open_url.assert_called_with(
+            expected, False, False, False, ANY,
+        )
+
+    @patch("sys.stdin", io.StringIO("README.md\ntest_dir\n"))
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_stdin(self, mock_stdout: io.StringIO) -> None:
+        sys.argv = ["asdf", "--stdin"]
+        browse.main()
+        expected = [
+            "https://github.com/albertyw/git-browse/blob/master/README.md",
+            "https://github.com/albertyw/git-browse/tree/master/test_dir/",
+        ]
+        self.assertEqual(mock_stdout.getvalue().splitlines(), expected)
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_all_remotes(self, mock_stdout: io.StringIO) -> None:
+        sys.argv = ["asdf", "--all-remotes", "--json", "README.md"]
+        browse.main()
+        record = json.loads(mock_stdout.getvalue().splitlines()[0])
+        self.assertEqual(record, {
+            "remote": "origin",
+            "url": (
+                "https://github.com/albertyw/git-browse/blob/master/README.md"
+            ),
+        })
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_repositories(self, mock_stdout: io.StringIO) -> None:
+        sys.argv = ["asdf", "--repositories", str(BASE_DIRECTORY), "README.md"]
+        browse.main()
+        self.assertEqual(mock_stdout.getvalue(), "%s\t%s\n" % (
+            BASE_DIRECTORY,
+            "https://github.com/albertyw/git-browse/blob/master/README.md",
+        ))
+
+    def test_manifest(self) -> None:
+        sys.argv = ["asdf", "--manifest", "tsv", "--gzip", "git_browse"]
+        output = io.BytesIO()
+        with patch("sys.stdout", io.TextIOWrapper(output)):
+            browse.main()
+            data = gzip.decompress(output.getvalue())
+        lines = data.decode().splitlines()
+        self.assertIn(
+            "git_browse/browse.py\t"
+            "https://github.com/albertyw/git-browse/blob/master/"
+            "git_browse/browse.py",
+            lines,
+        )
+        self.assertNotIn("README.md", "".join(lines))
+
+    def test_manifest_godocs(self) -> None:
+        # godocs has no urls for individual files
+        sys.argv = ["asdf", "--manifest", "tsv", "--godocs"]
+        with patch("sys.stderr") as mock_stderr, self.assertRaises(SystemExit):
+            browse.main()
+        self.assertIn("--godocs", "".join(
+            call.args[0] for call in mock_stderr.write.call_args_list
+        ))
+
+    def test_each(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        repository = fixtures.create_repository(
+            pathlib.Path(temp_dir.name) / "repository",
+        )
+        fixtures.git(repository, "commit", "--allow-empty", "-m", "second")
+        head = fixtures.git(repository, "rev-parse", "HEAD").strip()
+        os.chdir(repository)
+        sys.argv = ["asdf", "--each", "--json", fixtures.TAG + "..HEAD"]
+        output = io.BytesIO()
+        with patch("sys.stdout", io.TextIOWrapper(output)):
+            browse.main()
+            lines = output.getvalue().decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            "commit": head,
+            "url": "https://github.com/albertyw/git-browse/commit/" + head,
+        }])
+        sys.argv = ["asdf", "--each", "README.md"]
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            browse.main()
+
+    @patch("atexit.register")
+    @patch("builtins.print")
+    def test_trace_timing(
+        self, mock_print: MagicMock, mock_register: MagicMock,
+    ) -> None:
+        sys.argv = ["asdf", "--dry-run", "--trace-timing", "README.md"]
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        trace_path = pathlib.Path(temp_dir.name) / "trace.json"
+        environ = {trace.ENVIRONMENT_VARIABLE: str(trace_path)}
+        with patch.dict(os.environ, environ):
+            browse.main()
+        mock_print.assert_called_with(
+            "https://github.com/albertyw/git-browse/blob/master/README.md",
+        )
+        report = mock_register.call_args_list[0]
+        self.assertIs(report.args[0], trace.report)
+        self.assertIs(report.args[1], sys.stderr)
+        output = io.StringIO()
+        trace.report(output, report.args[2])
+        self.assertIsNone(trace.TRACER)
+        table = output.getvalue()
+        for stage in ["parse arguments", "discover repository", "read config"]:
+            self.assertIn(stage, table)
+        with open(trace_path) as handle:
+            events = json.load(handle)["traceEvents"]
+        names = [event["name"] for event in events]
+        self.assertEqual(names[0], "parse arguments")
+        self.assertIn("resolve target", names)
 
     @patch("sys.stdout.write")
     def test_check_version(self, mock_print: MagicMock) -> None:
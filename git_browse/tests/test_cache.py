@@ -0,0 +1,192 @@
+import os
+import pathlib
+import tempfile
+from typing import Optional
+import unittest
+from unittest.mock import patch
+
+from git_browse import browse, cache, gitconfig, github, typedefs
+from git_browse.benchmarks import fixtures
+
+
+CONFIG_CONTENTS = (
+    '[remote "origin"]\n'
+    "    url = git@github.com:albertyw/git-browse\n"
+    '[branch "main"]\n'
+    "    remote = origin\n"
+)
+
+
+class TestResolutionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository_root = pathlib.Path(self.temp_dir.name)
+        self.git_directory = self.repository_root / ".git"
+        os.mkdir(self.git_directory)
+        self.git_config_file = self.git_directory / "config"
+        with open(self.git_config_file, "w") as handle:
+            handle.write(CONFIG_CONTENTS)
+        with open(self.git_directory / "HEAD", "w") as handle:
+            handle.write("ref: refs/heads/main\n")
+        self.resolution_cache = cache.ResolutionCache(
+            self.git_directory, self.repository_root,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_fingerprint_missing_file(self) -> None:
+        fingerprint = self.resolution_cache.fingerprint()
+        self.assertEqual(
+            len(fingerprint), 5 + len(gitconfig.get_user_config_paths()),
+        )
+        self.assertIsNotNone(fingerprint[0])
+        self.assertIsNone(fingerprint[1])
+        self.assertIsNone(fingerprint[3])
+        self.assertIsNone(fingerprint[4])
+
+    def test_watches(self) -> None:
+        self.assertTrue(self.resolution_cache.watches([self.git_config_file]))
+        self.assertFalse(self.resolution_cache.watches(
+            [self.git_config_file, self.git_directory / "included"],
+        ))
+
+    def test_load_missing(self) -> None:
+        fingerprint = self.resolution_cache.fingerprint()
+        self.assertIsNone(self.resolution_cache.load(fingerprint))
+
+    def test_load_corrupt(self) -> None:
+        with open(self.resolution_cache.cache_path, "w") as handle:
+            handle.write("asdf")
+        fingerprint = self.resolution_cache.fingerprint()
+        self.assertIsNone(self.resolution_cache.load(fingerprint))
+
+    def test_round_trip(self) -> None:
+        git_config = typedefs.GitConfig("git@github.com:a/b", "main")
+        git_config.try_url_match(github.GITHUB_SSH_URL)
+        fingerprint = self.resolution_cache.fingerprint()
+        self.resolution_cache.store(git_config, fingerprint)
+        loaded = self.resolution_cache.load(fingerprint)
+        assert loaded
+        self.assertEqual(loaded.git_url, git_config.git_url)
+        self.assertEqual(loaded.default_branch, "main")
+        self.assertEqual(loaded.host_regex, github.GITHUB_SSH_URL)
+        assert loaded.url_regex_match
+        self.assertEqual(loaded.url_regex_match.group("user"), "a")
+        with self.assertRaises(IndexError):
+            loaded.url_regex_match.group("account")
+        expected = sorted(["HEAD", "config", cache.CACHE_FILE_NAME])
+        self.assertEqual(sorted(os.listdir(self.git_directory)), expected)
+
+    def test_invalidate_on_change(self) -> None:
+        git_config = typedefs.GitConfig("git@github.com:a/b", "main")
+        self.resolution_cache.store(
+            git_config, self.resolution_cache.fingerprint(),
+        )
+        with open(self.repository_root / ".arcconfig", "w") as handle:
+            handle.write("{}")
+        fingerprint = self.resolution_cache.fingerprint()
+        self.assertIsNone(self.resolution_cache.load(fingerprint))
+
+    def test_section_round_trip(self) -> None:
+        included = self.git_directory / "included"
+        included.write_text('[browse "host.a"]\n\ttype = gitlab\n')
+        with open(self.git_config_file, "a") as handle:
+            handle.write("[browse]\n\topener = a\n[include]\n\tpath = included\n")
+        environ = {
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GIT_CONFIG_GLOBAL": str(self.git_directory / "global"),
+        }
+        base_paths = [self.git_config_file]
+        fingerprint = cache.stat_fingerprint(base_paths)
+        section = gitconfig.read_config_section(
+            "browse", self.git_config_file, environ=environ,
+        )
+        self.resolution_cache.store_section(
+            "browse", base_paths, fingerprint, section,
+        )
+        loaded = self.resolution_cache.load_section("browse", base_paths)
+        assert loaded
+        self.assertEqual(loaded.section.values, {"opener": "a"})
+        self.assertEqual(loaded.section.subsections, {
+            "host.a": {"type": "gitlab"},
+        })
+        self.assertIn(included, loaded.paths)
+        self.assertFalse(loaded.is_stale())
+        self.assertIsNone(self.resolution_cache.load_section("a", base_paths))
+        self.assertIsNone(self.resolution_cache.load_section("browse", [
+            self.git_directory / "global",
+        ]))
+        # A change to an included file invalidates the section
+        included.write_text('[browse "host.a"]\n\ttype = bitbucket\n')
+        self.assertTrue(loaded.is_stale())
+        self.assertIsNone(self.resolution_cache.load_section("browse", base_paths))
+
+    def test_get_git_config_data_cached(self) -> None:
+        git_config = browse.get_git_config_data(
+            self.git_config_file, self.resolution_cache,
+        )
+        self.assertEqual(git_config.host_regex, github.GITHUB_SSH_URL)
+        with patch("git_browse.gitconfig.read_origin_config") as mock_parser:
+            cached_config = browse.get_git_config_data(
+                self.git_config_file, self.resolution_cache,
+            )
+            self.assertFalse(mock_parser.called)
+        self.assertEqual(cached_config.git_url, git_config.git_url)
+        self.assertEqual(cached_config.default_branch, "main")
+        host = browse.parse_git_url(cached_config)
+        self.assertTrue(host.__class__ is github.GithubHost)
+        self.assertEqual(host.user, "albertyw")
+        self.assertEqual(host.repository, "git-browse")
+
+
+class TestTrackedFileIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        for path in ["OWNERS", "a/OWNERS", "a/b/c/OWNERS", "d/OWNERS"]:
+            file_path = self.repository / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(path)
+        fixtures.git(self.repository, "add", "OWNERS", "a", "d")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_list_tracked_files(self) -> None:
+        files = cache.list_tracked_files(self.repository, "OWNERS")
+        self.assertEqual(files, [
+            "OWNERS", "a/OWNERS", "a/b/c/OWNERS", "d/OWNERS",
+        ])
+        self.assertEqual(
+            cache.list_tracked_files(pathlib.Path(self.temp_dir.name), "OWNERS"),
+            [],
+        )
+
+    def test_nearest(self) -> None:
+        index = OwnersIndex(self.repository, self.repository / ".git")
+        self.assertEqual(index.entries["a/b/c"], "a/b/c/OWNERS")
+        self.assertNotIn("d", index.entries)
+        for directory, nearest in [
+            ("", ""),
+            ("a", "a"),
+            ("a/", "a"),
+            ("a/b", "a"),
+            ("a/b/c/e.py", "a/b/c"),
+            ("ab", ""),
+            ("d/e", ""),
+        ]:
+            self.assertEqual(index.nearest(directory), nearest, directory)
+        index.entries.pop("")
+        self.assertIsNone(index.nearest("d/e"))
+
+
+class OwnersIndex(cache.TrackedFileIndex):
+    cache_file_name = "owners.json"
+    file_name = "OWNERS"
+
+    def parse(self, data: str) -> Optional[str]:
+        # Leave one file out to check that skipped files are not indexed
+        return None if data.startswith("d/") else data
@@ -0,0 +1,52 @@
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import catfile
+from git_browse.tests import test_util
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+
+
+class TestCommitResolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.resolver = catfile.CommitResolver(BASE_DIRECTORY)
+
+    def tearDown(self) -> None:
+        self.resolver.close()
+
+    def test_resolve_tag(self) -> None:
+        commit_hash = self.resolver.resolve(test_util.get_tag())
+        assert commit_hash
+        self.assertEqual(len(commit_hash), 40)
+        self.assertEqual(commit_hash, test_util.get_tag_commit_hash())
+
+    def test_resolve_unknown(self) -> None:
+        self.assertIsNone(self.resolver.resolve("!@#$"))
+        self.assertIsNone(self.resolver.resolve("asdf qwer"))
+        self.assertIsNone(self.resolver.resolve(""))
+        self.assertIsNone(self.resolver.resolve("HEAD\nHEAD"))
+
+    def test_resolve_tree(self) -> None:
+        self.assertIsNone(self.resolver.resolve("HEAD^{tree}"))
+
+    def test_resolve_many(self) -> None:
+        identifiers = ["HEAD", "!@#$", test_util.get_tag()] * 200
+        commit_hashes = self.resolver.resolve_many(identifiers)
+        self.assertEqual(len(commit_hashes), len(identifiers))
+        self.assertEqual(commit_hashes[1], None)
+        self.assertEqual(commit_hashes[2], test_util.get_tag_commit_hash())
+        self.assertEqual(commit_hashes[0], commit_hashes[-3])
+        # Every lookup goes over the same process
+        process = self.resolver.process
+        self.resolver.resolve("HEAD")
+        self.assertIs(self.resolver.process, process)
+
+    def test_not_repository(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        resolver = catfile.CommitResolver(pathlib.Path(temp_dir.name))
+        self.assertIsNone(resolver.resolve("HEAD"))
+        self.assertTrue(resolver.closed)
+        self.assertIsNone(resolver.resolve("HEAD"))
+        resolver.close()
+        temp_dir.cleanup()
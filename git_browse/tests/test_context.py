@@ -0,0 +1,103 @@
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import context
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+ACROSS_FILESYSTEM = {"GIT_DISCOVERY_ACROSS_FILESYSTEM": "1"}
+
+
+class TestRepositoryContext(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.temp_dir.name).resolve()
+        (self.root / "repo" / ".git").mkdir(parents=True)
+        (self.root / "repo" / "a" / "b").mkdir(parents=True)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_discover(self) -> None:
+        repository_context = context.RepositoryContext.discover(
+            BASE_DIRECTORY / "git_browse" / "tests", {},
+        )
+        self.assertEqual(repository_context.worktree_root, BASE_DIRECTORY)
+        self.assertEqual(
+            repository_context.git_directory, BASE_DIRECTORY / ".git",
+        )
+        self.assertEqual(
+            repository_context.common_directory, BASE_DIRECTORY / ".git",
+        )
+
+    def test_discover_nested(self) -> None:
+        repository_context = context.RepositoryContext.discover(
+            self.root / "repo" / "a" / "b", ACROSS_FILESYSTEM,
+        )
+        self.assertEqual(repository_context.worktree_root, self.root / "repo")
+        self.assertIn("RepositoryContext", repr(repository_context))
+
+    def test_discover_not_found(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            context.RepositoryContext.discover(
+                pathlib.Path("/"), ACROSS_FILESYSTEM,
+            )
+
+    def test_ceiling_directories(self) -> None:
+        environ = {
+            "GIT_CEILING_DIRECTORIES": "relative:%s" % (self.root / "repo"),
+        }
+        environ.update(ACROSS_FILESYSTEM)
+        with self.assertRaises(FileNotFoundError):
+            context.RepositoryContext.discover(
+                self.root / "repo" / "a" / "b", environ,
+            )
+        self.assertEqual(
+            context.get_ceiling_directories(environ), {self.root / "repo"},
+        )
+
+    def test_git_dir_environment(self) -> None:
+        environ = {"GIT_DIR": "repo/.git", "GIT_WORK_TREE": "repo/a"}
+        repository_context = context.RepositoryContext.discover(
+            self.root, environ,
+        )
+        self.assertEqual(repository_context.git_directory, self.root / "repo" / ".git")
+        self.assertEqual(repository_context.worktree_root, self.root / "repo" / "a")
+
+    def test_git_work_tree_environment(self) -> None:
+        environ = {"GIT_WORK_TREE": str(self.root)}
+        environ.update(ACROSS_FILESYSTEM)
+        repository_context = context.RepositoryContext.discover(
+            self.root / "repo" / "a", environ,
+        )
+        self.assertEqual(repository_context.worktree_root, self.root)
+        self.assertEqual(repository_context.git_directory, self.root / "repo" / ".git")
+
+    def test_gitdir_file(self) -> None:
+        worktree_git = self.root / "repo" / ".git" / "worktrees" / "feature"
+        worktree_git.mkdir(parents=True)
+        (worktree_git / "commondir").write_text("../..\n")
+        worktree = self.root / "feature"
+        worktree.mkdir()
+        (worktree / ".git").write_text(
+            "gitdir: ../repo/.git/worktrees/feature\n",
+        )
+        repository_context = context.RepositoryContext.discover(
+            worktree, ACROSS_FILESYSTEM,
+        )
+        self.assertEqual(repository_context.worktree_root, worktree)
+        self.assertEqual(
+            repository_context.git_directory.resolve(), worktree_git,
+        )
+        self.assertEqual(
+            repository_context.common_directory.resolve(),
+            self.root / "repo" / ".git",
+        )
+
+    def test_invalid_gitdir_file(self) -> None:
+        (self.root / "other").mkdir()
+        (self.root / "other" / ".git").write_text("asdf")
+        with self.assertRaises(FileNotFoundError):
+            context.RepositoryContext.discover(
+                self.root / "other", ACROSS_FILESYSTEM,
+            )
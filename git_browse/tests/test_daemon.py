@@ -0,0 +1,210 @@
+import os
+import pathlib
+import socket
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from git_browse import browse, client, daemon, repository
+from git_browse.benchmarks import fixtures
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self) -> None:
+        os.chdir(BASE_DIRECTORY)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = pathlib.Path(self.temp_dir.name) / "test.sock"
+        self.daemon = daemon.ResolutionDaemon(self.socket_path)
+        self.thread = threading.Thread(
+            target=self.daemon.serve_forever, args=(0.01,),
+        )
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.daemon.shutdown()
+        self.thread.join()
+        self.daemon.server_close()
+        self.temp_dir.cleanup()
+        os.chdir(BASE_DIRECTORY)
+
+    def request(self, target: str, **kwargs: object) -> dict[str, object]:
+        request: dict[str, object] = {
+            "version": browse.__version__,
+            "cwd": str(BASE_DIRECTORY),
+            "path": "",
+            "target": target,
+            "sourcegraph": False,
+            "godocs": False,
+        }
+        request.update(kwargs)
+        return request
+
+    def test_resolve(self) -> None:
+        url = client.request_url(self.request("README.md"), self.socket_path)
+        self.assertEqual(
+            url, "https://github.com/albertyw/git-browse/blob/master/README.md",
+        )
+        url = client.request_url(
+            self.request("", sourcegraph=True), self.socket_path,
+        )
+        self.assertEqual(
+            url, "https://sourcegraph.com/github.com/albertyw/git-browse",
+        )
+        self.assertEqual(list(self.daemon.pool.repositories), [BASE_DIRECTORY])
+
+    def test_resolve_subdirectory(self) -> None:
+        request = self.request("__init__.py", path="git_browse")
+        url = client.request_url(request, self.socket_path)
+        self.assertEqual(
+            url,
+            "https://github.com/albertyw/git-browse/blob/master/"
+            "git_browse/__init__.py",
+        )
+
+    def test_warm_state(self) -> None:
+        client.request_url(self.request("README.md"), self.socket_path)
+        repository = self.daemon.pool.repositories[BASE_DIRECTORY]
+        resolver = repository.resolver
+        client.request_url(self.request("HEAD~0"), self.socket_path)
+        self.assertIs(self.daemon.pool.repositories[BASE_DIRECTORY], repository)
+        self.assertIs(repository.resolver, resolver)
+        self.assertIsNotNone(resolver.process)
+
+    def test_invalidate(self) -> None:
+        client.request_url(self.request("README.md"), self.socket_path)
+        repository = self.daemon.pool.repositories[BASE_DIRECTORY]
+        repository.fingerprint = []
+        client.request_url(self.request("README.md"), self.socket_path)
+        self.assertIsNot(self.daemon.pool.repositories[BASE_DIRECTORY], repository)
+        self.assertTrue(repository.resolver.closed)
+        self.daemon.pool.invalidate()
+        self.assertNotIn(
+            repository.context.git_directory, browse.HOST_TABLES,
+        )
+
+    def test_stale_host(self) -> None:
+        client.request_url(self.request("README.md"), self.socket_path)
+        repository = self.daemon.pool.repositories[BASE_DIRECTORY]
+        host = repository.get_host(False, False)
+        self.assertIs(repository.get_host(False, False), host)
+        with patch.object(host, "is_stale", return_value=True):
+            self.assertIsNot(repository.get_host(False, False), host)
+
+    def test_errors(self) -> None:
+        url = client.request_url(self.request("asdf"), self.socket_path)
+        self.assertIsNone(url)
+        url = client.request_url(
+            self.request("README.md", version="0"), self.socket_path,
+        )
+        self.assertIsNone(url)
+
+    def test_already_running(self) -> None:
+        with self.assertRaises(RuntimeError):
+            daemon.remove_stale_socket(self.socket_path)
+
+
+class TestWarmRepositoryPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = pathlib.Path(self.temp_dir.name)
+        self.checkout = fixtures.create_repository(base / "checkout")
+        self.worktree = base / "worktree"
+        fixtures.git(
+            self.checkout, "worktree", "add", "--quiet", str(self.worktree),
+        )
+        self.pool = repository.WarmRepositoryPool()
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.temp_dir.cleanup()
+
+    def test_shared_object_store(self) -> None:
+        for directory in [self.checkout, self.worktree]:
+            browse.get_object_store(self.pool.get(directory).context)
+        common_directory = self.checkout / ".git"
+        self.pool.invalidate(self.checkout)
+        self.assertIn(common_directory, browse.OBJECT_STORES)
+        self.pool.invalidate(self.worktree)
+        self.assertNotIn(common_directory, browse.OBJECT_STORES)
+
+
+class TestClient(unittest.TestCase):
+    def test_no_daemon(self) -> None:
+        socket_path = pathlib.Path(tempfile.gettempdir()) / "asdf.sock"
+        self.assertIsNone(client.request_url({}, socket_path))
+
+    def test_stale_socket(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        socket_path = pathlib.Path(temp_dir.name) / "test.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(socket_path))
+        self.assertIsNone(client.request_url({}, socket_path))
+        daemon.remove_stale_socket(socket_path)
+        self.assertFalse(socket_path.exists())
+        temp_dir.cleanup()
+
+    def test_untrusted_socket(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        socket_path = pathlib.Path(temp_dir.name) / "test.sock"
+        resolution_daemon = daemon.ResolutionDaemon(socket_path)
+        thread = threading.Thread(
+            target=resolution_daemon.serve_forever, args=(0.01,),
+        )
+        thread.start()
+        request: dict[str, object] = {
+            "version": browse.__version__, "cwd": str(BASE_DIRECTORY),
+        }
+        try:
+            self.assertIsNotNone(client.request_url(request, socket_path))
+            # Another user could have created a socket in a shared directory
+            os.chmod(temp_dir.name, 0o755)
+            self.assertIsNone(client.request_url(request, socket_path))
+            os.chmod(temp_dir.name, 0o700)
+            os.chmod(socket_path, 0o777)
+            self.assertIsNone(client.request_url(request, socket_path))
+        finally:
+            resolution_daemon.shutdown()
+            thread.join()
+            resolution_daemon.server_close()
+            temp_dir.cleanup()
+
+    def test_shared_socket_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chmod(temp_dir, 0o1777)
+            with self.assertRaises(RuntimeError):
+                daemon.ResolutionDaemon(pathlib.Path(temp_dir) / "test.sock")
+            socket_path = pathlib.Path(temp_dir) / "private" / "test.sock"
+            resolution_daemon = daemon.ResolutionDaemon(socket_path)
+            resolution_daemon.server_close()
+            self.assertTrue(client.is_private(socket_path.parent))
+
+    @patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"})
+    def test_socket_path(self) -> None:
+        self.assertEqual(
+            client.get_socket_path(),
+            pathlib.Path("/run/user/1000") / client.SOCKET_NAME,
+        )
+
+    @patch.dict(os.environ, {"XDG_RUNTIME_DIR": "", "TMPDIR": "/tmp"})
+    def test_socket_path_temp_directory(self) -> None:
+        self.assertEqual(
+            client.get_socket_path(),
+            pathlib.Path("/tmp/git-browse-%s" % os.getuid()) / client.SOCKET_NAME,
+        )
+
+    @patch("git_browse.browse.open_url")
+    @patch("git_browse.client.request_url")
+    def test_main_uses_daemon(
+        self, mock_request_url: MagicMock, mock_open_url: MagicMock,
+    ) -> None:
+        mock_request_url.return_value = "https://example.com"
+        with patch("sys.argv", ["asdf", "README.md"]):
+            with patch("git_browse.browse.get_repository_host") as mock_host:
+                browse.main()
+                self.assertFalse(mock_host.called)
+        mock_open_url.assert_called_with(
+            "https://example.com", False, False, False,
+        )
@@ -159,6 +159,10 @@ class TestGitURLs(unittest.TestCase):
     def setUp(self) -> None:
         os.mkdir(TEST_DIR_PATH)
         self.mock_arcconfig()
+        # The test directory is created here, so git does not track it
+        untracked = patch("git_browse.browse.is_untracked", return_value=False)
+        untracked.start()
+        self.addCleanup(untracked.stop)
 
     def tearDown(self) -> None:
         os.rmdir(TEST_DIR_PATH)
@@ -0,0 +1,345 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from git_browse import gitconfig
+
+
+class TestParseConfig(unittest.TestCase):
+    def test_parse(self) -> None:
+        data = (
+            "; comment\n"
+            "[core]\n"
+            "\tbare = false # trailing comment\n"
+            "\tfilemode\n"
+            '[remote "origin"]\n'
+            "\turl = git@github.com:albertyw/git-browse\n"
+            '[branch "a \\"quoted\\" \\\\ name"] remote = origin\n'
+            "[Branch.Deprecated]\n"
+            '\tDescription = "  padded ; value  " tail\\tx \\\n'
+            "\t\tcontinued\n"
+        )
+        entries = [
+            entry for entry in gitconfig.parse_config(data) if entry.name
+        ]
+        self.assertEqual(entries, [
+            gitconfig.ConfigEntry("core", None, "bare", "false"),
+            gitconfig.ConfigEntry("core", None, "filemode", None),
+            gitconfig.ConfigEntry(
+                "remote", "origin", "url", "git@github.com:albertyw/git-browse",
+            ),
+            gitconfig.ConfigEntry(
+                "branch", 'a "quoted" \\ name', "remote", "origin",
+            ),
+            gitconfig.ConfigEntry(
+                "branch",
+                "deprecated",
+                "description",
+                "  padded ; value   tail\tx continued",
+            ),
+        ])
+
+    def test_parse_sections(self) -> None:
+        entries = list(gitconfig.parse_config('[branch "a"]\n[branch "b"]'))
+        self.assertEqual(entries, [
+            gitconfig.ConfigEntry("branch", "a", "", None),
+            gitconfig.ConfigEntry("branch", "b", "", None),
+        ])
+
+    def test_parse_errors(self) -> None:
+        with self.assertRaises(ValueError):
+            list(gitconfig.parse_config("[asdf"))
+        with self.assertRaises(ValueError):
+            list(gitconfig.parse_config('[a]\nb = "c'))
+        with self.assertRaises(ValueError):
+            list(gitconfig.parse_config("[a]\nb = \\q"))
+
+    def test_wildmatch(self) -> None:
+        self.assertTrue(gitconfig.wildmatch("**/work/**", "/home/a/work/b/"))
+        self.assertTrue(gitconfig.wildmatch("/home/*/.git", "/home/a/.git"))
+        self.assertFalse(gitconfig.wildmatch("/home/*/.git", "/home/a/b/.git"))
+        self.assertTrue(gitconfig.wildmatch("feature?", "FEATURE1", True))
+
+    def test_rewrite_url(self) -> None:
+        instead_of = {
+            "gh:": "git@github.com:",
+            "gh:albertyw/": "https://github.com/albertyw/",
+        }
+        self.assertEqual(
+            gitconfig.rewrite_url("gh:albertyw/git-browse", instead_of),
+            "https://github.com/albertyw/git-browse",
+        )
+        self.assertEqual(
+            gitconfig.rewrite_url("gh:a/b", instead_of), "git@github.com:a/b",
+        )
+        self.assertEqual(gitconfig.rewrite_url("asdf", instead_of), "asdf")
+
+
+class TestReadOriginConfig(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.git_directory = pathlib.Path(self.temp_dir.name).resolve() / ".git"
+        self.git_directory.mkdir()
+        self.config_path = self.git_directory / "config"
+        with open(self.git_directory / "HEAD", "w") as handle:
+            handle.write("ref: refs/heads/feature/a\n")
+        # Keep the machine's own system and global config out of the tests
+        self.global_config_path = self.git_directory / "global"
+        environ = patch.dict(os.environ, {
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GIT_CONFIG_GLOBAL": str(self.global_config_path),
+        })
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, data: str) -> pathlib.Path:
+        path = self.git_directory / name
+        with open(path, "w") as handle:
+            handle.write(data)
+        return path
+
+    def read(self) -> gitconfig.OriginConfig:
+        return gitconfig.read_origin_config(
+            self.config_path, self.git_directory,
+        )
+
+    def test_read(self) -> None:
+        self.write("config", (
+            '[branch "main"]\n'
+            '[remote "origin"]\n'
+            "\turl = git@github.com:a/b\n"
+            "\turl = git@github.com:c/d\n"
+            '[branch "develop"]\n'
+        ))
+        origin_config = self.read()
+        self.assertEqual(origin_config.url, "git@github.com:a/b")
+        self.assertEqual(origin_config.branches, ["main", "develop"])
+        self.assertEqual(
+            origin_config.sources, [self.config_path, self.global_config_path],
+        )
+
+    def test_read_remotes(self) -> None:
+        self.write("config", (
+            '[remote "upstream"]\n'
+            "\turl = work:c/d\n"
+            '[remote "origin"]\n'
+            "\turl = git@github.com:a/b\n"
+            '[remote "empty"]\n'
+            '[branch "master"]\n'
+            '[url "git@gitlab.com:"]\n'
+            "\tinsteadOf = work:\n"
+        ))
+        remote_config = gitconfig.read_remote_config(self.config_path)
+        self.assertEqual(list(remote_config.urls.items()), [
+            ("upstream", "git@gitlab.com:c/d"),
+            ("origin", "git@github.com:a/b"),
+        ])
+        self.assertEqual(remote_config.branches, ["master"])
+
+    def test_early_exit(self) -> None:
+        self.write("config", (
+            '[remote "origin"]\n'
+            "\turl = git@github.com:a/b\n"
+            '[branch "master"]\n'
+            '[branch "other"]\n'
+            "[broken\n"
+        ))
+        origin_config = self.read()
+        self.assertEqual(origin_config.url, "git@github.com:a/b")
+        self.assertEqual(origin_config.branches, ["master"])
+
+    def test_missing(self) -> None:
+        origin_config = self.read()
+        self.assertIsNone(origin_config.url)
+        self.assertEqual(origin_config.branches, [])
+
+    def test_instead_of(self) -> None:
+        self.write("config", (
+            '[remote "origin"]\n'
+            "\turl = work:a/b\n"
+            '[branch "master"]\n'
+            '[url "git@github.com:"]\n'
+            "\tinsteadOf = work:\n"
+        ))
+        self.assertEqual(self.read().url, "git@github.com:a/b")
+
+    def test_global_instead_of(self) -> None:
+        self.write("global", (
+            "[include]\n\tpath = included\n"
+            '[url "git@github.com:"]\n\tinsteadOf = work:\n'
+        ))
+        self.write("included", '[url "git@gitlab.com:"]\n\tinsteadOf = lab:\n')
+        self.write("config", (
+            '[remote "origin"]\n\turl = work:a/b\n'
+            '[remote "upstream"]\n\turl = lab:c/d\n'
+            '[branch "master"]\n'
+        ))
+        origin_config = self.read()
+        self.assertEqual(origin_config.url, "git@github.com:a/b")
+        self.assertEqual(origin_config.sources, [
+            self.config_path,
+            self.global_config_path,
+            self.git_directory / "included",
+        ])
+        remote_config = gitconfig.read_remote_config(self.config_path)
+        self.assertEqual(remote_config.urls["upstream"], "git@gitlab.com:c/d")
+        # Local rewrites win over global ones for the same prefix
+        self.write("config", (
+            '[remote "origin"]\n\turl = work:a/b\n'
+            '[url "git@bitbucket.org:"]\n\tinsteadOf = work:\n'
+        ))
+        self.assertEqual(self.read().url, "git@bitbucket.org:a/b")
+
+    def test_include(self) -> None:
+        self.write("included", (
+            '[url "git@gitlab.com:"]\n'
+            "\tinsteadOf = work:\n"
+        ))
+        self.write("config", (
+            '[remote "origin"]\n'
+            "\turl = work:a/b\n"
+            "[include]\n"
+            "\tpath = included\n"
+            "\tpath = missing\n"
+        ))
+        origin_config = self.read()
+        self.assertEqual(origin_config.url, "git@gitlab.com:a/b")
+        self.assertEqual(origin_config.sources, [
+            self.config_path,
+            self.git_directory / "included",
+            self.git_directory / "missing",
+            self.global_config_path,
+        ])
+
+    def test_include_home(self) -> None:
+        self.write("included", '[remote "origin"]\n\turl = git@github.com:a/b\n')
+        self.write("config", "[include]\n\tpath = ~/included\n")
+        with patch.dict(os.environ, {"HOME": str(self.git_directory)}):
+            self.assertEqual(self.read().url, "git@github.com:a/b")
+
+    def test_include_recursion(self) -> None:
+        self.write("config", "[include]\n\tpath = config\n")
+        with self.assertRaises(ValueError):
+            self.read()
+
+    def test_include_if(self) -> None:
+        self.write("gitdir", '[remote "origin"]\n\turl = gitdir\n')
+        self.write("branch", '[remote "origin"]\n\turl = branch\n')
+        self.write("config", (
+            '[includeIf "hasconfig:remote.*.url:asdf"]\n'
+            "\tpath = gitdir\n"
+            '[includeIf "gitdir:/asdf/"]\n'
+            "\tpath = gitdir\n"
+            '[includeIf "onbranch:main"]\n'
+            "\tpath = branch\n"
+            '[includeIf "onbranch:feature/"]\n'
+            "\tpath = branch\n"
+        ))
+        self.assertEqual(self.read().url, "branch")
+        self.write("config", (
+            '[includeIf "gitdir/i:%s/"]\n'
+            "\tpath = gitdir\n" % str(self.git_directory).upper()
+        ))
+        self.assertEqual(self.read().url, "gitdir")
+        self.write("config", '[includeIf "gitdir:./"]\n\tpath = gitdir\n')
+        self.assertEqual(self.read().url, "gitdir")
+        self.write("config", '[includeIf "gitdir:.git"]\n\tpath = gitdir\n')
+        self.assertEqual(self.read().url, "gitdir")
+        origin_config = gitconfig.read_origin_config(self.config_path)
+        self.assertIsNone(origin_config.url)
+
+    def test_worktree_config(self) -> None:
+        worktree_directory = self.git_directory / "worktrees" / "feature"
+        worktree_directory.mkdir(parents=True)
+        with open(worktree_directory / "config.worktree", "w") as handle:
+            handle.write('[remote "origin"]\n\turl = git@github.com:a/b\n')
+        self.write("config", '[extensions]\n\tworktreeConfig\n[branch "master"]\n')
+        origin_config = gitconfig.read_origin_config(
+            self.config_path, worktree_directory,
+        )
+        self.assertEqual(origin_config.url, "git@github.com:a/b")
+        self.assertEqual(origin_config.sources, [
+            self.config_path,
+            worktree_directory / "config.worktree",
+            self.global_config_path,
+        ])
+        self.write("config", "[extensions]\n\tworktreeConfig = false\n")
+        origin_config = gitconfig.read_origin_config(
+            self.config_path, worktree_directory,
+        )
+        self.assertIsNone(origin_config.url)
+        self.write("config", "[extensions]\n\tworktreeConfig = asdf\n")
+        with self.assertRaises(ValueError):
+            self.read()
+
+    def test_read_config_value(self) -> None:
+        self.write("system", "[browse]\n\topener = system\n")
+        self.write("global", "[browse]\n\topener = global\n")
+        environ = {
+            "GIT_CONFIG_SYSTEM": str(self.git_directory / "system"),
+            "GIT_CONFIG_GLOBAL": str(self.git_directory / "global"),
+        }
+        value = gitconfig.read_config_value(
+            "browse", "opener", environ=environ,
+        )
+        self.assertEqual(value, "global")
+        self.write("config", (
+            '[browse "host"]\n\topener = subsection\n'
+            "[browse]\n\topener = local\n"
+        ))
+        value = gitconfig.read_config_value(
+            "browse", "opener", self.config_path, environ=environ,
+        )
+        self.assertEqual(value, "local")
+        del environ["GIT_CONFIG_GLOBAL"]
+        environ["HOME"] = str(self.git_directory)
+        environ["GIT_CONFIG_NOSYSTEM"] = "1"
+        self.assertIsNone(gitconfig.read_config_value(
+            "browse", "opener", environ=environ,
+        ))
+        self.write(".gitconfig", "[browse]\n\topener = home\n")
+        self.assertEqual(gitconfig.read_config_value(
+            "browse", "opener", environ=environ,
+        ), "home")
+
+    def test_read_config_subsections(self) -> None:
+        self.write("global", (
+            '[browse "host.a"]\n\ttype = github\n\turl = global\n'
+            "[include]\n\tpath = included\n"
+        ))
+        self.write("included", '[browse "host.b"]\n\ttype = gitlab\n')
+        self.write("config", (
+            '[browse "host.a"]\n\turl = local\n'
+            '[remote "host.c"]\n\turl = remote\n'
+            "[browse]\n\topener = local\n"
+        ))
+        environ = {
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GIT_CONFIG_GLOBAL": str(self.git_directory / "global"),
+        }
+        subsections = gitconfig.read_config_subsections(
+            "browse", self.config_path, environ=environ,
+        )
+        self.assertEqual(subsections, {
+            "host.a": {"type": "github", "url": "local"},
+            "host.b": {"type": "gitlab"},
+        })
+
+    def test_read_config_subsections_skim(self) -> None:
+        # Only a section header, not any mention of the name, is parsed
+        self.write("config", (
+            '[remote "origin"]\n\turl = git@github.com:a/git-browse\n'
+            '[branch "browse-include"]\n\tremote = origin\n'
+        ))
+        environ = {"GIT_CONFIG_NOSYSTEM": "1", "GIT_CONFIG_GLOBAL": ""}
+        with patch("git_browse.gitconfig.read_local_config") as mock_read:
+            subsections = gitconfig.read_config_subsections(
+                "browse", self.config_path, environ=environ,
+            )
+            mock_read.assert_not_called()
+        self.assertEqual(subsections, {})
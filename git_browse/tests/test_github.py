@@ -58,3 +58,17 @@ class TestGithubHost(unittest.TestCase):
             "https://github.com/albertyw/git-browse/commit/%s"
             % test_util.get_tag(),
         )
+
+    def test_compare_url(self) -> None:
+        for operator in ["..", "..."]:
+            focus_range = typedefs.FocusRange("abcd", operator, "bcde")
+            url = self.github_host.get_url(focus_range)
+            self.assertEqual(
+                url,
+                "https://github.com/albertyw/git-browse/compare/abcd%sbcde"
+                % operator,
+            )
+
+    def test_line_fragment(self) -> None:
+        self.assertEqual(self.github_host.line_fragment(3, 3), "#L3")
+        self.assertEqual(self.github_host.line_fragment(3, 5), "#L3-L5")
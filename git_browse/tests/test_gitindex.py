@@ -0,0 +1,100 @@
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import gitindex
+from git_browse.benchmarks import fixtures
+
+
+# Names that sort around each other and a directory with the same prefix
+PATHS = [
+    "a-b", "a.b", "a/b", "a/b/c", "a0", "b/%s" % ("long" * 1100),
+] + ["many/%04d/file" % i for i in range(300)]
+
+
+class TestGitIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        blob = fixtures.git(
+            self.repository, "hash-object", "-w", "README.md",
+        ).strip()
+        # Tracked paths that are not in the working tree
+        fixtures.git(
+            self.repository, "update-index", "--index-info",
+            stdin="".join(
+                "100644 %s\t%s\n" % (blob, path) for path in PATHS
+                if path != "a/b"
+            ),
+        )
+        self.index = gitindex.GitIndex(self.repository / ".git" / "index")
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def assert_lookups(self) -> None:
+        for path in PATHS:
+            if path == "a/b":
+                continue
+            self.assertEqual(self.index.lookup(path), gitindex.BLOB, path[:10])
+        self.assertEqual(self.index.lookup("README.md"), gitindex.BLOB)
+        for path in ["a", "a/b", "a/b/", "many", "many/0123", "directory"]:
+            self.assertEqual(self.index.lookup(path), gitindex.TREE, path)
+        for path in ["", "0", "a/c", "many/0123/file/x", "zzz"]:
+            self.assertIsNone(self.index.lookup(path), path)
+
+    def test_versions(self) -> None:
+        for version in ["2", "3", "4"]:
+            fixtures.git(
+                self.repository, "update-index", "--index-version", version,
+            )
+            self.assert_lookups()
+        # git only writes version 3 when an entry has extended flags
+        self.assertEqual(self.index.version, 4)
+        restarts = self.index.restarts
+        assert restarts is not None
+        self.assertEqual(
+            len(restarts),
+            -(-self.index.entry_count // gitindex.RESTART_INTERVAL),
+        )
+        self.index.lookup("README.md")
+        self.assertIs(self.index.restarts, restarts)
+
+    def test_extended_flags(self) -> None:
+        with open(self.repository / "new", "w"):
+            pass
+        fixtures.git(self.repository, "add", "--intent-to-add", "new")
+        fixtures.git(
+            self.repository, "update-index", "--skip-worktree", "README.md",
+        )
+        self.assertEqual(self.index.version, 0)
+        self.assert_lookups()
+        self.assertEqual(self.index.version, 3)
+        self.assertIsNone(self.index.lookup("new"))
+
+    def test_sparse_index(self) -> None:
+        fixtures.git(self.repository, "commit", "--quiet", "-m", "paths")
+        fixtures.git(
+            self.repository, "sparse-checkout", "set", "--cone",
+            "--sparse-index", "directory",
+        )
+        self.assertFalse((self.repository / "many").exists())
+        sparse = fixtures.git(self.repository, "ls-files", "--sparse")
+        self.assertIn("many/\n", sparse)
+        self.assert_lookups()
+
+    def test_split_index(self) -> None:
+        self.assertTrue(self.index.is_readable())
+        fixtures.git(self.repository, "update-index", "--split-index")
+        self.assertIsNone(self.index.lookup("README.md"))
+        self.assertFalse(self.index.is_readable())
+
+    def test_missing(self) -> None:
+        index = gitindex.GitIndex(self.repository / "index")
+        self.assertIsNone(index.lookup("README.md"))
+        with open(self.repository / "index", "wb") as handle:
+            handle.write(b"DIRC" + bytes(40))
+        self.assertIsNone(index.lookup("README.md"))
@@ -53,6 +53,19 @@ class TestGitlabHost(unittest.TestCase):
             % test_util.get_tag(),
         )
 
+    def test_get_url_compare(self) -> None:
+        focus_range = typedefs.FocusRange("abcd", "...", "bcde")
+        self.assertEqual(
+            self.host.get_url(focus_range),
+            "https://gitlab.com/albertyw/git-browse/-/compare/abcd...bcde",
+        )
+        focus_range = typedefs.FocusRange("abcd", "..", "bcde")
+        self.assertEqual(
+            self.host.get_url(focus_range),
+            "https://gitlab.com/albertyw/git-browse/-/compare/abcd...bcde"
+            "?straight=true",
+        )
+
     def test_get_url_root(self) -> None:
         self.assertFalse(self.focus_object.is_commit_hash())
         self.assertTrue(self.focus_object.is_root())
@@ -105,3 +118,7 @@ class TestGitlabHost(unittest.TestCase):
             "https://gitlab.com/albertyw/git-browse/-/commit/%s"
             % test_util.get_tag(),
         )
+
+    def test_line_fragment(self) -> None:
+        self.assertEqual(self.host.line_fragment(3, 3), "#L3")
+        self.assertEqual(self.host.line_fragment(3, 5), "#L3-5")
@@ -1,8 +1,11 @@
 import os
+import pathlib
+import tempfile
 import unittest
 from typing import cast
 
 from git_browse import github, godocs, phabricator, typedefs
+from git_browse.benchmarks import fixtures
 
 
 class TestGodocsHost(unittest.TestCase):
@@ -54,6 +57,11 @@ class TestGodocsHost(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             self.obj.get_url(git_object)
 
+    def test_get_url_compare(self) -> None:
+        git_object = typedefs.FocusRange("abcd", "..", "bcde")
+        with self.assertRaises(NotImplementedError):
+            self.obj.get_url(git_object)
+
     def test_get_url_root(self) -> None:
         git_object = typedefs.FocusObject(os.sep)
         url = self.obj.get_url(git_object)
@@ -98,3 +106,28 @@ class TestGodocsHost(unittest.TestCase):
         git_object = typedefs.FocusObject("zxcv")
         with self.assertRaises(NotImplementedError):
             self.obj.get_url(git_object)
+
+    def test_get_url_module(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        repository = fixtures.create_repository(
+            pathlib.Path(temp_dir.name) / "repository",
+        )
+        (repository / "go.mod").write_text("module go.example.com/qwer\n")
+        (repository / "directory" / "go.mod").write_text(
+            "module go.example.com/nested\n",
+        )
+        fixtures.git(repository, "add", "--all")
+        self.obj.git_config.repository_root = repository
+        url = self.obj.get_url(typedefs.FocusObject(os.sep))
+        self.assertEqual(url, godocs.PUBLIC_GODOCS_URL + "go.example.com/qwer")
+        url = self.obj.get_url(typedefs.FocusObject("zxcv" + os.sep))
+        self.assertEqual(
+            url, godocs.PUBLIC_GODOCS_URL + "go.example.com/qwer/zxcv/",
+        )
+        url = self.obj.get_url(
+            typedefs.FocusObject(os.path.join("directory", "a", "")),
+        )
+        self.assertEqual(
+            url, godocs.PUBLIC_GODOCS_URL + "go.example.com/nested/a/",
+        )
@@ -0,0 +1,97 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from git_browse import gomod
+from git_browse.benchmarks import fixtures
+
+
+class TestParseModulePath(unittest.TestCase):
+    def test_parse(self) -> None:
+        for data, module_path in [
+            ("module example.com/a\n\ngo 1.21\n", "example.com/a"),
+            ("// comment\nmodule \"example.com/a\" // comment\n", "example.com/a"),
+            ("module `example.com/a`\n", "example.com/a"),
+            ("module (\n\texample.com/a\n)\n", "example.com/a"),
+            ("go 1.21\n", None),
+            ("// module example.com/a\n", None),
+        ]:
+            self.assertEqual(gomod.parse_module_path(data), module_path, data)
+
+
+class TestGoModuleIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        self.git_directory = self.repository / ".git"
+        self.write("go.mod", "module go.example.com/root\n")
+        self.write("tools/go.mod", "module go.example.com/tools\n")
+        self.write("tools/lint/v2/go.mod", "module go.example.com/lint/v2\n")
+        self.write("untracked/go.mod", "module go.example.com/untracked\n")
+        fixtures.git(
+            self.repository, "add", "go.mod", "tools/go.mod",
+            "tools/lint/v2/go.mod",
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write(self, path: str, data: str) -> None:
+        file_path = self.repository / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(data)
+
+    def test_package_path(self) -> None:
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        for directory, package_path in [
+            ("", "go.example.com/root"),
+            ("directory/", "go.example.com/root/directory"),
+            ("tools", "go.example.com/tools"),
+            ("tools/cmd/a", "go.example.com/tools/cmd/a"),
+            ("tools/lint/v2/rules", "go.example.com/lint/v2/rules"),
+            ("toolsx", "go.example.com/root/toolsx"),
+            ("untracked/a", "go.example.com/root/untracked/a"),
+        ]:
+            self.assertEqual(index.package_path(directory), package_path)
+
+    def test_is_stale(self) -> None:
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        self.assertFalse(index.is_stale())
+        self.assertFalse(
+            gomod.GoModuleIndex(self.repository, self.git_directory).is_stale(),
+        )
+        self.write("tools/go.mod", "module go.example.com/tools/v3\n\n")
+        self.assertTrue(index.is_stale())
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        fixtures.git(self.repository, "add", "untracked/go.mod")
+        self.assertTrue(index.is_stale())
+
+    def test_no_root_module(self) -> None:
+        fixtures.git(self.repository, "rm", "--cached", "--quiet", "go.mod")
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        self.assertIsNone(index.package_path("directory"))
+        self.assertEqual(index.package_path("tools"), "go.example.com/tools")
+
+    def test_cache(self) -> None:
+        gomod.GoModuleIndex(self.repository, self.git_directory)
+        cache_path = self.git_directory / gomod.GoModuleIndex.cache_file_name
+        with open(cache_path) as handle:
+            data = json.load(handle)
+        self.assertEqual(data["entries"]["tools"], "go.example.com/tools")
+        with patch("git_browse.cache.list_tracked_files") as mock_list:
+            index = gomod.GoModuleIndex(self.repository, self.git_directory)
+            mock_list.assert_not_called()
+        self.assertEqual(index.package_path("tools"), "go.example.com/tools")
+        # Editing a go.mod, or the git index, rebuilds the cache
+        self.write("tools/go.mod", "module go.example.com/tools/v3\n\n")
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        self.assertEqual(index.package_path("tools"), "go.example.com/tools/v3")
+        fixtures.git(self.repository, "add", "untracked/go.mod")
+        index = gomod.GoModuleIndex(self.repository, self.git_directory)
+        self.assertEqual(
+            index.package_path("untracked/a"), "go.example.com/untracked/a",
+        )
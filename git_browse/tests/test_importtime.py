@@ -0,0 +1,111 @@
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Optional
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+# Cumulative `-X importtime` cost of importing the entry point, best of a few
+# cold interpreters with warm bytecode.  Wall-clock time depends on the
+# machine, so it is checked against the standard library modules the entry
+# point builds on, measured the same way.
+IMPORT_TIME_BASELINE = ["argparse", "atexit", "json", "pathlib", "typing"]
+IMPORT_TIME_RATIO_BUDGET = 1.75
+IMPORT_TIME_RUNS = 5
+# Optional stricter budget in microseconds, e.g. 30000
+IMPORT_TIME_BUDGET_VARIABLE = "GIT_BROWSE_IMPORT_BUDGET_US"
+# Number of modules importing the entry point may add to a bare interpreter
+IMPORTED_MODULES_BUDGET = 51
+LAZY_MODULES = ["configparser", "subprocess", "tempfile", "webbrowser"]
+COUNT_MODULES = (
+    "import sys; before = set(sys.modules); import git_browse.browse; "
+    "print(len(set(sys.modules) - before))"
+)
+DRY_RUN = (
+    "import sys; from git_browse import browse; "
+    "sys.argv = ['git_browse', '--dry-run', 'README.md']; browse.main(); "
+    "print(' '.join(sorted(sys.modules)))"
+)
+
+IMPORT_SIDE_EFFECTS = (
+    "import sys; path = list(sys.path); import git_browse, git_browse.browse; "
+    "print(sys.path == path); "
+    "print(' '.join(sorted(m for m in sys.modules if m.startswith('git_')))); "
+    "print(git_browse.Resolver.__module__)"
+)
+
+
+def run_python(
+    *args: str, env: Optional[dict[str, str]] = None,
+) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        universal_newlines=True,
+        cwd=BASE_DIRECTORY,
+        env=env,
+        check=True,
+    )
+
+
+def get_import_time(modules: list[str], env: dict[str, str]) -> int:
+    """Return the summed cumulative import time of top level imports"""
+    process = run_python(
+        "-X", "importtime", "-c", "import %s" % ", ".join(modules), env=env,
+    )
+    import_time = 0
+    for line in process.stderr.splitlines():
+        fields = line.split("|")
+        # Nested imports are indented further and already counted
+        if len(fields) == 3 and fields[2][1:] in modules:
+            import_time += int(fields[1])
+    return import_time
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_time_budget(self) -> None:
+        with tempfile.TemporaryDirectory() as pycache:
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            modules = ["git_browse.browse"]
+            # Write bytecode so no run pays for compiling
+            run_python("-c", "import git_browse.browse", env=env)
+            run_python("-c", "import %s" % ", ".join(IMPORT_TIME_BASELINE), env=env)
+            import_time = min(
+                get_import_time(modules, env) for _ in range(IMPORT_TIME_RUNS)
+            )
+            baseline = min(
+                get_import_time(IMPORT_TIME_BASELINE, env)
+                for _ in range(IMPORT_TIME_RUNS)
+            )
+        self.assertLess(import_time, baseline * IMPORT_TIME_RATIO_BUDGET)
+        if os.environ.get(IMPORT_TIME_BUDGET_VARIABLE):
+            budget = int(os.environ[IMPORT_TIME_BUDGET_VARIABLE])
+            self.assertLess(import_time, budget)
+
+    def test_imported_modules_budget(self) -> None:
+        process = run_python("-c", COUNT_MODULES)
+        self.assertLessEqual(int(process.stdout), IMPORTED_MODULES_BUDGET)
+
+    def test_dry_run_lazy_modules(self) -> None:
+        process = run_python("-c", DRY_RUN)
+        url, modules = process.stdout.splitlines()
+        self.assertTrue(url.endswith("README.md"))
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules.split())
+        self.assertNotIn("git_browse.sourcegraph", modules.split())
+        self.assertNotIn("git_browse.godocs", modules.split())
+        self.assertNotIn("git_browse.refs", modules.split())
+        # Only the host module registered for the remote's hostname
+        self.assertNotIn("git_browse.gitlab", modules.split())
+        self.assertNotIn("git_browse.bitbucket", modules.split())
+
+    def test_import_side_effects(self) -> None:
+        process = run_python("-c", IMPORT_SIDE_EFFECTS)
+        unchanged_path, modules, resolver_module = process.stdout.splitlines()
+        self.assertEqual(unchanged_path, "True")
+        # The library api is only imported when it is used
+        self.assertNotIn("git_browse.resolver", modules.split())
+        self.assertEqual(resolver_module, "git_browse.resolver")
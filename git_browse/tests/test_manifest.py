@@ -0,0 +1,73 @@
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import github, manifest, typedefs
+from git_browse.benchmarks import fixtures
+
+
+REPOSITORY_URL = "https://github.com/albertyw/git-browse"
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        head = fixtures.git(self.repository, "rev-parse", "HEAD").strip()
+        fixtures.git(
+            self.repository, "update-index", "--add", "--cacheinfo",
+            "160000,%s,submodule" % head,
+        )
+        git_config = typedefs.GitConfig("", "master")
+        self.host = github.GithubHost(git_config, "albertyw", "git-browse")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_iter_tracked_paths(self) -> None:
+        paths = list(manifest.iter_tracked_paths(self.repository))
+        self.assertEqual(paths, [
+            (".arcconfig", False),
+            ("README.md", False),
+            ("directory/file", False),
+            ("submodule", True),
+        ])
+        paths = list(manifest.iter_tracked_paths(
+            self.repository / "directory", ["."],
+        ))
+        self.assertEqual(paths, [("directory/file", False)])
+
+    def test_not_a_repository(self) -> None:
+        with self.assertRaises(RuntimeError):
+            list(manifest.iter_tracked_paths(pathlib.Path(self.temp_dir.name)))
+
+    def test_write_tsv(self) -> None:
+        output = io.BytesIO()
+        count = manifest.write_manifest(
+            self.host, manifest.iter_tracked_paths(self.repository), output,
+        )
+        self.assertEqual(count, 4)
+        lines = output.getvalue().decode().splitlines()
+        self.assertEqual(
+            lines[1], "README.md\t%s/blob/master/README.md" % REPOSITORY_URL,
+        )
+        self.assertEqual(
+            lines[3], "submodule\t%s/tree/master/submodule/" % REPOSITORY_URL,
+        )
+
+    def test_write_jsonl(self) -> None:
+        output = io.BytesIO()
+        paths = iter([("a\t\"b\"", False), ("é", False)])
+        manifest.write_manifest(self.host, paths, output, "jsonl")
+        records = [
+            json.loads(line) for line in output.getvalue().splitlines()
+        ]
+        self.assertEqual(records[0], {
+            "path": "a\t\"b\"",
+            "url": "%s/blob/master/a\t\"b\"" % REPOSITORY_URL,
+        })
+        self.assertEqual(records[1]["path"], "é")
@@ -0,0 +1,177 @@
+import hashlib
+import pathlib
+import tempfile
+import threading
+import unittest
+
+from git_browse import objects
+from git_browse.benchmarks import fixtures
+
+
+def blob_hash(content: bytes) -> str:
+    header = b"blob %d\0" % len(content)
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def find_colliding_blob(prefix: str) -> bytes:
+    """Brute force a blob whose hash starts with prefix"""
+    index = 0
+    while True:
+        content = b"collision %d\n" % index
+        if blob_hash(content).startswith(prefix):
+            return content
+        index += 1
+
+
+class TestPrefix(unittest.TestCase):
+    def test_matches(self) -> None:
+        prefix = objects.Prefix("abc")
+        self.assertTrue(prefix.matches(bytes.fromhex("abcd")))
+        self.assertFalse(prefix.matches(bytes.fromhex("abdc")))
+        self.assertEqual(prefix.lower_bound, bytes.fromhex("abc0"))
+        self.assertTrue(objects.Prefix("abcd").matches(bytes.fromhex("abcd00")))
+
+    def test_is_abbreviated_hash(self) -> None:
+        self.assertTrue(objects.is_abbreviated_hash("abcd"))
+        self.assertFalse(objects.is_abbreviated_hash("abc"))
+        self.assertFalse(objects.is_abbreviated_hash("abcg"))
+        self.assertFalse(objects.is_abbreviated_hash("a" * 41))
+
+
+class TestObjectStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        for index in range(20):
+            with open(self.repository / "README.md", "a") as handle:
+                handle.write("line %d of a file that is deltified\n" % index)
+            fixtures.git(self.repository, "commit", "-qam", str(index))
+        self.head = fixtures.git(self.repository, "rev-parse", "HEAD").strip()
+        self.object_store = objects.ObjectStore(self.repository / ".git")
+
+    def tearDown(self) -> None:
+        self.object_store.close()
+        self.temp_dir.cleanup()
+
+    def write_blob(self, content: bytes) -> str:
+        return fixtures.git(
+            self.repository, "hash-object", "-w", "--stdin",
+            stdin=content.decode(),
+        ).strip()
+
+    def all_objects(self) -> dict[str, str]:
+        output = fixtures.git(
+            self.repository,
+            "cat-file",
+            "--batch-all-objects",
+            "--batch-check=%(objectname) %(objecttype)",
+        )
+        return dict(line.split() for line in output.splitlines())
+
+    def assert_store_matches_git(self) -> None:
+        for object_hash, object_type in self.all_objects().items():
+            self.assertEqual(
+                self.object_store.find_prefix(object_hash), [object_hash],
+            )
+            found = self.object_store.read_object(object_hash)
+            if found is not None:
+                self.assertEqual(found[0], object_type, object_hash)
+        self.assertEqual(self.object_store.resolve(self.head[:7]), self.head)
+        tag = fixtures.git(self.repository, "rev-parse", fixtures.TAG).strip()
+        self.assertEqual(
+            self.object_store.peel_to_commit(tag),
+            fixtures.git(self.repository, "rev-parse", "v1.0.0^{}").strip(),
+        )
+
+    def test_loose(self) -> None:
+        self.assert_store_matches_git()
+
+    def test_packed(self) -> None:
+        fixtures.git(self.repository, "gc", "--quiet", "--aggressive")
+        self.assertEqual(self.object_store.find_prefix(self.head[:5]), [
+            self.head,
+        ])
+        self.assert_store_matches_git()
+
+    def test_pack_index_v1(self) -> None:
+        fixtures.git(self.repository, "-c", "pack.indexVersion=1", "gc", "-q")
+        self.assert_store_matches_git()
+
+    def test_multi_pack_index(self) -> None:
+        fixtures.git(self.repository, "gc", "--quiet")
+        self.write_blob(b"second pack\n")
+        fixtures.git(self.repository, "repack", "-q")
+        fixtures.git(self.repository, "multi-pack-index", "write")
+        self.object_store.directories[0].refresh()
+        index = self.object_store.directories[0].indexes[0]
+        self.assertIsInstance(index, objects.MultiPackIndex)
+        self.assert_store_matches_git()
+
+    def test_deltified_tag(self) -> None:
+        message = "release notes shared by every tag\n" * 40
+        tags = {}
+        for index in range(5):
+            fixtures.git(self.repository, "commit", "-q", "--allow-empty", "-m", "t")
+            name = "release-%d" % index
+            fixtures.git(self.repository, "tag", "-a", name, "-m", message)
+            tags[fixtures.git(self.repository, "rev-parse", name).strip()] = (
+                fixtures.git(self.repository, "rev-parse", name + "^{}").strip()
+            )
+        fixtures.git(self.repository, "repack", "-adfq", "--window=250")
+        for tag, commit in tags.items():
+            # Deltified tags are left to git rather than peeled from their base
+            self.assertIn(self.object_store.peel_to_commit(tag), [commit, None])
+        self.assertIn(None, [
+            self.object_store.peel_to_commit(tag) for tag in tags
+        ])
+
+    def test_ambiguous(self) -> None:
+        content = b"ambiguous\n"
+        prefix = blob_hash(content)[:4]
+        first = self.write_blob(content)
+        second = self.write_blob(find_colliding_blob(prefix))
+        with self.assertRaises(objects.AmbiguousObjectError) as context:
+            self.object_store.resolve(prefix)
+        self.assertEqual(context.exception.candidates, sorted([first, second]))
+        self.assertIn("short object ID %s is ambiguous" % prefix, str(
+            context.exception,
+        ))
+        fixtures.git(self.repository, "gc", "--quiet")
+        with self.assertRaises(objects.AmbiguousObjectError):
+            self.object_store.resolve(prefix)
+        self.assertIsNone(self.object_store.resolve(first[:8]))
+
+    def test_commit_wins_ambiguity(self) -> None:
+        prefix = self.head[:4]
+        blob = self.write_blob(find_colliding_blob(prefix))
+        self.assertEqual(
+            self.object_store.find_prefix(prefix), sorted([self.head, blob]),
+        )
+        self.assertEqual(self.object_store.resolve(prefix), self.head)
+
+    def test_missing(self) -> None:
+        self.assertIsNone(self.object_store.resolve("0000000"))
+        self.assertIsNone(self.object_store.read_object("0" * 40))
+
+    def test_close_waits_for_lookup(self) -> None:
+        self.object_store.lock.acquire()
+        closer = threading.Thread(target=self.object_store.close)
+        closer.start()
+        closer.join(0.05)
+        self.assertTrue(closer.is_alive())
+        self.object_store.lock.release()
+        closer.join()
+        self.assertEqual(self.object_store.resolve(self.head[:7]), self.head)
+
+    def test_alternates(self) -> None:
+        borrower = pathlib.Path(self.temp_dir.name) / "borrower"
+        fixtures.git(
+            pathlib.Path(self.temp_dir.name),
+            "clone", "--quiet", "--shared", str(self.repository), str(borrower),
+        )
+        object_store = objects.ObjectStore(borrower / ".git")
+        self.assertEqual(len(object_store.directories), 2)
+        self.assertEqual(object_store.resolve(self.head[:7]), self.head)
+        object_store.close()
@@ -0,0 +1,168 @@
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from git_browse import browse, context, opener
+from git_browse.benchmarks import fixtures
+
+
+class TestOpener(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = pathlib.Path(self.temp_dir.name)
+        self.bin_directory = self.directory / "bin"
+        self.bin_directory.mkdir()
+        self.environ = {
+            "PATH": str(self.bin_directory),
+            "XDG_CACHE_HOME": str(self.directory / "cache"),
+            "DISPLAY": ":0",
+        }
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def install(self, name: str) -> str:
+        path = self.bin_directory / name
+        path.write_text("#!/bin/sh\n")
+        path.chmod(0o755)
+        return str(path)
+
+    def test_cache_path(self) -> None:
+        self.assertEqual(
+            opener.get_cache_path(self.environ),
+            self.directory / "cache" / "git-browse" / "opener.json",
+        )
+        self.assertEqual(
+            opener.get_cache_path({"HOME": "/home/a"}),
+            pathlib.Path("/home/a/.cache/git-browse/opener.json"),
+        )
+
+    @unittest.skipIf(sys.platform in ["darwin", "win32"], "desktop launchers")
+    def test_discover(self) -> None:
+        self.assertIsNone(opener.discover(self.environ))
+        firefox = self.install("firefox")
+        self.assertEqual(opener.discover(self.environ), [firefox])
+        gio = self.install("gio")
+        self.assertEqual(opener.discover(self.environ), [gio, "open"])
+        del self.environ["DISPLAY"]
+        self.assertIsNone(opener.discover(self.environ))
+        self.environ["BROWSER"] = "missing:firefox --new-tab %s"
+        self.assertEqual(
+            opener.discover(self.environ), [firefox, "--new-tab", "%s"],
+        )
+
+    @unittest.skipIf(sys.platform in ["darwin", "win32"], "desktop launchers")
+    def test_get_launcher(self) -> None:
+        xdg_open = self.install("xdg-open")
+        self.assertEqual(opener.get_launcher(self.environ), [xdg_open])
+        with open(opener.get_cache_path(self.environ)) as handle:
+            data = json.load(handle)
+        self.assertEqual(data["launcher"], [xdg_open])
+        with patch("git_browse.opener.discover") as mock_discover:
+            self.assertEqual(opener.get_launcher(self.environ), [xdg_open])
+            mock_discover.assert_not_called()
+        # Another display, or an uninstalled launcher, is discovered again
+        self.environ["DISPLAY"] = ":1"
+        self.assertIsNone(opener.load(self.environ))
+        opener.get_launcher(self.environ)
+        self.assertEqual(opener.load(self.environ), [xdg_open])
+        os.remove(xdg_open)
+        self.assertIsNone(opener.load(self.environ))
+        self.assertIsNone(opener.get_launcher(self.environ))
+        self.assertFalse(opener.get_cache_path(self.environ).exists())
+
+    def test_get_command(self) -> None:
+        self.assertEqual(
+            opener.get_command(["open"], "https://a"), ["open", "https://a"],
+        )
+        launcher = opener.parse_opener("'my browser' --url=%s")
+        self.assertEqual(
+            opener.get_command(launcher, "https://a"),
+            ["my browser", "--url=https://a"],
+        )
+
+
+class TestOpenBrowser(unittest.TestCase):
+    @patch("git_browse.browse.launch")
+    @patch("git_browse.opener.get_launcher")
+    @patch("git_browse.browse.get_configured_opener")
+    def test_configured(
+        self,
+        mock_configured: MagicMock,
+        mock_get_launcher: MagicMock,
+        mock_launch: MagicMock,
+    ) -> None:
+        mock_configured.return_value = "browser --url %s"
+        mock_launch.return_value = True
+        self.assertTrue(browse.open_browser("https://a"))
+        mock_launch.assert_called_once_with(
+            ["browser", "--url", "https://a"], wait=False,
+        )
+        mock_get_launcher.assert_not_called()
+
+    @patch("git_browse.browse.launch")
+    @patch("git_browse.opener.get_launcher")
+    @patch("git_browse.browse.get_configured_opener")
+    def test_revalidate(
+        self,
+        mock_configured: MagicMock,
+        mock_get_launcher: MagicMock,
+        mock_launch: MagicMock,
+    ) -> None:
+        mock_configured.return_value = None
+        mock_get_launcher.side_effect = [["/old"], ["/new"]]
+        mock_launch.side_effect = [False, True]
+        self.assertTrue(browse.open_browser("https://a", wait=True))
+        self.assertEqual(
+            [call.args[0] for call in mock_launch.call_args_list],
+            [["/old", "https://a"], ["/new", "https://a"]],
+        )
+        mock_get_launcher.assert_called_with(refresh=True)
+
+    @patch("git_browse.browse.launch")
+    @patch("git_browse.opener.get_launcher")
+    @patch("git_browse.browse.get_configured_opener")
+    def test_fallback(
+        self,
+        mock_configured: MagicMock,
+        mock_get_launcher: MagicMock,
+        mock_launch: MagicMock,
+    ) -> None:
+        mock_configured.return_value = None
+        mock_get_launcher.return_value = None
+        mock_launch.return_value = True
+        self.assertTrue(browse.open_browser("https://a"))
+        command = mock_launch.call_args.args[0]
+        self.assertEqual(command[0], sys.executable)
+        self.assertEqual(command[-1], "https://a")
+
+
+class TestGetConfiguredOpener(unittest.TestCase):
+    def test_repository_context(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = fixtures.create_repository(
+                pathlib.Path(temp_dir) / "repository",
+            )
+            fixtures.git(repository, "config", "browse.opener", "browser %s")
+            repository_context = context.RepositoryContext.discover(repository)
+            with patch("git_browse.context.RepositoryContext.discover") as mock:
+                configured_opener = browse.get_configured_opener(
+                    repository_context,
+                )
+                mock.assert_not_called()
+        self.assertEqual(configured_opener, "browser %s")
+
+    @patch("git_browse.browse.launch", MagicMock(return_value=True))
+    @patch("git_browse.browse.get_configured_opener")
+    def test_open_url_passes_context(self, mock_configured: MagicMock) -> None:
+        mock_configured.return_value = "browser"
+        repository_context = MagicMock()
+        with patch("builtins.print"):
+            browse.open_url(
+                "https://a", repository_context=repository_context,
+            )
+        mock_configured.assert_called_once_with(repository_context)
@@ -7,6 +7,7 @@ import unittest
 from unittest.mock import patch
 
 from git_browse import phabricator, typedefs
+from git_browse.benchmarks import fixtures
 from git_browse.tests import test_util
 
 
@@ -41,8 +42,8 @@ class TestPhabricatorHost(unittest.TestCase):
         repo = "gitolite@code.uber.internal:a/b"
         git_config = typedefs.GitConfig(repo, "master")
         git_config.try_url_match(phabricator.UBER_SSH_GITOLITE_URL)
-        with patch("git_browse.browse.get_repository_root") as mock_root:
-            mock_root.return_value = self.temp_dir_name
+        with patch("git_browse.context.RepositoryContext.discover") as mock:
+            mock.return_value.worktree_root = self.temp_dir_name
             host = phabricator.PhabricatorHost.create(git_config)
         phabricator_host = cast(phabricator.PhabricatorHost, host)
         self.assertEqual(
@@ -156,3 +157,87 @@ class TestPhabricatorHost(unittest.TestCase):
         self.assertEqual(
             url, "https://example.com/rASDF%s" % test_util.get_tag(),
         )
+
+    def test_compare_url(self) -> None:
+        focus_range = typedefs.FocusRange("abcd", "...", "bcde")
+        url = self.phabricator_host.get_url(focus_range)
+        self.assertEqual(
+            url,
+            "https://example.com/diffusion/ASDF/compare/"
+            "?head=bcde&against=abcd",
+        )
+
+    def test_line_fragment(self) -> None:
+        self.assertEqual(self.phabricator_host.line_fragment(3, 3), "$3")
+        self.assertEqual(self.phabricator_host.line_fragment(3, 5), "$3-5")
+
+
+class TestNestedProjects(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        self.write_arcconfig("", "ROOT")
+        self.write_arcconfig("services/a", "A")
+        self.write_arcconfig("services/a/vendor/b", "B")
+        fixtures.git(self.repository, "add", "--all")
+        # An untracked project is not indexed
+        self.write_arcconfig("services/c", "C")
+        git_config = typedefs.GitConfig("gitolite@code.uber.internal:a", "")
+        git_config.repository_root = self.repository
+        host = phabricator.PhabricatorHost.create(git_config)
+        self.host = cast(phabricator.PhabricatorHost, host)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write_arcconfig(self, directory: str, callsign: str) -> None:
+        data = {
+            "phabricator.uri": "https://example.com/",
+            "repository.callsign": callsign,
+        }
+        path = self.repository / directory / ".arcconfig"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+
+    def test_get_url(self) -> None:
+        for path, url in [
+            (os.sep, "ROOT/repository/master/"),
+            ("README.md", "ROOT/browse/master/README.md"),
+            ("services" + os.sep, "ROOT/browse/master/services/"),
+            (os.path.join("services", "a", ""), "A/repository/master/"),
+            (os.path.join("services", "a", "x.py"), "A/browse/master/x.py"),
+            (
+                os.path.join("services", "a", "vendor", "b", "c", ""),
+                "B/browse/master/c/",
+            ),
+            (
+                os.path.join("services", "c", "x.py"),
+                "ROOT/browse/master/services/c/x.py",
+            ),
+        ]:
+            self.assertEqual(
+                self.host.get_url(typedefs.FocusObject(path)),
+                "https://example.com/diffusion/" + url,
+            )
+        url = self.host.get_url(typedefs.FocusHash("abcd"))
+        self.assertEqual(url, "https://example.com/rROOTabcd")
+
+    def test_is_stale(self) -> None:
+        self.assertFalse(self.host.is_stale())
+        self.host.get_url(typedefs.FocusObject("services/a/x.py"))
+        self.assertFalse(self.host.is_stale())
+        self.write_arcconfig("services/a", "AA")
+        self.assertTrue(self.host.is_stale())
+
+    def test_projects_reused(self) -> None:
+        self.host.get_url(typedefs.FocusObject("services/a/x.py"))
+        project = self.host.projects["services/a"]
+        with patch("git_browse.cache.list_tracked_files") as mock_list:
+            host = phabricator.PhabricatorHost()
+            host.repository_root = self.repository
+            host.get_url(typedefs.FocusObject("services/a/y.py"))
+            self.host.get_url(typedefs.FocusObject("services/a/y.py"))
+            mock_list.assert_not_called()
+        self.assertIs(self.host.projects["services/a"], project)
@@ -0,0 +1,194 @@
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import catfile, context, refs
+from git_browse.benchmarks import fixtures
+from git_browse.tests import test_util
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+HASH_A = "a" * 40
+HASH_B = "b" * 40
+HASH_C = "c" * 40
+
+
+class TestPackedRefs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.temp_dir.name) / "packed-refs"
+        self.packed_refs = refs.PackedRefs(self.path)
+
+    def tearDown(self) -> None:
+        self.packed_refs.close()
+        self.temp_dir.cleanup()
+
+    def write(self, header: str, names: list[str]) -> None:
+        lines = [header] if header else []
+        for name in names:
+            lines.append("%s %s" % (HASH_A, name))
+            if name.startswith("refs/tags/annotated"):
+                lines.append("^%s" % HASH_B)
+        with open(self.path, "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+
+    def test_bisect(self) -> None:
+        names = sorted(
+            ["refs/heads/%d" % i for i in range(500)]
+            + ["refs/tags/annotated/%d" % i for i in range(500)]
+            + ["refs/tags/light/%d" % i for i in range(500)],
+        )
+        self.write("# pack-refs with: peeled fully-peeled sorted ", names)
+        for name in names:
+            value = self.packed_refs.lookup(name)
+            assert value, name
+            self.assertEqual(value.object_hash, HASH_A)
+            if name.startswith("refs/tags/annotated"):
+                self.assertEqual(value.peeled, HASH_B)
+            else:
+                self.assertEqual(value.peeled, HASH_A)
+        self.assertIsNone(self.packed_refs.lookup("refs/heads/asdf"))
+        self.assertIsNone(self.packed_refs.lookup("refs/a"))
+        self.assertIsNone(self.packed_refs.lookup("refs/z"))
+
+    def test_peeled_traits(self) -> None:
+        self.write(
+            "# pack-refs with: peeled sorted ",
+            ["refs/heads/master", "refs/tags/light"],
+        )
+        value = self.packed_refs.lookup("refs/heads/master")
+        self.assertEqual(value, refs.RefValue(HASH_A, None))
+        value = self.packed_refs.lookup("refs/tags/light")
+        self.assertEqual(value, refs.RefValue(HASH_A, HASH_A))
+
+    def test_unsorted(self) -> None:
+        self.write("", [
+            "refs/tags/annotated", "refs/heads/b", "refs/heads/a",
+        ])
+        value = self.packed_refs.lookup("refs/tags/annotated")
+        self.assertEqual(value, refs.RefValue(HASH_A, HASH_B))
+        self.assertIsNotNone(self.packed_refs.lookup("refs/heads/a"))
+        self.assertIsNone(self.packed_refs.lookup("refs/heads/c"))
+
+    def test_rewritten(self) -> None:
+        self.assertIsNone(self.packed_refs.lookup("refs/heads/a"))
+        self.write("# pack-refs with: sorted ", ["refs/heads/a"])
+        self.assertIsNotNone(self.packed_refs.lookup("refs/heads/a"))
+        self.write("# pack-refs with: sorted ", ["refs/heads/b"])
+        self.assertIsNotNone(self.packed_refs.lookup("refs/heads/b"))
+        self.write("", [])
+        self.assertIsNone(self.packed_refs.lookup("refs/heads/b"))
+
+
+class TestRefStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.git_directory = pathlib.Path(self.temp_dir.name) / ".git"
+        (self.git_directory / "refs" / "heads").mkdir(parents=True)
+        self.ref_store = refs.RefStore(self.git_directory, self.git_directory)
+
+    def tearDown(self) -> None:
+        self.ref_store.close()
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, data: str) -> None:
+        path = self.git_directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as handle:
+            handle.write(data + "\n")
+
+    def test_resolve_loose(self) -> None:
+        self.write("HEAD", "ref: refs/heads/master")
+        self.write("refs/heads/master", HASH_A)
+        self.write("refs/heads/feature/a", HASH_B)
+        self.write("FETCH_HEAD", "%s\t\tbranch 'x' of y" % HASH_C)
+        self.assertEqual(self.ref_store.resolve("HEAD"), HASH_A)
+        self.assertEqual(self.ref_store.resolve("@"), HASH_A)
+        self.assertEqual(self.ref_store.resolve("master"), HASH_A)
+        self.assertEqual(self.ref_store.resolve("heads/feature/a"), HASH_B)
+        self.assertEqual(self.ref_store.resolve("refs/heads/feature/a"), HASH_B)
+        self.assertEqual(self.ref_store.resolve("FETCH_HEAD"), HASH_C)
+        self.assertIsNone(self.ref_store.resolve("feature"))
+        self.assertIsNone(self.ref_store.resolve("config"))
+
+    def test_resolve_packed(self) -> None:
+        self.write("packed-refs", (
+            "# pack-refs with: peeled fully-peeled sorted \n"
+            "%s refs/heads/master\n"
+            "%s refs/remotes/origin/master\n"
+            "%s refs/tags/v1\n"
+            "^%s" % (HASH_A, HASH_B, HASH_C, HASH_B)
+        ))
+        self.write("refs/heads/master", HASH_C)
+        self.assertEqual(self.ref_store.resolve("master"), HASH_C)
+        self.assertEqual(self.ref_store.resolve("origin/master"), HASH_B)
+        self.assertEqual(self.ref_store.resolve("v1"), HASH_B)
+
+    def test_resolve_symref_loop(self) -> None:
+        self.write("refs/heads/a", "ref: refs/heads/b")
+        self.write("refs/heads/b", "ref: refs/heads/a")
+        self.assertIsNone(self.ref_store.resolve("a"))
+        self.write("refs/heads/c", "asdf")
+        self.assertIsNone(self.ref_store.resolve("c"))
+
+    def test_revision_syntax(self) -> None:
+        for identifier in [
+            "HEAD~1", "master^", "HEAD:README.md", "@{-1}", "a..b", "", HASH_A,
+            "-a", "a.lock", "a b",
+        ]:
+            self.assertIsNone(self.ref_store.resolve(identifier), identifier)
+
+    def test_remote_head(self) -> None:
+        self.assertIsNone(self.ref_store.remote_head())
+        self.write("refs/remotes/origin/HEAD", "ref: refs/remotes/origin/main")
+        self.assertEqual(self.ref_store.remote_head(), "main")
+        self.write("refs/remotes/origin/HEAD", "ref: refs/heads/main")
+        self.assertIsNone(self.ref_store.remote_head())
+        self.write("refs/remotes/origin/HEAD", HASH_A)
+        self.assertIsNone(self.ref_store.remote_head())
+
+    def test_per_worktree_refs(self) -> None:
+        worktree_directory = self.git_directory / "worktrees" / "a"
+        ref_store = refs.RefStore(worktree_directory, self.git_directory)
+        self.assertEqual(
+            ref_store.ref_path("HEAD"), worktree_directory / "HEAD",
+        )
+        self.assertEqual(
+            ref_store.ref_path("refs/bisect/bad"),
+            worktree_directory / "refs" / "bisect" / "bad",
+        )
+        self.assertEqual(
+            ref_store.ref_path("refs/heads/a"),
+            self.git_directory / "refs" / "heads" / "a",
+        )
+
+
+class TestRefStoreRepository(unittest.TestCase):
+    def test_annotated_tags(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = fixtures.create_repository(
+                pathlib.Path(temp_dir) / "repository",
+            )
+            repository_context = context.RepositoryContext.discover(repository)
+            ref_store = refs.RefStore.from_context(repository_context)
+            resolver = catfile.CommitResolver(repository)
+            head = resolver.resolve("HEAD")
+            # Loose annotated tags are peeled by reading the tag object
+            self.assertEqual(ref_store.resolve(fixtures.TAG), head)
+            fixtures.git(repository, "pack-refs", "--all")
+            self.assertEqual(ref_store.resolve(fixtures.TAG), head)
+            self.assertEqual(ref_store.resolve("master"), head)
+            fixtures.git(repository, "gc", "--quiet")
+            self.assertEqual(ref_store.resolve(fixtures.TAG), head)
+            resolver.close()
+            ref_store.close()
+
+    def test_matches_git(self) -> None:
+        repository_context = context.RepositoryContext.discover(BASE_DIRECTORY)
+        ref_store = refs.RefStore.from_context(repository_context)
+        resolver = catfile.CommitResolver(BASE_DIRECTORY)
+        for identifier in ["HEAD", test_util.get_tag()]:
+            self.assertEqual(
+                ref_store.resolve(identifier), resolver.resolve(identifier),
+            )
+        resolver.close()
+        ref_store.close()
@@ -0,0 +1,122 @@
+import pathlib
+import tempfile
+import unittest
+
+import git_browse
+from git_browse import browse, resolver
+from git_browse.benchmarks import fixtures
+
+
+REPOSITORY_URL = "https://github.com/albertyw/git-browse"
+
+
+class TestResolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        fixtures.git(
+            self.repository, "remote", "add", "upstream",
+            "https://gitlab.com/a/b",
+        )
+        self.resolver = git_browse.Resolver(self.repository)
+
+    def tearDown(self) -> None:
+        self.resolver.close()
+        self.temp_dir.cleanup()
+
+    def test_exported(self) -> None:
+        self.assertIs(git_browse.Resolver, resolver.Resolver)
+        with self.assertRaises(AttributeError):
+            git_browse.asdf  # noqa: B018
+
+    def test_resolve(self) -> None:
+        self.assertEqual(self.resolver.resolve(), REPOSITORY_URL)
+        self.assertEqual(
+            self.resolver.resolve("README.md"),
+            REPOSITORY_URL + "/blob/master/README.md",
+        )
+        self.assertEqual(
+            self.resolver.resolve("file", "directory"),
+            REPOSITORY_URL + "/blob/master/directory/file",
+        )
+        head = fixtures.git(self.repository, "rev-parse", "HEAD").strip()
+        self.assertEqual(
+            self.resolver.resolve("HEAD"),
+            REPOSITORY_URL + "/commit/" + head,
+        )
+        with self.assertRaises(FileNotFoundError):
+            self.resolver.resolve("asdf")
+
+    def test_remote(self) -> None:
+        self.assertEqual(
+            self.resolver.resolve("README.md", remote="upstream"),
+            "https://gitlab.com/a/b/-/blob/master/README.md",
+        )
+        with self.assertRaises(ValueError):
+            self.resolver.resolve(remote="asdf")
+
+    def test_memoized_hosts(self) -> None:
+        host = self.resolver.get_host()
+        self.assertIs(self.resolver.get_host(), host)
+        upstream = self.resolver.get_host("upstream")
+        self.assertIs(self.resolver.get_host("upstream"), upstream)
+        self.assertIsNot(upstream, host)
+
+    def test_config_changed(self) -> None:
+        self.assertEqual(self.resolver.resolve(), REPOSITORY_URL)
+        upstream = self.resolver.get_host("upstream")
+        fixtures.git(
+            self.repository, "remote", "set-url", "origin",
+            "https://gitlab.com/c/d",
+        )
+        fixtures.git(
+            self.repository, "remote", "set-url", "upstream",
+            "https://gitlab.com/e/f",
+        )
+        self.assertEqual(self.resolver.resolve(), "https://gitlab.com/c/d")
+        self.assertIsNot(self.resolver.get_host("upstream"), upstream)
+        self.assertEqual(
+            self.resolver.resolve(remote="upstream"), "https://gitlab.com/e/f",
+        )
+
+    def test_stale_module_index(self) -> None:
+        (self.repository / "go.mod").write_text("module go.example.com/a\n")
+        fixtures.git(self.repository, "add", "go.mod")
+        godocs_resolver = git_browse.Resolver(self.repository, godocs=True)
+        self.addCleanup(godocs_resolver.close)
+        self.assertEqual(
+            godocs_resolver.resolve("directory"),
+            "https://godocs.io/go.example.com/a/directory/",
+        )
+        host = godocs_resolver.get_host()
+        self.assertIs(godocs_resolver.get_host(), host)
+        (self.repository / "go.mod").write_text("module go.example.com/b/v2\n")
+        self.assertEqual(
+            godocs_resolver.resolve("directory"),
+            "https://godocs.io/go.example.com/b/v2/directory/",
+        )
+        self.assertIsNot(godocs_resolver.get_host(), host)
+
+    def test_resolve_many(self) -> None:
+        results = self.resolver.resolve_many(["README.md", "asdf"])
+        self.assertEqual(results[0], resolver.TargetResult(
+            "README.md", REPOSITORY_URL + "/blob/master/README.md", None,
+        ))
+        self.assertEqual(results[1].target, "asdf")
+        self.assertIsNone(results[1].url)
+        self.assertIn("does not exist", str(results[1].error))
+
+    def test_close(self) -> None:
+        with git_browse.Resolver(self.repository) as other:
+            other.resolve("HEAD")
+            self.assertIsNotNone(other.commit_resolver)
+            git_directory = other.context.git_directory
+        self.assertIsNone(other.commit_resolver)
+        self.assertNotIn(git_directory, browse.REF_STORES)
+        self.assertNotIn(git_directory, browse.INDEXES)
+
+    def test_not_a_repository(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            git_browse.Resolver(pathlib.Path(self.temp_dir.name))
@@ -0,0 +1,67 @@
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+from git_browse import github, revlist, typedefs
+from git_browse.benchmarks import fixtures
+
+
+REPOSITORY_URL = "https://github.com/albertyw/git-browse"
+
+
+class TestRevlist(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = fixtures.create_repository(
+            pathlib.Path(self.temp_dir.name) / "repository",
+        )
+        self.commits = [
+            fixtures.git(self.repository, "rev-parse", "HEAD").strip(),
+        ]
+        for message in ["second", "third"]:
+            fixtures.git(
+                self.repository, "commit", "--allow-empty", "-m", message,
+            )
+            self.commits.append(
+                fixtures.git(self.repository, "rev-parse", "HEAD").strip(),
+            )
+        git_config = typedefs.GitConfig("", "master")
+        self.host = github.GithubHost(git_config, "albertyw", "git-browse")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_iter_commits(self) -> None:
+        focus_range = typedefs.FocusRange(
+            self.commits[0], "..", self.commits[2],
+        )
+        commits = list(revlist.iter_commits(self.repository, focus_range))
+        self.assertEqual(commits, [self.commits[2], self.commits[1]])
+        focus_range = typedefs.FocusRange(
+            self.commits[2], "...", self.commits[0],
+        )
+        commits = list(revlist.iter_commits(self.repository, focus_range))
+        self.assertEqual(commits, [self.commits[2], self.commits[1]])
+
+    def test_unknown_commit(self) -> None:
+        focus_range = typedefs.FocusRange("0" * 40, "..", self.commits[0])
+        with self.assertRaises(RuntimeError):
+            list(revlist.iter_commits(self.repository, focus_range))
+
+    def test_write_commit_urls(self) -> None:
+        output = io.BytesIO()
+        count = revlist.write_commit_urls(
+            self.host, iter(self.commits), output,
+        )
+        self.assertEqual(count, 3)
+        self.assertEqual(output.getvalue().decode().splitlines(), [
+            "%s/commit/%s" % (REPOSITORY_URL, commit) for commit in self.commits
+        ])
+        output = io.BytesIO()
+        revlist.write_commit_urls(self.host, iter(self.commits[:1]), output, True)
+        self.assertEqual(json.loads(output.getvalue()), {
+            "commit": self.commits[0],
+            "url": "%s/commit/%s" % (REPOSITORY_URL, self.commits[0]),
+        })
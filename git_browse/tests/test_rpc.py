@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import pathlib
+import unittest
+from unittest.mock import patch
+
+from git_browse import rpc
+
+BASE_DIRECTORY = pathlib.Path(__file__).parents[2]
+REPOSITORY_URL = "https://github.com/albertyw/git-browse"
+
+
+class TestStdioServer(unittest.TestCase):
+    def setUp(self) -> None:
+        os.chdir(BASE_DIRECTORY)
+        self.server = rpc.StdioServer()
+
+    def tearDown(self) -> None:
+        self.server.pool.close()
+        os.chdir(BASE_DIRECTORY)
+
+    def call(self, method: str, params: object) -> dict[str, object]:
+        message = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        response = self.server.handle(json.dumps(message))
+        assert response is not None
+        self.assertEqual(response["id"], 1)
+        return response
+
+    def test_resolve(self) -> None:
+        response = self.call("resolve", {"path": "README.md"})
+        self.assertEqual(response["result"], {
+            "url": REPOSITORY_URL + "/blob/master/README.md",
+            "kind": "file",
+        })
+
+    def test_resolve_absolute_path(self) -> None:
+        path = str(BASE_DIRECTORY / "git_browse" / "browse.py")
+        response = self.call("resolve", {"path": path, "line_range": [3, 5]})
+        self.assertEqual(response["result"], {
+            "url": REPOSITORY_URL + "/blob/master/git_browse/browse.py#L3-L5",
+            "kind": "file",
+        })
+        os.chdir(os.sep)
+        response = self.call("resolve", {"path": "README.md"})
+        self.assertIn("result", response)
+
+    def test_resolve_directory_mode(self) -> None:
+        response = self.call(
+            "resolve",
+            {"path": "git_browse", "mode": "sourcegraph", "line_range": [1]},
+        )
+        self.assertEqual(response["result"], {
+            "url": "https://sourcegraph.com/github.com/albertyw/git-browse"
+            "/-/tree/git_browse/",
+            "kind": "directory",
+        })
+
+    def test_resolve_errors(self) -> None:
+        response = self.call("resolve", {"path": "asdf"})
+        error = response["error"]
+        assert isinstance(error, dict)
+        self.assertEqual(error["code"], rpc.RESOLVE_ERROR)
+        response = self.call("resolve", {"path": "README.md", "mode": "asdf"})
+        error = response["error"]
+        assert isinstance(error, dict)
+        self.assertEqual(error["code"], rpc.INVALID_PARAMS)
+        response = self.call(
+            "resolve", {"path": "README.md", "line_range": [5, 3]},
+        )
+        self.assertIn("error", response)
+        response = self.call("resolve", {})
+        self.assertIn("error", response)
+        response = self.call("resolve", [])
+        self.assertIn("error", response)
+        for params in [
+            {"path": "README.md", "mode": ["x"]},
+            {"path": ["README.md"]},
+        ]:
+            response = self.call("resolve", params)
+            error = response["error"]
+            assert isinstance(error, dict)
+            self.assertEqual(error["code"], rpc.INVALID_PARAMS)
+        response = self.call("invalidate", {"path": {}})
+        error = response["error"]
+        assert isinstance(error, dict)
+        self.assertEqual(error["code"], rpc.INVALID_PARAMS)
+
+    def test_internal_error(self) -> None:
+        with patch.object(self.server.pool, "get", side_effect=KeyError("a")):
+            response = self.call("resolve", {"path": "README.md"})
+        error = response["error"]
+        assert isinstance(error, dict)
+        self.assertEqual(error["code"], rpc.INTERNAL_ERROR)
+        response = self.call("resolve", {"path": "README.md"})
+        self.assertIn("result", response)
+
+    def test_resolve_many(self) -> None:
+        response = self.call("resolveMany", {"items": [
+            {"path": "README.md", "line_range": [2, 2]},
+            {"path": "asdf"},
+            "asdf",
+        ]})
+        result = response["result"]
+        assert isinstance(result, list)
+        self.assertEqual(
+            result[0]["url"], REPOSITORY_URL + "/blob/master/README.md#L2",
+        )
+        self.assertEqual(result[1]["error"]["code"], rpc.RESOLVE_ERROR)
+        self.assertEqual(result[2]["error"]["code"], rpc.INVALID_PARAMS)
+        response = self.call("resolveMany", {})
+        self.assertIn("error", response)
+
+    def test_invalidate(self) -> None:
+        self.call("resolve", {"path": "README.md"})
+        self.assertEqual(list(self.server.pool.repositories), [BASE_DIRECTORY])
+        self.call("invalidate", {"path": "README.md"})
+        self.assertEqual(self.server.pool.repositories, {})
+        self.call("resolve", {"path": "README.md"})
+        response = self.call("invalidate", {})
+        self.assertEqual(response["result"], None)
+        self.assertEqual(self.server.pool.repositories, {})
+
+    def test_protocol_errors(self) -> None:
+        response = self.server.handle("asdf")
+        assert response
+        self.assertEqual(response["error"]["code"], rpc.PARSE_ERROR)
+        response = self.server.handle("[]")
+        assert response
+        self.assertEqual(response["error"]["code"], rpc.INVALID_REQUEST)
+        response = self.call("asdf", {})
+        error = response["error"]
+        assert isinstance(error, dict)
+        self.assertEqual(error["code"], rpc.METHOD_NOT_FOUND)
+        response = self.server.handle(json.dumps(
+            {"jsonrpc": "2.0", "id": 1, "method": ["resolve"]},
+        ))
+        assert response
+        self.assertEqual(response["error"]["code"], rpc.INVALID_REQUEST)
+
+    def test_notification(self) -> None:
+        message = {"jsonrpc": "2.0", "method": "invalidate", "params": {}}
+        self.assertIsNone(self.server.handle(json.dumps(message)))
+
+    def test_serve(self) -> None:
+        requests = [
+            {"jsonrpc": "2.0", "id": 1, "method": "resolve",
+             "params": {"path": "README.md"}},
+            {"jsonrpc": "2.0", "method": "invalidate"},
+            {"jsonrpc": "2.0", "id": 2, "method": "resolve",
+             "params": {"path": "git_browse"}},
+        ]
+        stdin = io.StringIO(
+            "\n".join(json.dumps(request) for request in requests) + "\n\n",
+        )
+        stdout = io.StringIO()
+        self.server.serve(stdin, stdout)
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([response["id"] for response in responses], [1, 2])
+        self.assertEqual(
+            responses[1]["result"]["url"],
+            REPOSITORY_URL + "/tree/master/git_browse/",
+        )
@@ -60,6 +60,15 @@ class SourcegraphHost(unittest.TestCase):
             + "github.com/albertyw/git-browse/-/commit/abcd",
         )
 
+    def test_get_url_compare(self) -> None:
+        git_object = typedefs.FocusRange("abcd", "...", "bcde")
+        url = self.obj.get_url(git_object)
+        self.assertEqual(
+            url,
+            sourcegraph.PUBLIC_SOURCEGRAPH_URL
+            + "github.com/albertyw/git-browse/-/compare/abcd...bcde",
+        )
+
     def test_get_url_root(self) -> None:
         git_object = typedefs.FocusObject(os.sep)
         url = self.obj.get_url(git_object)
@@ -155,3 +164,7 @@ class SourcegraphHost(unittest.TestCase):
             sourcegraph.UBER_SOURCEGRAPH_URL
             + "code.uber.internal/uber-objectconfig/asdf---production",
         )
+
+    def test_line_fragment(self) -> None:
+        self.assertEqual(self.obj.line_fragment(3, 3), "?L3")
+        self.assertEqual(self.obj.line_fragment(3, 5), "?L3-5")
@@ -0,0 +1,67 @@
+import io
+import json
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+
+from git_browse import trace
+
+
+class TestTrace(unittest.TestCase):
+    def tearDown(self) -> None:
+        trace.stop()
+
+    def test_disabled(self) -> None:
+        self.assertIsNone(trace.TRACER)
+        self.assertIs(trace.span("asdf"), trace.NULL_SPAN)
+        with trace.span("asdf"):
+            pass
+        self.assertIsNone(trace.stop())
+
+    def test_spans(self) -> None:
+        tracer = trace.start()
+        with trace.span("outer"):
+            with trace.span("git", trace.SUBPROCESS):
+                time.sleep(0.001)
+        inner, outer = tracer.spans
+        self.assertEqual(inner.name, "git")
+        self.assertEqual(inner.category, trace.SUBPROCESS)
+        self.assertGreaterEqual(inner.duration, 1000000)
+        self.assertEqual(outer.category, trace.STAGE)
+        self.assertLessEqual(outer.start, inner.start)
+        self.assertGreaterEqual(outer.duration, inner.duration)
+        self.assertEqual(outer.thread_id, threading.get_ident())
+        self.assertIs(trace.stop(), tracer)
+
+    def test_origin(self) -> None:
+        started = time.perf_counter_ns()
+        tracer = trace.start(started)
+        tracer.record("parse", trace.STAGE, started, started + 2000000)
+        self.assertEqual(tracer.spans[0].start, 0)
+        self.assertEqual(tracer.spans[0].duration, 2000000)
+
+    def test_report(self) -> None:
+        tracer = trace.start()
+        tracer.record("second", trace.STAGE, tracer.origin + 5, tracer.origin + 6)
+        tracer.record("first", trace.STAGE, tracer.origin, tracer.origin + 10)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        trace_path = pathlib.Path(temp_dir.name) / "trace.json"
+        output = io.StringIO()
+        trace.report(output, str(trace_path))
+        self.assertIsNone(trace.TRACER)
+        lines = output.getvalue().splitlines()
+        self.assertIn("took ms", lines[0])
+        self.assertTrue(lines[1].endswith("first"))
+        self.assertTrue(lines[2].endswith("second"))
+        self.assertTrue(lines[3].endswith("total"))
+        with open(trace_path) as handle:
+            data = json.load(handle)
+        event = data["traceEvents"][0]
+        self.assertEqual(event["name"], "second")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["ts"], 0.005)
+        self.assertEqual(event["dur"], 0.001)
+        trace.report(output, str(trace_path))
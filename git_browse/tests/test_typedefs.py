@@ -8,6 +8,10 @@ class TestGitObject(unittest.TestCase):
         obj = typedefs.GitObject("abcde")
         self.assertFalse(obj.is_commit_hash())
 
+    def test_is_commit_range(self) -> None:
+        obj = typedefs.GitObject("abcde..bcdef")
+        self.assertFalse(obj.is_commit_range())
+
     def test_is_root(self) -> None:
         obj = typedefs.GitObject("/")
         self.assertFalse(obj.is_root())
@@ -51,3 +55,19 @@ class TestFocusHash(unittest.TestCase):
     def test_is_commit_hash(self) -> None:
         obj = typedefs.FocusHash("abcde")
         self.assertTrue(obj.is_commit_hash())
+
+
+class TestFocusRange(unittest.TestCase):
+    def test_init(self) -> None:
+        obj = typedefs.FocusRange("abcde", "..", "bcdef")
+        self.assertEqual(obj.identifier, "abcde..bcdef")
+        self.assertEqual(obj.start, "abcde")
+        self.assertEqual(obj.end, "bcdef")
+        self.assertTrue(obj.is_commit_range())
+        self.assertFalse(obj.is_commit_hash())
+        self.assertFalse(obj.is_merge_base())
+
+    def test_is_merge_base(self) -> None:
+        obj = typedefs.FocusRange("abcde", "...", "bcdef")
+        self.assertEqual(obj.identifier, "abcde...bcdef")
+        self.assertTrue(obj.is_merge_base())
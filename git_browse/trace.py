@@ -0,0 +1,136 @@
+"""
+Opt-in timing of each stage of a run and of every subprocess it starts.
+When tracing is off, span() hands back a shared no-op context manager, so
+instrumented code pays for one function call and a global lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import time
+from typing import NamedTuple, Optional, TextIO, Union
+
+
+ENVIRONMENT_VARIABLE = "GIT_BROWSE_TRACE"
+STAGE = "stage"
+SUBPROCESS = "subprocess"
+
+
+class Span(NamedTuple):
+    name: str
+    category: str
+    start: int
+    duration: int
+    thread_id: int
+
+
+class NullSpan(object):
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: object) -> None:
+        return None
+
+
+NULL_SPAN = NullSpan()
+
+
+class ActiveSpan(object):
+    def __init__(self, tracer: Tracer, name: str, category: str) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.start = 0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *args: object) -> None:
+        self.tracer.record(
+            self.name, self.category, self.start, time.perf_counter_ns(),
+        )
+
+
+class Tracer(object):
+    """Collects spans, with times in nanoseconds from a monotonic clock"""
+
+    def __init__(self, origin: Optional[int] = None) -> None:
+        import threading  # noqa: PLC0415
+
+        self.get_ident = threading.get_ident
+        self.origin = time.perf_counter_ns() if origin is None else origin
+        # Appending to a list is atomic, so worker threads need no lock
+        self.spans: list[Span] = []
+
+    def span(self, name: str, category: str = STAGE) -> ActiveSpan:
+        return ActiveSpan(self, name, category)
+
+    def record(self, name: str, category: str, start: int, end: int) -> None:
+        self.spans.append(Span(
+            name, category, start - self.origin, end - start, self.get_ident(),
+        ))
+
+    def write_table(self, output: TextIO) -> None:
+        """Write the spans in start order as a table of milliseconds"""
+        output.write("%10s %10s  %-10s  %s\n" % (
+            "start ms", "took ms", "category", "name",
+        ))
+        for span in sorted(self.spans, key=lambda span: span.start):
+            output.write("%10.3f %10.3f  %-10s  %s\n" % (
+                span.start / 1e6, span.duration / 1e6, span.category, span.name,
+            ))
+        elapsed = time.perf_counter_ns() - self.origin
+        output.write("%10s %10.3f  %-10s  %s\n" % ("", elapsed / 1e6, "", "total"))
+
+    def write_chrome_trace(self, path: pathlib.Path) -> None:
+        """Write the spans as Chrome trace-event JSON, for about:tracing"""
+        process_id = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start / 1e3,
+                "dur": span.duration / 1e3,
+                "pid": process_id,
+                "tid": span.thread_id,
+            }
+            for span in self.spans
+        ]
+        with open(path, "w") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+
+
+TRACER: Optional[Tracer] = None
+
+
+def span(name: str, category: str = STAGE) -> Union[ActiveSpan, NullSpan]:
+    """Time a block of code if tracing is on"""
+    if TRACER is None:
+        return NULL_SPAN
+    return TRACER.span(name, category)
+
+
+def start(origin: Optional[int] = None) -> Tracer:
+    global TRACER  # noqa: PLW0603
+    TRACER = Tracer(origin)
+    return TRACER
+
+
+def stop() -> Optional[Tracer]:
+    global TRACER  # noqa: PLW0603
+    tracer, TRACER = TRACER, None
+    return tracer
+
+
+def report(table_output: Optional[TextIO], trace_path: Optional[str]) -> None:
+    """Stop tracing and write out the spans collected so far"""
+    tracer = stop()
+    if tracer is None:
+        return
+    if table_output is not None:
+        tracer.write_table(table_output)
+    if trace_path:
+        tracer.write_chrome_trace(pathlib.Path(trace_path))
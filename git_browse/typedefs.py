@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 import os
+import pathlib
 import re
-from typing import Match, Optional
+from typing import Match, Optional, Union
 
 
 USER_REGEX = "(?P<user>[\\w\\.@:\\/~_-]+)"
@@ -11,16 +12,36 @@ REPOSITORY_REGEX = "(?P<repository>[\\w\\.@:\\/~_-]+)"
 ACCOUNT_REGEX = "(?P<account>[\\w\\.@:\\/~_-]+)"
 
 
+class CachedMatch(object):
+    """Stand-in for a regex match whose groups were loaded from a cache"""
+
+    def __init__(self, groups: dict[str, str]) -> None:
+        self.groups = groups
+
+    def group(self, name: str) -> str:
+        if name not in self.groups:
+            raise IndexError("no such group")
+        return self.groups[name]
+
+    def groupdict(self) -> dict[str, str]:
+        return dict(self.groups)
+
+
 class GitConfig(object):
     def __init__(self, git_url: str, default_branch: str) -> None:
         self.git_url = git_url
         self.default_branch = default_branch
-        self.url_regex_match: Optional[Match[str]] = None
+        self.url_regex_match: Optional[Union[Match[str], CachedMatch]] = None
+        self.host_regex: Optional[str] = None
+        self.repository_root: Optional[pathlib.Path] = None
+        # The web url of a host configured in git config, with a trailing slash
+        self.base_url: Optional[str] = None
 
     def try_url_match(self, regex: str) -> bool:
         match = re.search(regex, self.git_url)
         if match:
             self.url_regex_match = match
+            self.host_regex = regex
             return True
         return False
 
@@ -58,6 +79,14 @@ class Host(metaclass=ABCMeta):
     def get_url(self, git_object: GitObject) -> str:  # pragma: no cover
         pass
 
+    def line_fragment(self, start: int, end: int) -> str:
+        """Suffix for a file url that highlights lines start through end"""
+        return ""
+
+    def is_stale(self) -> bool:
+        """Whether files the host read from the checkout have since changed"""
+        return False
+
 
 class GitObject:
     def __init__(self, identifier: str) -> None:
@@ -66,6 +95,9 @@ class GitObject:
     def is_commit_hash(self) -> bool:
         return False
 
+    def is_commit_range(self) -> bool:
+        return False
+
     def is_root(self) -> bool:
         return False
 
@@ -88,3 +120,22 @@ class FocusObject(GitObject):
 class FocusHash(GitObject):
     def is_commit_hash(self) -> bool:
         return True
+
+
+class FocusRange(GitObject):
+    """
+    Two commits joined by ".." to compare them directly, or by "..." to
+    compare from their merge base
+    """
+
+    def __init__(self, start: str, operator: str, end: str) -> None:
+        super().__init__(start + operator + end)
+        self.start = start
+        self.operator = operator
+        self.end = end
+
+    def is_commit_range(self) -> bool:
+        return True
+
+    def is_merge_base(self) -> bool:
+        return self.operator == "..."